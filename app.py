@@ -14,7 +14,10 @@ import socket
 import atexit
 import tempfile
 import platform
+import queue
 import threading
+import multiprocessing
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from CTkMessagebox import CTkMessagebox
@@ -37,8 +40,15 @@ else:
 
 sys.path.insert(0, os.path.join(_base_path, 'backend'))
 
-from firebase_manager import FirebaseManager
-from pdf_parser_v2 import BitacoraParser
+from firebase_manager import FirebaseManager, resumir_especies
+from cache_parseo import CacheParseo
+from replica_local import ReplicaViajes
+from subida_lote import SubidaLote
+from analisis_lote import AnalisisLote
+from agregaciones import AgregadosCapturas, agregados_capturas, desglose_lance
+from grilla_capturas import GrillaCapturas
+from pdf_parser_v2 import PerfilParseo
+from especies_config import resolver_especie, ids_especie
 from updater import UpdateManager, APP_VERSION, aplicar_actualizacion_pendiente
 
 
@@ -46,6 +56,13 @@ from updater import UpdateManager, APP_VERSION, aplicar_actualizacion_pendiente
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# Espera entre reintentos de la escucha de notificaciones (segundos)
+ESCUCHA_BACKOFF_MIN = 5
+ESCUCHA_BACKOFF_MAX = 300
+
+# Viajes por página al transmitir resultados de búsqueda (ver search_data)
+TAMANO_PAGINA_BUSQUEDA = 100
+
 
 class SplashScreen:
     """Pantalla de inicio con animación"""
@@ -479,18 +496,30 @@ class BentosApp:
             _state_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
         self.APP_STATE_FILE = os.path.join(_state_dir, "app_state.json")
         
+        # Réplica local de la colección de viajes (todas las lecturas de viajes pasan por aquí)
+        self.replica = ReplicaViajes(self.firebase, os.path.join(_state_dir, "replica_viajes.db"))
+        
         # Variables
         self.current_section = "subir"  # subir o buscar
         self.loading_animation_running = False
         self.notificaciones = []  # Lista de notificaciones
         self.archivos_pendientes = []  # Archivos para procesar
         self.resultados_parseados = {}  # Cache de resultados parseados {archivo: resultado}
+        self._analisis = None  # AnalisisLote en curso (cabeceras y parseo previo a la subida)
+        self._busqueda = None  # Búsqueda en curso {cola, cancelado, viajes, ...} (ver search_data)
+        self._confirmacion_fichas = {}  # {archivo: (label de lances, frame de CAPTURA TOTAL)} pendientes
+        self.cache_parseo = CacheParseo()  # Caché en disco por hash del PDF (persiste entre sesiones)
+        self._lances_cache = {}  # Lances descargados en la búsqueda actual {id_viaje: [lances]}
         self.internet_conectado = True  # Estado de conexión a internet
         self._app_closing = False  # Flag para detener ciclos after al cerrar
         self._temp_files = []  # Archivos temporales a limpiar al cerrar
         self._viajes_conocidos = set()  # IDs de viajes ya conocidos (para detectar nuevos)
         self._viajes_inicializados = False  # Flag para saber si ya se cargó el set inicial
-        self._notif_timer_id = None  # ID del timer de notificaciones (evitar duplicados)
+        self._escucha_viajes = None  # Suscripción on_snapshot a la colección de viajes
+        self._escucha_generacion = 0  # Se incrementa al cancelar una suscripción (descarta entregas tardías)
+        self._escucha_reintento_id = None  # ID del after de reconexión pendiente
+        self._escucha_backoff = ESCUCHA_BACKOFF_MIN  # Espera (s) antes del próximo reintento
+        self._notif_ticks = 0  # Contador de verificaciones (para reconciliar eliminados cada cierto tiempo)
         
         # Cargar estado previo de viajes (para detectar cambios mientras estuvo apagado)
         self._cargar_estado_app()
@@ -507,12 +536,12 @@ class BentosApp:
         # Verificar conexión a internet al inicio
         self.verificar_conexion_internet_inicio()
         
+        # Escuchar cambios en bitácoras (notificaciones en tiempo real)
+        self.iniciar_escucha_notificaciones()
+        
         # Monitoreo periódico de conexión
         self.monitorear_conexion()
         
-        # Verificar notificaciones periódicamente
-        self.verificar_notificaciones()
-        
         # Actualizar reloj de la barra de estado
         self._actualizar_reloj()
         
@@ -777,8 +806,9 @@ class BentosApp:
         """Actualiza estadísticas en el sidebar (no bloqueante)"""
         def _consultar():
             try:
-                viajes = self.firebase.listar_viajes(limite=100) if self.firebase.db else []
-                count = len(viajes)
+                if self.firebase.db and self.internet_conectado:
+                    self.replica.sincronizar()
+                count = self.replica.contar()
             except Exception:
                 count = "?"
             # Actualizar UI en el hilo principal
@@ -1371,6 +1401,8 @@ class BentosApp:
                 return
         # Detener ciclos de after pendientes
         self._app_closing = True
+        self._detener_escucha_notificaciones()
+        self._cancelar_analisis()
         # Guardar estado actual de viajes conocidos
         self._guardar_estado_app()
         # Limpiar archivos temporales
@@ -1384,25 +1416,26 @@ class BentosApp:
     
     def _cargar_estado_app(self):
         """Carga el estado previo de viajes conocidos desde archivo local"""
+        self._viajes_previos = set()
+        self._tiene_estado_previo = False
         try:
             if os.path.exists(self.APP_STATE_FILE):
                 with open(self.APP_STATE_FILE, 'r') as f:
                     data = json.load(f)
-                    viajes_previos = set(data.get('viajes_conocidos', []))
-                    if viajes_previos:
-                        self._viajes_previos = viajes_previos
-                        self._tiene_estado_previo = True
-                        return
+                viajes_previos = set(data.get('viajes_conocidos', []))
+                if viajes_previos:
+                    self._viajes_previos = viajes_previos
+                    self._tiene_estado_previo = True
         except Exception as e:
             print(f"⚠️ No se pudo cargar estado previo: {e}")
-        
-        self._viajes_previos = set()
-        self._tiene_estado_previo = False
     
     def _guardar_estado_app(self):
         """Guarda el estado actual de viajes conocidos en archivo local"""
         try:
             os.makedirs(os.path.dirname(self.APP_STATE_FILE), exist_ok=True)
+            if not self._viajes_inicializados:
+                # Aún no llegó el primer snapshot: conservar el estado anterior
+                return
             data = {
                 'viajes_conocidos': list(self._viajes_conocidos),
                 'ultima_actualizacion': datetime.now().isoformat()
@@ -1637,6 +1670,19 @@ class BentosApp:
         elif not estado_anterior and self.internet_conectado:
             self._mostrar_banner_internet_restaurado()
         
+        # Restablecer la escucha de notificaciones
+        if self.internet_conectado and self.firebase.db:
+            if not estado_anterior:
+                self._escucha_backoff = ESCUCHA_BACKOFF_MIN
+                self.iniciar_escucha_notificaciones()
+            elif not self._escucha_activa():
+                self._programar_reconexion_escucha()
+            
+            # Cada 10 ciclos (5 min) se reconcilian los eliminados, que la escucha no ve
+            self._notif_ticks += 1
+            if self._notif_ticks % 10 == 0:
+                self._reconciliar_eliminados()
+        
         # Verificar cada 30 segundos
         self.root.after(30000, self.monitorear_conexion)
     
@@ -1911,9 +1957,11 @@ class BentosApp:
     
     def search_data(self):
         """Busca datos según los filtros y calcula estadísticas"""
-        # Verificar conexión a internet
-        if self._sin_internet_alerta("buscar información en la nube"):
-            return
+        # Sin internet se busca en la réplica local; solo se bloquea si está vacía
+        en_linea = self.internet_conectado and self.firebase.db
+        if not en_linea and not self.replica.tiene_datos():
+            if self._sin_internet_alerta("buscar información en la nube"):
+                return
         
         # Efecto visual en botón de búsqueda
         self._efecto_click_boton(self.search_btn, "#05BFDB", "#03A0B8")
@@ -1923,6 +1971,9 @@ class BentosApp:
         print("🔍 INICIANDO BÚSQUEDA DE DATOS...")
         print("="*60)
         
+        # Nueva búsqueda: descartar lances descargados en búsquedas anteriores
+        self._lances_cache = {}
+        
         # Limpiar status anterior
         for widget in self.search_status_frame.winfo_children():
             widget.destroy()
@@ -1949,14 +2000,11 @@ class BentosApp:
         progress_bar.pack(pady=10)
         progress_bar.start()
         
-        # Actualizar UI para mostrar el loading
-        self.root.update()
-        
         if self.stats_panel.winfo_ismapped():
             self.stats_panel.pack_forget()
             print("✓ Panel de estadísticas limpiado")
         
-        if not self.firebase.db:
+        if not self.firebase.db and not self.replica.tiene_datos():
             print("❌ Firebase no está conectado")
             loading_frame.destroy()
             CTkMessagebox(
@@ -1968,91 +2016,151 @@ class BentosApp:
             )
             return
         
-        print("✓ Firebase conectado")
-        
-        # Obtener todos los viajes
-        print("📥 Obteniendo viajes de Firebase...")
-        loading_label.configure(text="📥 Obteniendo datos de la nube")
-        self.root.update()
-        
-        viajes = self.firebase.listar_viajes(limite=500)
-        print(f"✓ Obtenidos {len(viajes) if viajes else 0} viajes")
-        
-        if not viajes:
-            print("❌ No se encontraron viajes en Firebase")
-            loading_frame.destroy()
-            self.search_status_frame.pack_forget()
-            CTkMessagebox(
-                title="Sin Datos",
-                message="❌ No se encontraron viajes en la base de datos",
-                icon="warning",
-                option_1="OK"
-            )
-            return
-        
-        # Aplicar filtros
-        print("\n🔧 Aplicando filtros...")
-        loading_label.configure(text="🔧 Aplicando filtros")
-        self.root.update()
-        
-        viajes_filtrados = viajes
-        
-        # Filtro por fechas
+        # Filtros de fecha y nave: se resuelven en Firestore (o en la réplica sin conexión)
         try:
             fecha_desde = self.fecha_desde.get_date()
             fecha_hasta = self.fecha_hasta.get_date()
             print(f"  - Rango de fechas: {fecha_desde} a {fecha_hasta}")
-            
-            viajes_filtrados = [
-                v for v in viajes_filtrados 
-                if v.get('fecha_zarpe') and 
-                fecha_desde <= datetime.fromisoformat(v['fecha_zarpe']).date() <= fecha_hasta
-            ]
         except Exception as e:
             print(f"  ⚠️ Error en filtro de fechas: {e}")
-            pass
+            fecha_desde = fecha_hasta = None
         
-        # Filtro por nave
         nave_filtro = self.nave_combo.get()
-        if nave_filtro != "Todas":
-            print(f"  - Nave: {nave_filtro}")
-            viajes_filtrados = [v for v in viajes_filtrados if v.get('nave_nombre') == nave_filtro]
+        nave = None if nave_filtro == "Todas" else nave_filtro
+        if nave:
+            print(f"  - Nave: {nave}")
+        
+        # Filtros restantes (sin equivalente en consultas de Firestore): se leen aquí
+        # porque los widgets no se pueden consultar desde el hilo de búsqueda
+        filtros = {
+            'capitan': self.capitan_entry.get().strip(),
+            'especie': self.especie_combo.get(),
+            'captura_min': self.captura_min_entry.get().strip(),
+            'captura_max': self.captura_max_entry.get().strip(),
+        }
+        if filtros['capitan']:
+            print(f"  - Capitán contiene: {filtros['capitan']}")
+        if filtros['especie'] != "Todas":
+            print(f"  - Especie objetivo: {filtros['especie']}")
+        
+        # Los viajes llegan por páginas desde un hilo secundario; la primera página
+        # abre la ventana de resultados y las siguientes se agregan a ella
+        if self._busqueda:
+            self._busqueda['cancelado'].set()
+        busqueda = {
+            'cola': queue.Queue(),
+            'cancelado': threading.Event(),
+            'viajes': [],
+            'leidos': 0,
+            'loading_frame': loading_frame,
+            'loading_label': loading_label,
+            'ventana_abierta': False,
+            'ultimo_refresco': 0.0,
+            'refresco_pendiente': False,
+        }
+        self._busqueda = busqueda
+        
+        loading_label.configure(text="📥 Consultando la nube" if en_linea else "📂 Buscando en la réplica local")
+        threading.Thread(
+            target=self._buscar_en_hilo,
+            args=(busqueda, en_linea, fecha_desde, fecha_hasta, nave, filtros),
+            daemon=True
+        ).start()
+        self._drenar_busqueda(busqueda)
+    
+    def _buscar_en_hilo(self, busqueda, en_linea, fecha_desde, fecha_hasta, nave, filtros):
+        """Hilo de búsqueda: consulta por páginas (Firestore o réplica), filtra cada
+        página y la publica en la cola de la búsqueda"""
+        cola, cancelado = busqueda['cola'], busqueda['cancelado']
+        entregadas = 0
+        try:
+            if filtros['especie'] != "Todas":
+                # Por especie: consulta por rango sobre el índice de especies de la
+                # réplica (al día con la nube si hay conexión) en vez de revisar cada viaje
+                if en_linea:
+                    self.replica.sincronizar()
+                viajes = self.replica.buscar_viajes(
+                    fecha_desde, fecha_hasta, nave, especie=filtros['especie'],
+                    captura_min=self._numero_o_none(filtros['captura_min']),
+                    captura_max=self._numero_o_none(filtros['captura_max'])
+                )
+                for inicio in range(0, len(viajes), TAMANO_PAGINA_BUSQUEDA):
+                    if cancelado.is_set():
+                        return
+                    pagina = viajes[inicio:inicio + TAMANO_PAGINA_BUSQUEDA]
+                    cola.put({'tipo': 'pagina', 'leidos': len(pagina),
+                              'viajes': self._filtrar_viajes_busqueda(pagina, filtros)})
+                return
+            
+            if en_linea:
+                print("📥 Consultando Firebase...")
+                try:
+                    for pagina in self.firebase.buscar_viajes_paginado(fecha_desde, fecha_hasta, nave,
+                                                                      TAMANO_PAGINA_BUSQUEDA):
+                        if cancelado.is_set():
+                            return
+                        cola.put({'tipo': 'pagina', 'leidos': len(pagina),
+                                  'viajes': self._filtrar_viajes_busqueda(pagina, filtros)})
+                        entregadas += 1
+                except Exception as e:
+                    print(f"✗ Error buscando viajes: {e}")
+                    if entregadas:
+                        cola.put({'tipo': 'error', 'mensaje': str(e)})
+                        return
+                    en_linea = False
+            
+            if not en_linea:
+                print("⚠️ Buscando en la réplica local")
+                viajes = self.replica.buscar_viajes(fecha_desde, fecha_hasta, nave)
+                for inicio in range(0, len(viajes), TAMANO_PAGINA_BUSQUEDA):
+                    if cancelado.is_set():
+                        return
+                    pagina = viajes[inicio:inicio + TAMANO_PAGINA_BUSQUEDA]
+                    cola.put({'tipo': 'pagina', 'leidos': len(pagina),
+                              'viajes': self._filtrar_viajes_busqueda(pagina, filtros)})
+        except Exception as e:
+            print(f"✗ Error en la búsqueda: {e}")
+            cola.put({'tipo': 'error', 'mensaje': str(e)})
+        finally:
+            cola.put({'tipo': 'fin'})
+    
+    @staticmethod
+    def _numero_o_none(texto):
+        """Convierte el texto de un campo numérico; None si está vacío o no es número"""
+        try:
+            return float(texto) if texto else None
+        except ValueError:
+            return None
+    
+    def _filtrar_viajes_busqueda(self, viajes, filtros):
+        """Aplica a una página de viajes los filtros de capitán y especie objetivo
+        con rango de captura (se ejecuta en el hilo de búsqueda)"""
+        viajes_filtrados = viajes
         
         # Filtro por capitán (búsqueda parcial case-insensitive)
-        capitan_filtro = self.capitan_entry.get().strip()
+        capitan_filtro = filtros['capitan']
         if capitan_filtro:
-            print(f"  - Capitán contiene: {capitan_filtro}")
             viajes_filtrados = [
                 v for v in viajes_filtrados 
                 if capitan_filtro.upper() in v.get('capitan', '').upper()
             ]
         
         # Filtro por especie objetivo con rango de captura
-        especie_filtro = self.especie_combo.get()
+        especie_filtro = filtros['especie']
         if especie_filtro != "Todas":
-            print(f"  - Especie objetivo: {especie_filtro}")
-            captura_min = self.captura_min_entry.get().strip()
-            captura_max = self.captura_max_entry.get().strip()
+            captura_min = filtros['captura_min']
+            captura_max = filtros['captura_max']
             
             viajes_con_especie = []
+            especie_id = resolver_especie(especie_filtro).id
+            self._precargar_resumenes(viajes_filtrados)
             for viaje in viajes_filtrados:
-                lances = self.firebase.obtener_lances_viaje(viaje.get('id_viaje'))
                 total_especie = 0.0
                 
-                # Usar CAPTURA TOTAL (lance 0) como fuente de verdad
-                lance_ct = next((l for l in lances if l.get('numero_lance') == 0 or l.get('es_captura_total')), None)
-                if lance_ct:
-                    for especie in lance_ct.get('especies', []):
-                        if especie_filtro.lower() in especie.get('nombre', '').lower():
-                            total_especie += especie.get('cantidad_ton', 0)
-                else:
-                    # Fallback: sumar de lances individuales
-                    for lance in lances:
-                        if lance.get('numero_lance', -1) == 0:
-                            continue
-                        for especie in lance.get('especies', []):
-                            if especie_filtro.lower() in especie.get('nombre', '').lower():
-                                total_especie += especie.get('cantidad_ton', 0)
+                # Usar CAPTURA TOTAL (resumen del viaje) como fuente de verdad
+                for especie in self._especies_captura_total(viaje) or []:
+                    if especie_id in ids_especie(especie.get('nombre', '')):
+                        total_especie += especie.get('cantidad_ton', 0)
                 
                 # Si encontró la especie, aplicar filtros de rango
                 if total_especie > 0:
@@ -2077,21 +2185,99 @@ class BentosApp:
                     viajes_con_especie.append(viaje)
             
             viajes_filtrados = viajes_con_especie
-            if captura_min and captura_max:
-                print(f"    - Captura de {especie_filtro} entre {captura_min} y {captura_max} TON")
-            elif captura_min:
-                print(f"    - Captura de {especie_filtro} >= {captura_min} TON")
-            elif captura_max:
-                print(f"    - Captura de {especie_filtro} <= {captura_max} TON")
         
-        print(f"\n✓ Viajes después de filtros: {len(viajes_filtrados)}")
+        return viajes_filtrados
+    
+    def _drenar_busqueda(self, busqueda):
+        """Vacía la cola de la búsqueda en el hilo principal: agrega cada página a la
+        ventana de resultados y se reprograma con root.after hasta el evento 'fin'"""
+        if busqueda is not self._busqueda or self._app_closing:
+            return
         
-        # Limpiar indicador de carga
-        loading_frame.destroy()
-        self.search_status_frame.pack_forget()
+        # Cerrar la ventana de resultados detiene la búsqueda
+        if busqueda['ventana_abierta'] and not self._ventana_resultados_abierta():
+            busqueda['cancelado'].set()
+            self._busqueda = None
+            return
         
-        # Mostrar resultados
-        if not viajes_filtrados:
+        terminado = False
+        try:
+            while True:
+                evento = busqueda['cola'].get_nowait()
+                if evento['tipo'] == 'pagina':
+                    busqueda['leidos'] += evento['leidos']
+                    if evento['viajes']:
+                        self._agregar_pagina_resultados(busqueda, evento['viajes'])
+                    elif not busqueda['ventana_abierta']:
+                        busqueda['loading_label'].configure(
+                            text=f"📥 {busqueda['leidos']} viajes revisados, sin coincidencias aún"
+                        )
+                elif evento['tipo'] == 'error':
+                    self._actualizar_estado(f"Búsqueda incompleta: {evento['mensaje']}", "⚠️")
+                elif evento['tipo'] == 'fin':
+                    terminado = True
+                    break
+        except queue.Empty:
+            pass
+        
+        # Las vistas se reconstruyen como máximo una vez por segundo mientras llegan páginas
+        if busqueda['refresco_pendiente'] and (terminado or time.monotonic() - busqueda['ultimo_refresco'] >= 1.0):
+            self._refrescar_vista_resultados(busqueda)
+        
+        if terminado:
+            self._terminar_busqueda(busqueda)
+        else:
+            self.root.after(50, self._drenar_busqueda, busqueda)
+    
+    def _agregar_pagina_resultados(self, busqueda, viajes):
+        """Agrega una página de viajes filtrados; la primera abre la ventana de resultados"""
+        busqueda['viajes'].extend(viajes)
+        total = len(busqueda['viajes'])
+        self.results_count_label.configure(text=f"📊 {total} viaje(s) encontrado(s)...")
+        
+        if not busqueda['ventana_abierta']:
+            busqueda['loading_frame'].destroy()
+            self.search_status_frame.pack_forget()
+            print(f"✓ Abriendo ventana de resultados con {total} viajes (primera página)...")
+            # La ventana comparte la lista: las páginas siguientes se agregan a la misma
+            self.mostrar_ventana_resultados(busqueda['viajes'], cargando=True)
+            busqueda['ventana_abierta'] = True
+            busqueda['ultimo_refresco'] = time.monotonic()
+            return
+        
+        self._actualizar_titulo_resultados(total, cargando=True)
+        busqueda['refresco_pendiente'] = True
+    
+    def _refrescar_vista_resultados(self, busqueda):
+        """Reconstruye la vista activa de la ventana de resultados con los viajes
+        recibidos hasta ahora, conservando la página y el texto de búsqueda"""
+        busqueda['refresco_pendiente'] = False
+        busqueda['ultimo_refresco'] = time.monotonic()
+        if not self._ventana_resultados_abierta():
+            return
+        
+        if self._modo_resultados == "individual":
+            texto_original = self.entry_buscar.get()
+            texto = texto_original.lower().strip()
+            self.viajes_filtrados = [
+                v for v in self.viajes_completos if self._coincide_busqueda(v, texto)
+            ] if texto else self.viajes_completos
+            self.actualizar_vista_individual()
+            if texto:
+                self.entry_buscar.insert(0, texto_original)
+        else:
+            self.cambiar_vista_resultados(self._modo_resultados, busqueda['viajes'])
+    
+    def _terminar_busqueda(self, busqueda):
+        """Cierra la búsqueda al recibir todas las páginas (hilo principal)"""
+        self._busqueda = None
+        viajes_filtrados = busqueda['viajes']
+        print(f"\n✓ Viajes después de filtros: {len(viajes_filtrados)} (de {busqueda['leidos']} revisados)")
+        
+        if not busqueda['ventana_abierta']:
+            # Limpiar indicador de carga
+            busqueda['loading_frame'].destroy()
+            self.search_status_frame.pack_forget()
             CTkMessagebox(
                 title="Sin Resultados",
                 message="❌ No se encontraron resultados con los filtros seleccionados",
@@ -2099,19 +2285,74 @@ class BentosApp:
                 option_1="OK"
             )
             self.results_count_label.configure(text="")
-        else:
-            # Actualizar contador
-            self.results_count_label.configure(
-                text=f"📊 {len(viajes_filtrados)} viaje(s) encontrado(s)"
-            )
-            
-            # MOSTRAR RESULTADOS EN VENTANA EMERGENTE
-            print(f"✓ Abriendo ventana de resultados con {len(viajes_filtrados)} viajes...")
-            self.mostrar_ventana_resultados(viajes_filtrados)
-            self._actualizar_estado(f"Búsqueda completada — {len(viajes_filtrados)} bitácora(s) encontrada(s)", "✅")
-            
-            print(f"✓ Ventana de resultados creada")
-            print("="*60)
+            return
+        
+        self.results_count_label.configure(text=f"📊 {len(viajes_filtrados)} viaje(s) encontrado(s)")
+        if self._ventana_resultados_abierta():
+            self._actualizar_titulo_resultados(len(viajes_filtrados), cargando=False)
+        self._actualizar_estado(f"Búsqueda completada — {len(viajes_filtrados)} bitácora(s) encontrada(s)", "✅")
+        print("="*60)
+    
+    def _ventana_resultados_abierta(self):
+        try:
+            return bool(self.resultado_window.winfo_exists())
+        except (AttributeError, tk.TclError):
+            return False
+    
+    def _actualizar_titulo_resultados(self, total, cargando):
+        """Actualiza el contador de la ventana de resultados"""
+        sufijo = " ⏳" if cargando else ""
+        self.resultado_window.title(f"📊 Resultados de Búsqueda - {total} Bitácora(s){sufijo}")
+        self.resultado_titulo_label.configure(text=f"📋 {total} Bitácora(s) Encontrada(s){sufijo}")
+    
+    def _obtener_lances_viajes(self, viajes):
+        """Retorna {id_viaje: [lances]} descargando en bloque solo los viajes que
+        aún no están en el caché de la búsqueda actual"""
+        ids = [v.get('id_viaje') for v in viajes if v.get('id_viaje')]
+        faltantes = [id_viaje for id_viaje in ids if id_viaje not in self._lances_cache]
+        if faltantes:
+            self._lances_cache.update(self.firebase.obtener_lances_multiples(faltantes))
+        return {id_viaje: self._lances_cache.get(id_viaje, []) for id_viaje in ids}
+    
+    def _agregados_resultados(self, viajes):
+        """Agregados de capturas del conjunto de viajes, memorizados mientras el
+        conjunto no cambie (ver backend/agregaciones.py)"""
+        self._precargar_resumenes(viajes)
+        return agregados_capturas(viajes, self._especies_captura_total)
+    
+    def _precargar_resumenes(self, viajes):
+        """Descarga en bloque los lances de los viajes que no tienen
+        'resumen_especies' en su documento (subidos antes de que existiera)"""
+        sin_resumen = [v for v in viajes if 'resumen_especies' not in v]
+        if sin_resumen:
+            self._obtener_lances_viajes(sin_resumen)
+    
+    def _especies_captura_total(self, viaje):
+        """Retorna las especies de la CAPTURA TOTAL de un viaje en el formato de
+        lance['especies'], armadas desde el resumen guardado en el documento del
+        viaje. Solo recurre a los lances si el documento no tiene resumen.
+        Retorna None si el viaje no tiene datos de capturas."""
+        resumen = viaje.get('resumen_especies')
+        if resumen is None:
+            lances = self._obtener_lances_viajes([viaje]).get(viaje.get('id_viaje'), [])
+            if not lances:
+                return None
+            resumen = resumir_especies(lances)
+        
+        especies = []
+        for total in resumen:
+            base = {'nombre': total.get('nombre', ''), 'tipo_especie': total.get('tipo_especie')}
+            if total.get('retenida_ton', 0) > 0:
+                especies.append({**base, 'tipo_captura': 'retenida',
+                                 'cantidad_ton': total['retenida_ton'], 'cantidad_unidades': 0})
+            if total.get('descartada_ton', 0) > 0 or total.get('descartada_unidades', 0) > 0:
+                especies.append({**base, 'tipo_captura': 'descartada',
+                                 'cantidad_ton': total.get('descartada_ton', 0),
+                                 'cantidad_unidades': total.get('descartada_unidades', 0)})
+            if total.get('incidental_unidades', 0) > 0:
+                especies.append({**base, 'tipo_captura': 'incidental',
+                                 'cantidad_ton': 0, 'cantidad_unidades': total['incidental_unidades']})
+        return especies
     
     def clear_filters(self):
         """Limpia todos los filtros y resultados"""
@@ -2135,11 +2376,13 @@ class BentosApp:
         if self.stats_panel.winfo_ismapped():
             self.stats_panel.pack_forget()
     
-    def mostrar_ventana_resultados(self, viajes):
-        """Muestra los resultados en una ventana emergente con dos modos de visualización"""
+    def mostrar_ventana_resultados(self, viajes, cargando=False):
+        """Muestra los resultados en una ventana emergente con dos modos de visualización.
+        Con cargando=True la lista 'viajes' sigue creciendo (ver _agregar_pagina_resultados)."""
+        sufijo = " ⏳" if cargando else ""
         # Crear ventana emergente
         self.resultado_window = ctk.CTkToplevel(self.root)
-        self.resultado_window.title(f"📊 Resultados de Búsqueda - {len(viajes)} Bitácora(s)")
+        self.resultado_window.title(f"📊 Resultados de Búsqueda - {len(viajes)} Bitácora(s){sufijo}")
         
         # Fade-in al abrir
         self.resultado_window.attributes('-alpha', 0.0)
@@ -2179,12 +2422,13 @@ class BentosApp:
         header.pack(fill="x", padx=0, pady=0)
         header.pack_propagate(False)
         
-        ctk.CTkLabel(
+        self.resultado_titulo_label = ctk.CTkLabel(
             header,
-            text=f"📋 {len(viajes)} Bitácora(s) Encontrada(s)",
+            text=f"📋 {len(viajes)} Bitácora(s) Encontrada(s){sufijo}",
             font=ctk.CTkFont(size=26, weight="bold"),
             text_color="white"
-        ).pack(side="left", padx=30, pady=20)
+        )
+        self.resultado_titulo_label.pack(side="left", padx=30, pady=20)
         
         # Panel de control - Selector de vista
         control_panel = ctk.CTkFrame(self.resultado_window, fg_color="#F0F0F0", height=80)
@@ -2237,6 +2481,7 @@ class BentosApp:
         """Cambia entre vista de resumen y vista individual"""
         print(f"\n🔄 Cambiando vista a: {modo}")
         print(f"📊 Viajes a mostrar: {len(viajes)}")
+        self._modo_resultados = modo
         
         # Limpiar contenedor
         for widget in self.contenedor_vistas.winfo_children():
@@ -2262,69 +2507,20 @@ class BentosApp:
     
     def mostrar_resumen_total(self, viajes):
         """Muestra el resumen total de todas las capturas agregadas"""
-        # Calcular totales por especie SEPARANDO retenidas, descartadas e incidentales
-        especies_retenidas = {}
-        especies_descartadas = {}
-        especies_incidentales = {}  # {nombre: unidades}
-        total_lances = 0
-        total_retenidas_ton = 0
-        total_descartadas_ton = 0
-        total_incidentales_unidades = 0
-        
-        for viaje in viajes:
-            viaje_id = viaje.get('id_viaje')
-            lances = self.firebase.obtener_lances_viaje(viaje_id)
-            total_lances += viaje.get('total_lances_declarados', 0)
-            
-            # FILTRAR SOLO EL LANCE CAPTURA TOTAL (lance 0)
-            lance_captura_total = None
-            for lance in lances:
-                if lance.get('es_captura_total', False):
-                    lance_captura_total = lance
-                    break
-            
-            # Si no hay lance de captura total, usar el primero como fallback
-            if not lance_captura_total and lances:
-                lance_captura_total = lances[0]
-            
-            # Procesar SOLO las especies del lance CAPTURA TOTAL
-            if lance_captura_total:
-                for especie_data in lance_captura_total.get('especies', []):
-                    nombre = especie_data.get('nombre')
-                    cantidad_ton = especie_data.get('cantidad_ton', 0)
-                    cantidad_unidades = especie_data.get('cantidad_unidades', 0)
-                    tipo_captura = especie_data.get('tipo_captura', 'retenida')
-                    
-                    # Separar por tipo de captura
-                    if tipo_captura == 'retenida':
-                        if cantidad_ton > 0:
-                            if nombre not in especies_retenidas:
-                                especies_retenidas[nombre] = 0
-                            especies_retenidas[nombre] += cantidad_ton
-                            total_retenidas_ton += cantidad_ton
-                    elif tipo_captura == 'descartada':
-                        if cantidad_ton > 0 or cantidad_unidades > 0:
-                            if nombre not in especies_descartadas:
-                                especies_descartadas[nombre] = {'ton': 0, 'unidades': 0}
-                            especies_descartadas[nombre]['ton'] += cantidad_ton
-                            especies_descartadas[nombre]['unidades'] += cantidad_unidades
-                            total_descartadas_ton += cantidad_ton
-                    elif tipo_captura == 'incidental':
-                        if cantidad_unidades > 0:
-                            if nombre not in especies_incidentales:
-                                especies_incidentales[nombre] = 0
-                            especies_incidentales[nombre] += cantidad_unidades
-                            total_incidentales_unidades += cantidad_unidades
-        
-        # Calcular total general
-        total_general = total_retenidas_ton + total_descartadas_ton
-        
-        # Calcular porcentajes
-        porc_retenidas = (total_retenidas_ton / total_general * 100) if total_general > 0 else 0
-        porc_descartadas = (total_descartadas_ton / total_general * 100) if total_general > 0 else 0
-        
-        # Contar especies únicas
-        total_especies = len(especies_retenidas) + len(especies_descartadas) + len(especies_incidentales)
+        # Totales por especie SEPARANDO retenidas, descartadas e incidentales
+        # (compartidos con el gráfico y el Excel, ver backend/agregaciones.py)
+        resumen = self._agregados_resultados(viajes).resumen()
+        especies_retenidas = resumen['especies_retenidas']
+        especies_descartadas = resumen['especies_descartadas']
+        especies_incidentales = resumen['especies_incidentales']  # {nombre: unidades}
+        total_lances = resumen['total_lances']
+        total_retenidas_ton = resumen['total_retenidas_ton']
+        total_descartadas_ton = resumen['total_descartadas_ton']
+        total_incidentales_unidades = resumen['total_incidentales_unidades']
+        total_general = resumen['total_general']
+        porc_retenidas = resumen['porc_retenidas']
+        porc_descartadas = resumen['porc_descartadas']
+        total_especies = resumen['total_especies']
         
         # Crear frame principal
         resumen_frame = ctk.CTkFrame(self.contenedor_vistas, fg_color="white", corner_radius=15)
@@ -2352,13 +2548,7 @@ class BentosApp:
         ctk.CTkButton(
             botones_resumen_frame,
             text="📥 Exportar Excel",
-            command=lambda: self.exportar_resumen_excel(
-                viajes, especies_retenidas, especies_descartadas,
-                total_retenidas_ton, total_descartadas_ton, total_general,
-                total_lances, total_especies,
-                porc_retenidas, porc_descartadas,
-                especies_incidentales, total_incidentales_unidades
-            ),
+            command=lambda: self.exportar_resumen_excel(viajes),
             fg_color="#2E8B9E",
             hover_color="#1A5F7A",
             height=35,
@@ -2948,10 +3138,14 @@ class BentosApp:
         # Crear tarjetas para la página actual
         if viajes_pagina:
             print(f"\n📦 Creando {len(viajes_pagina)} tarjetas...")
+            # Descargar de una vez los lances que falten para toda la página
+            self._precargar_resumenes(viajes_pagina)
+            # Desglose por tipo de captura de toda la página en una pasada
+            agregados_pagina = AgregadosCapturas(viajes_pagina, self._especies_captura_total)
             for i, viaje in enumerate(viajes_pagina, inicio + 1):
                 print(f"  Tarjeta #{i}: {viaje.get('id_viaje', 'N/A')}")
                 try:
-                    self.crear_tarjeta_resultado(scroll_frame, viaje, i)
+                    self.crear_tarjeta_resultado(scroll_frame, viaje, i, agregados_pagina)
                     print(f"    ✅ Tarjeta #{i} creada")
                 except Exception as e:
                     print(f"    ❌ ERROR en tarjeta #{i}: {e}")
@@ -3023,19 +3217,22 @@ class BentosApp:
         if not texto_busqueda:
             self.viajes_filtrados = self.viajes_completos
         else:
-            self.viajes_filtrados = []
-            for viaje in self.viajes_completos:
-                # Buscar en ID, nave, capitán, puerto
-                if (texto_busqueda in str(viaje.get('id_viaje', '')).lower() or
-                    texto_busqueda in viaje.get('nave_nombre', '').lower() or
-                    texto_busqueda in viaje.get('capitan', '').lower() or
-                    texto_busqueda in viaje.get('puerto_zarpe', '').lower()):
-                    self.viajes_filtrados.append(viaje)
+            self.viajes_filtrados = [
+                viaje for viaje in self.viajes_completos
+                if self._coincide_busqueda(viaje, texto_busqueda)
+            ]
         
         # Volver a página 1 después de filtrar
         self.pagina_actual = 1
         self.actualizar_vista_individual()
     
+    def _coincide_busqueda(self, viaje, texto_busqueda):
+        """Busca el texto en ID, nave, capitán y puerto de un viaje"""
+        return (texto_busqueda in str(viaje.get('id_viaje', '')).lower() or
+                texto_busqueda in viaje.get('nave_nombre', '').lower() or
+                texto_busqueda in viaje.get('capitan', '').lower() or
+                texto_busqueda in viaje.get('puerto_zarpe', '').lower())
+    
     def limpiar_busqueda(self):
         """Limpia el campo de búsqueda y restaura todos los resultados"""
         self.entry_buscar.delete(0, 'end')
@@ -3052,34 +3249,23 @@ class BentosApp:
         # Recrear la vista
         self.mostrar_bitacoras_individuales(self.viajes_completos)
     
-    def crear_tarjeta_resultado(self, parent, viaje, numero):
-        """Crea una tarjeta de resultado en la ventana emergente"""
-        # Obtener lances y calcular totales
+    def crear_tarjeta_resultado(self, parent, viaje, numero, agregados=None):
+        """Crea una tarjeta de resultado en la ventana emergente
+        (agregados: AgregadosCapturas que incluye este viaje, ej. el de la página)"""
+        # Obtener especies de la CAPTURA TOTAL y calcular totales
         viaje_id = viaje.get('id_viaje', 'N/A')
-        lances = self.firebase.obtener_lances_viaje(viaje_id)
+        especies_ct = self._especies_captura_total(viaje)
         
-        if not lances:
+        if especies_ct is None:
             print(f"⚠️  Viaje {viaje_id} no tiene lances - saltando tarjeta")
             return
         
-        # FILTRAR SOLO EL LANCE CAPTURA TOTAL (lance 0)
-        lance_captura_total = None
-        for lance in lances:
-            if lance.get('es_captura_total', False):
-                lance_captura_total = lance
-                break
-        
-        # Si no hay lance de captura total, usar el primero como fallback
-        if not lance_captura_total:
-            lance_captura_total = lances[0]
-        
         total_camaron = 0
         total_merluza = 0
         especies_totales = {}
         
-        # Procesar SOLO las especies del lance CAPTURA TOTAL
-        especies = lance_captura_total.get('especies', [])
-        for especie in especies:
+        # Procesar SOLO las especies de la CAPTURA TOTAL
+        for especie in especies_ct:
             # Contar TODAS las especies (retenida Y descartada)
             nombre = especie.get('nombre', '')
             if not nombre:
@@ -3093,20 +3279,18 @@ class BentosApp:
             especies_totales[nombre] += cantidad
             
             # Totales específicos
-            nombre_lower = nombre.lower()
-            if 'camarón' in nombre_lower or 'camaron' in nombre_lower:
+            grupo = resolver_especie(nombre).grupo
+            if grupo == 'camaron':
                 total_camaron += cantidad
-            elif 'merluza' in nombre_lower:
+            elif grupo == 'merluza':
                 total_merluza += cantidad
         
-        # Identificar especies objetivo
-        especies_objetivo_nombres = ['Camarón nailon', 'Langostino amarillo', 'Langostino colorado', 'Gamba', 'Camarón', 'Langostino']
+        # Identificar especies objetivo (camarón, langostino y gamba)
         especies_objetivo = {}
         otras_especies = {}
         
         for especie, cantidad in especies_totales.items():
-            es_objetivo = any(obj.lower() in especie.lower() for obj in especies_objetivo_nombres)
-            if es_objetivo:
+            if resolver_especie(especie).es_captura_objetivo:
                 especies_objetivo[especie] = cantidad
             else:
                 otras_especies[especie] = cantidad
@@ -3253,34 +3437,11 @@ class BentosApp:
                 text_color="#1A1A1A"
             ).pack(side="left")
         
-        # SEPARAR ESPECIES POR TIPO DE CAPTURA (usando solo lance CAPTURA TOTAL)
-        especies_retenidas = {}
-        especies_descartadas = {}  # Guardará {'nombre': {'ton': X, 'unidades': Y}}
-        especies_incidentales = {}
-        
-        # Procesar SOLO las especies del lance CAPTURA TOTAL
-        for especie in lance_captura_total.get('especies', []):
-            nombre = especie.get('nombre', '')
-            if not nombre:
-                continue
-            cantidad = especie.get('cantidad_ton', 0)
-            cantidad_unidades = especie.get('cantidad_unidades', 0)
-            tipo_captura = especie.get('tipo_captura', 'retenida')
-            tipo_especie = especie.get('tipo_especie', 'otra')
-            
-            if tipo_captura == 'retenida':
-                if nombre not in especies_retenidas:
-                    especies_retenidas[nombre] = 0
-                especies_retenidas[nombre] += cantidad
-            elif tipo_captura == 'descartada':
-                if nombre not in especies_descartadas:
-                    especies_descartadas[nombre] = {'ton': 0, 'unidades': 0}
-                especies_descartadas[nombre]['ton'] += cantidad
-                especies_descartadas[nombre]['unidades'] += cantidad_unidades
-            elif tipo_captura == 'incidental':
-                if nombre not in especies_incidentales:
-                    especies_incidentales[nombre] = 0
-                especies_incidentales[nombre] += cantidad_unidades
+        # SEPARAR ESPECIES POR TIPO DE CAPTURA (usando solo lance CAPTURA TOTAL),
+        # descartadas: {'nombre': {'ton': X, 'unidades': Y}}
+        if agregados is None:
+            agregados = AgregadosCapturas([viaje], self._especies_captura_total)
+        especies_retenidas, especies_descartadas, especies_incidentales = agregados.desglose_viaje(viaje.get('id_viaje'))
         
         # Ordenar por cantidad
         top_retenidas = sorted(especies_retenidas.items(), key=lambda x: x[1], reverse=True)[:5]
@@ -3883,10 +4044,7 @@ class BentosApp:
             import traceback
             traceback.print_exc()
     
-    def exportar_resumen_excel(self, viajes, especies_retenidas, especies_descartadas,
-                               total_retenidas_ton, total_descartadas_ton, total_general,
-                               total_lances, total_especies, porc_retenidas, porc_descartadas,
-                               especies_incidentales=None, total_incidentales_unidades=0):
+    def exportar_resumen_excel(self, viajes):
         """Exporta el resumen total de capturas a un archivo Excel"""
         from openpyxl import Workbook
         from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
@@ -3903,6 +4061,20 @@ class BentosApp:
             return
         
         try:
+            # Mismos agregados que la vista de resumen (memorizados para esta búsqueda)
+            resumen = self._agregados_resultados(viajes).resumen()
+            especies_retenidas = resumen['especies_retenidas']
+            especies_descartadas = resumen['especies_descartadas']
+            especies_incidentales = resumen['especies_incidentales']
+            total_retenidas_ton = resumen['total_retenidas_ton']
+            total_descartadas_ton = resumen['total_descartadas_ton']
+            total_incidentales_unidades = resumen['total_incidentales_unidades']
+            total_general = resumen['total_general']
+            total_lances = resumen['total_lances']
+            total_especies = resumen['total_especies']
+            porc_retenidas = resumen['porc_retenidas']
+            porc_descartadas = resumen['porc_descartadas']
+            
             wb = Workbook()
             ws = wb.active
             ws.title = "Resumen Capturas"
@@ -4198,44 +4370,10 @@ class BentosApp:
             from matplotlib.patches import Rectangle
             import tkinter as tk
             
-            # Calcular datos agregados
-            especies_retenidas = {}
-            especies_descartadas = {}
-            
-            for viaje in viajes:
-                viaje_id = viaje.get('id_viaje')
-                lances = self.firebase.obtener_lances_viaje(viaje_id)
-                
-                # FILTRAR SOLO EL LANCE CAPTURA TOTAL (lance 0)
-                lance_captura_total = None
-                for lance in lances:
-                    if lance.get('es_captura_total', False):
-                        lance_captura_total = lance
-                        break
-                
-                # Si no hay lance de captura total, usar el primero como fallback
-                if not lance_captura_total and lances:
-                    lance_captura_total = lances[0]
-                
-                # Procesar SOLO las especies del lance CAPTURA TOTAL
-                if lance_captura_total:
-                    for especie in lance_captura_total.get('especies', []):
-                        nombre = especie.get('nombre', '')
-                        if not nombre:
-                            continue
-                        cantidad_ton = especie.get('cantidad_ton', 0)
-                        cantidad_unidades = especie.get('cantidad_unidades', 0)
-                        tipo_captura = especie.get('tipo_captura', 'retenida')
-                        
-                        if tipo_captura == 'retenida':
-                            if nombre not in especies_retenidas:
-                                especies_retenidas[nombre] = 0
-                            especies_retenidas[nombre] += cantidad_ton
-                        elif tipo_captura == 'descartada':
-                            if nombre not in especies_descartadas:
-                                especies_descartadas[nombre] = {'ton': 0, 'unidades': 0}
-                            especies_descartadas[nombre]['ton'] += cantidad_ton
-                            especies_descartadas[nombre]['unidades'] += cantidad_unidades
+            # Datos agregados (los mismos de la vista de resumen)
+            resumen = self._agregados_resultados(viajes).resumen()
+            especies_retenidas = resumen['especies_retenidas']
+            especies_descartadas = resumen['especies_descartadas']
             
             # Preparar datos (SOLO TONELADAS, no unidades)
             especies_data = []
@@ -4554,7 +4692,7 @@ class BentosApp:
         """Genera un mapa de calor profesional con las ubicaciones de los lances"""
         try:
             import folium
-            from folium.plugins import HeatMap, MiniMap
+            from folium.plugins import HeatMap, MiniMap, FastMarkerCluster, Fullscreen
             import webbrowser
             import tempfile
             import os
@@ -4562,10 +4700,11 @@ class BentosApp:
             # Recolectar datos de lances
             lances_data = []
             
+            lances_por_viaje = self._obtener_lances_viajes(viajes)
             for viaje in viajes:
                 viaje_id = viaje.get('id_viaje')
                 nave_nombre = viaje.get('nave_nombre', 'N/A')
-                lances = self.firebase.obtener_lances_viaje(viaje_id)
+                lances = lances_por_viaje.get(viaje_id, [])
                 
                 # Filtrar solo lances individuales (excluir lance 0 CAPTURA TOTAL)
                 for lance in lances:
@@ -4581,51 +4720,8 @@ class BentosApp:
                     if lat_inicio is None or lon_inicio is None:
                         continue
                     
-                    # Separar especies por tipo
-                    especies_retenidas = []
-                    especies_descartadas_ton = []
-                    especies_descartadas_unidades = {}
-                    especies_incidentales = {}  # {nombre: unidades}
-                    total_objetivo = 0
-                    total_retenida = 0
-                    total_descarte = 0
-                    total_incidental = 0
-                    
-                    for especie in lance.get('especies', []):
-                        nombre = especie.get('nombre', '')
-                        cantidad_ton = especie.get('cantidad_ton', 0)
-                        cantidad_unidades = especie.get('cantidad_unidades', 0)
-                        tipo_captura = especie.get('tipo_captura', 'retenida')
-                        
-                        if tipo_captura == 'retenida':
-                            if cantidad_ton > 0:
-                                especies_retenidas.append({
-                                    'nombre': nombre,
-                                    'ton': cantidad_ton
-                                })
-                                total_retenida += cantidad_ton
-                                # Verificar si es objetivo
-                                es_objetivo = any(obj.lower() in nombre.lower() 
-                                                for obj in ['camarón', 'camaron', 'langostino', 'gamba'])
-                                if es_objetivo:
-                                    total_objetivo += cantidad_ton
-                        
-                        elif tipo_captura == 'descartada':
-                            # NO mezclar toneladas y unidades - priorizar toneladas
-                            if cantidad_ton > 0:
-                                total_descarte += cantidad_ton
-                                especies_descartadas_ton.append({
-                                    'nombre': nombre,
-                                    'ton': cantidad_ton
-                                })
-                            elif cantidad_unidades > 0:
-                                # Solo mostrar unidades si NO hay toneladas
-                                especies_descartadas_unidades[nombre] = cantidad_unidades
-                        
-                        elif tipo_captura == 'incidental':
-                            if cantidad_unidades > 0:
-                                especies_incidentales[nombre] = especies_incidentales.get(nombre, 0) + cantidad_unidades
-                                total_incidental += cantidad_unidades
+                    # Separar especies por tipo (ver backend/agregaciones.py)
+                    desglose = desglose_lance(lance.get('especies', []))
                     
                     # Incluir TODOS los lances (incluso sin capturas)
                     lances_data.append({
@@ -4636,18 +4732,12 @@ class BentosApp:
                         'lon': lon_inicio,
                         'lat_fin': lat_fin,
                         'lon_fin': lon_fin,
-                        'total_objetivo': total_objetivo,
-                        'total_retenida': total_retenida,
-                        'total_descarte': total_descarte,
-                        'total_incidental': total_incidental,
-                        'especies_retenidas': especies_retenidas,
-                        'especies_descartadas_ton': especies_descartadas_ton,
-                        'especies_descartadas_unidades': especies_descartadas_unidades,
-                        'especies_incidentales': especies_incidentales,
+                        **desglose,
                         'arte_pesca': lance.get('arte_pesca', 'N/A'),
                         'fecha_inicio': lance.get('fecha_inicio', 'N/A'),
                         'observaciones': lance.get('observaciones', ''),
-                        'sin_capturas': total_retenida == 0 and total_descarte == 0 and total_incidental == 0
+                        'sin_capturas': (desglose['total_retenida'] == 0 and desglose['total_descarte'] == 0
+                                         and desglose['total_incidental'] == 0)
                     })
             
             if not lances_data:
@@ -4658,18 +4748,12 @@ class BentosApp:
                 )
                 return
             
-            # Calcular centro y límites del mapa
-            lat_centro = sum(l['lat'] for l in lances_data) / len(lances_data)
-            lon_centro = sum(l['lon'] for l in lances_data) / len(lances_data)
-            
-            lat_min = min(l['lat'] for l in lances_data)
-            lat_max = max(l['lat'] for l in lances_data)
-            lon_min = min(l['lon'] for l in lances_data)
-            lon_max = max(l['lon'] for l in lances_data)
+            # Agrupar inicios y fines de lance en celdas con sus totales precalculados
+            grilla = GrillaCapturas(lances_data)
             
             # Crear mapa con estilo profesional CLARO
             mapa = folium.Map(
-                location=[lat_centro, lon_centro],
+                location=grilla.centro(),
                 zoom_start=9,
                 tiles='CartoDB Voyager',  # Tema CLARO profesional
                 control_scale=True  # Agregar escala
@@ -4686,11 +4770,9 @@ class BentosApp:
                 control=True
             ).add_to(mapa)
             
-            # Preparar datos para heat maps con mejor contraste
-            coords_objetivo = [[l['lat'], l['lon'], l['total_objetivo'] * 8] 
-                              for l in lances_data if l['total_objetivo'] > 0]
-            coords_descarte = [[l['lat'], l['lon'], l['total_descarte'] * 8] 
-                              for l in lances_data if l['total_descarte'] > 0]
+            # Heat maps desde las celdas (un punto por celda, no por lance)
+            coords_objetivo = grilla.puntos_calor('total_objetivo', factor=8)
+            coords_descarte = grilla.puntos_calor('total_descarte', factor=8)
             
             # Heat map para especies objetivo (gradiente verde brillante)
             if coords_objetivo:
@@ -4732,30 +4814,76 @@ class BentosApp:
                     show=True
                 ).add_to(mapa)
             
-            # Agregar marcadores detallados con círculos proporcionales
+            # Círculos proporcionales a la captura total de cada celda
+            capa_celdas = folium.FeatureGroup(name='⭕ Captura por celda', show=True)
+            for celda in grilla.celdas():
+                total_retenida = celda['total_retenida']
+                total_descarte = celda['total_descarte']
+                total_incidental = celda['total_incidental']
+                total_captura = total_retenida + total_descarte
+                
+                if total_captura == 0 and total_incidental == 0:
+                    color_circulo, color_borde = '#888888', '#555555'
+                elif total_retenida > total_descarte:
+                    color_circulo, color_borde = '#00cc00', '#006600'
+                elif total_descarte > 0:
+                    color_circulo, color_borde = '#ff3300', '#990000'
+                else:
+                    color_circulo, color_borde = '#9C27B0', '#6A1B9A'
+                
+                porcentaje_retenida = (total_retenida / total_captura * 100) if total_captura > 0 else 0
+                porcentaje_descarte = (total_descarte / total_captura * 100) if total_captura > 0 else 0
+                incidental_linea = ""
+                if total_incidental > 0:
+                    incidental_linea = f"🦭 Incidental: <b style='color: #9C27B0;'>{int(total_incidental)} ind.</b><br>"
+                tooltip_celda = f"""
+                <div style='font-family: Arial; text-align: center;'>
+                    <b style='font-size: 13px; color: {color_circulo};'>▦ {celda['lances']} lance(s)</b><br>
+                    <span style='font-size: 11px;'>{abs(celda['lat']):.2f}°S, {abs(celda['lon']):.2f}°W</span><br>
+                    <hr style='margin: 4px 0; border: none; border-top: 1px solid #ddd;'>
+                    <span style='font-size: 10px;'>
+                        🎯 Retenido: <b style='color: #00cc00;'>{total_retenida:.2f}T ({porcentaje_retenida:.1f}%)</b><br>
+                        🗑️ Descarte: <b style='color: #ff3300;'>{total_descarte:.3f}T ({porcentaje_descarte:.1f}%)</b><br>
+                        {incidental_linea}
+                        ⚖️ <b>Total: {total_captura:.2f}T</b>
+                    </span>
+                </div>
+                """
+                
+                folium.Circle(
+                    location=[celda['lat'], celda['lon']],
+                    radius=min(max(total_captura * 400, 150), 2000),
+                    color=color_borde,
+                    fill=True,
+                    fillColor=color_circulo,
+                    fillOpacity=0.5,
+                    weight=3,
+                    tooltip=folium.Tooltip(tooltip_celda, sticky=True)
+                ).add_to(capa_celdas)
+            capa_celdas.add_to(mapa)
+            
+            # Marcadores por lance agrupados (clusters): el detalle de cada lance se
+            # guarda una sola vez en la página como arreglo compacto y el popup se
+            # arma en el navegador al hacer click (ver popupLance)
+            detalle_lances = []
+            marcadores = []
             for lance_data in lances_data:
                 lat = lance_data['lat']
                 lon = lance_data['lon']
-                total_objetivo = lance_data['total_objetivo']
                 total_retenida = lance_data['total_retenida']
                 total_descarte = lance_data['total_descarte']
-                total_captura = total_retenida + total_descarte
                 
                 # Determinar color según tipo predominante (mejor contraste)
                 if lance_data.get('sin_capturas'):
-                    color_marker = 'gray'
                     color_circulo = '#888888'  # Gris
                     color_borde = '#555555'
                 elif total_retenida > total_descarte:
-                    color_marker = 'green'
                     color_circulo = '#00cc00'  # Verde brillante
                     color_borde = '#006600'
                 elif total_descarte > 0:
-                    color_marker = 'red'
                     color_circulo = '#ff3300'  # Rojo brillante
                     color_borde = '#990000'
                 else:
-                    color_marker = 'gray'
                     color_circulo = '#888888'
                     color_borde = '#555555'
                 
@@ -4769,290 +4897,169 @@ class BentosApp:
                     except:
                         pass
                 
-                # Crear popup PROFESIONAL con toda la información
-                popup_html = f"""
-                <div style="font-family: 'Segoe UI', Arial, sans-serif; width: 350px; max-height: 450px; overflow-y: auto;">
-                    <div style="background: linear-gradient(135deg, #05BFDB 0%, #0492A8 100%); 
-                                color: white; padding: 12px; margin: -10px -10px 10px -10px; 
-                                border-radius: 5px 5px 0 0;">
-                        <h3 style="margin: 0; font-size: 16px; font-weight: 600;">
-                            ⚓ LANCE #{lance_data['num_lance']}
-                        </h3>
-                        <p style="margin: 5px 0 0 0; font-size: 11px; opacity: 0.9;">
-                            {lance_data['viaje_id']} | {lance_data['nave']}
-                        </p>
-                    </div>
-                    
-                    <div style="background: #f8f9fa; padding: 8px; border-radius: 4px; margin-bottom: 8px;">
-                        <p style="margin: 3px 0; font-size: 11px; color: #666;">
-                            <b>📅 Fecha:</b> {fecha_str}
-                        </p>
-                        <p style="margin: 3px 0; font-size: 11px; color: #666;">
-                            <b>🎣 Arte:</b> {lance_data['arte_pesca']}
-                        </p>
-                        <p style="margin: 3px 0; font-size: 11px; color: #666;">
-                            <b>📍 Inicio:</b> {lat:.5f}°S, {-abs(lon):.5f}°W
-                        </p>
-                """
-                
-                if lance_data['lat_fin'] and lance_data['lon_fin']:
-                    popup_html += f"""
-                        <p style="margin: 3px 0; font-size: 11px; color: #666;">
-                            <b>📍 Fin:</b> {lance_data['lat_fin']:.5f}°S, {-abs(lance_data['lon_fin']):.5f}°W
-                        </p>
-                    """
-                
-                popup_html += "</div>"
-                
-                # CAPTURA RETENIDA
-                popup_html += f"""
-                    <div style="border-left: 4px solid #00cc00; padding-left: 8px; margin: 10px 0;">
-                        <p style="margin: 5px 0; font-weight: bold; color: #00cc00; font-size: 13px;">
-                            🎯 CAPTURA RETENIDA: {total_retenida:.3f} TON
-                        </p>
-                """
-                
-                if lance_data['especies_retenidas']:
-                    popup_html += "<table style='width: 100%; font-size: 11px; margin-top: 5px; border-collapse: collapse;'>"
-                    popup_html += "<tr style='background: #e8f5e9; font-weight: bold;'>"
-                    popup_html += "<td style='padding: 4px; border-bottom: 1px solid #ddd;'>Especie</td>"
-                    popup_html += "<td style='padding: 4px; text-align: right; border-bottom: 1px solid #ddd;'>TON</td>"
-                    popup_html += "<td style='padding: 4px; text-align: right; border-bottom: 1px solid #ddd;'>%</td>"
-                    popup_html += "</tr>"
-                    
-                    for esp in lance_data['especies_retenidas']:
-                        # Calcular porcentaje respecto al total de captura retenida
-                        porcentaje_retenida = (esp['ton'] / total_retenida * 100) if total_retenida > 0 else 0
-                        
-                        popup_html += f"""
-                            <tr style='border-bottom: 1px solid #eee;'>
-                                <td style='padding: 3px;'>{esp['nombre']}</td>
-                                <td style='padding: 3px; text-align: right; font-weight: bold; color: #00cc00;'>{esp['ton']:.3f}</td>
-                                <td style='padding: 3px; text-align: right; color: #006600; font-size: 10px;'>{porcentaje_retenida:.1f}%</td>
-                            </tr>
-                        """
-                    popup_html += "</table>"
-                    
-                    # Agregar subtotal con porcentaje del total general
-                    porcentaje_retenida_total = (total_retenida / total_captura * 100) if total_captura > 0 else 0
-                    popup_html += f"<p style='margin: 5px 0; font-size: 10px; color: #00cc00; text-align: right; font-style: italic;'><b>{porcentaje_retenida_total:.1f}% del total del lance</b></p>"
-                else:
-                    if lance_data.get('sin_capturas'):
-                        obs_text = lance_data.get('observaciones', '')
-                        popup_html += f"<p style='font-size: 11px; color: #888; margin: 5px 0;'><b>LANCE DECLARADO SIN CAPTURAS</b></p>"
-                        if obs_text:
-                            popup_html += f"<p style='font-size: 10px; color: #666; margin: 3px 0;'><i>📝 {obs_text}</i></p>"
-                    else:
-                        popup_html += "<p style='font-size: 10px; color: #999; margin: 5px 0;'><i>Sin captura retenida</i></p>"
-                
-                popup_html += "</div>"
-                
-                # DESCARTE (mostrar toneladas O unidades, NO ambas)
-                popup_html += f"""
-                    <div style="border-left: 4px solid #ff3300; padding-left: 8px; margin: 10px 0;">
-                        <p style="margin: 5px 0; font-weight: bold; color: #ff3300; font-size: 13px;">
-                            🗑️ DESCARTE: {total_descarte:.3f} TON
-                        </p>
-                """
-                
-                if lance_data['especies_descartadas_ton'] or lance_data['especies_descartadas_unidades']:
-                    popup_html += "<table style='width: 100%; font-size: 11px; margin-top: 5px; border-collapse: collapse;'>"
-                    popup_html += "<tr style='background: #ffebee; font-weight: bold;'>"
-                    popup_html += "<td style='padding: 4px; border-bottom: 1px solid #ddd;'>Especie</td>"
-                    popup_html += "<td style='padding: 4px; text-align: right; border-bottom: 1px solid #ddd;'>Cantidad</td>"
-                    popup_html += "<td style='padding: 4px; text-align: right; border-bottom: 1px solid #ddd;'>%</td>"
-                    popup_html += "</tr>"
-                    
-                    # Primero mostrar especies con TONELADAS
-                    especies_ton_nombres = set()
-                    for esp in lance_data['especies_descartadas_ton']:
-                        nombre = esp['nombre']
-                        toneladas = esp['ton']
-                        especies_ton_nombres.add(nombre)
-                        
-                        # Calcular porcentaje respecto al total de descarte
-                        porcentaje_descarte = (toneladas / total_descarte * 100) if total_descarte > 0 else 0
-                        # Calcular porcentaje respecto al total general del lance
-                        porcentaje_total = (toneladas / total_captura * 100) if total_captura > 0 else 0
-                        
-                        popup_html += f"""
-                            <tr style='border-bottom: 1px solid #eee;'>
-                                <td style='padding: 3px; font-size: 10px;'>{nombre}</td>
-                                <td style='padding: 3px; text-align: right; font-weight: bold; color: #ff3300;'>{toneladas:.3f} TON</td>
-                                <td style='padding: 3px; text-align: right; color: #cc0000; font-size: 10px;'>{porcentaje_descarte:.1f}%</td>
-                            </tr>
-                        """
-                    
-                    # Luego mostrar especies SOLO con UNIDADES (que NO tengan toneladas)
-                    for nombre, unidades in lance_data['especies_descartadas_unidades'].items():
-                        if nombre not in especies_ton_nombres:  # Solo si NO está en toneladas
-                            popup_html += f"""
-                                <tr style='border-bottom: 1px solid #eee;'>
-                                    <td style='padding: 3px; font-size: 10px;'>{nombre}</td>
-                                    <td style='padding: 3px; text-align: right; color: #666; font-size: 10px;'>{int(unidades)} unidades</td>
-                                    <td style='padding: 3px; text-align: right; color: #999; font-size: 9px;'>-</td>
-                                </tr>
-                            """
-                    
-                    popup_html += "</table>"
-                    
-                    # Agregar subtotal con porcentaje del total general
-                    if total_descarte > 0:
-                        porcentaje_descarte_total = (total_descarte / total_captura * 100) if total_captura > 0 else 0
-                        popup_html += f"<p style='margin: 5px 0; font-size: 10px; color: #ff3300; text-align: right; font-style: italic;'><b>{porcentaje_descarte_total:.1f}% del total del lance</b></p>"
-                else:
-                    popup_html += "<p style='font-size: 10px; color: #999; margin: 5px 0;'><i>Sin descarte</i></p>"
-                
-                popup_html += "</div>"
-                
-                # INCIDENTAL (fauna acompañante)
-                total_incidental = lance_data.get('total_incidental', 0)
-                if total_incidental > 0:
-                    popup_html += f"""
-                    <div style="border-left: 4px solid #9C27B0; padding-left: 8px; margin: 10px 0;">
-                        <p style="margin: 5px 0; font-weight: bold; color: #9C27B0; font-size: 13px;">
-                            🦭 INCIDENTAL: {total_incidental} individuo(s)
-                        </p>
-                    """
-                    popup_html += "<table style='width: 100%; font-size: 11px; margin-top: 5px; border-collapse: collapse;'>"
-                    popup_html += "<tr style='background: #f3e5f5; font-weight: bold;'>"
-                    popup_html += "<td style='padding: 4px; border-bottom: 1px solid #ddd;'>Especie</td>"
-                    popup_html += "<td style='padding: 4px; text-align: right; border-bottom: 1px solid #ddd;'>Individuos</td>"
-                    popup_html += "</tr>"
-                    
-                    for nombre_inc, unidades_inc in lance_data['especies_incidentales'].items():
-                        popup_html += f"""
-                            <tr style='border-bottom: 1px solid #eee;'>
-                                <td style='padding: 3px; font-size: 10px;'>{nombre_inc}</td>
-                                <td style='padding: 3px; text-align: right; font-weight: bold; color: #7B1FA2;'>{int(unidades_inc)} ind.</td>
-                            </tr>
-                        """
-                    
-                    popup_html += "</table></div>"
-                
-                # Total con distribución de porcentajes
-                porcentaje_retenida_final = (total_retenida / total_captura * 100) if total_captura > 0 else 0
-                porcentaje_descarte_final = (total_descarte / total_captura * 100) if total_captura > 0 else 0
-                
-                if lance_data.get('sin_capturas'):
-                    popup_html += f"""
-                    <div style="background: #f5f5f5; padding: 10px; border-radius: 4px; margin-top: 10px;">
-                        <p style="margin: 0; font-weight: bold; color: #888; font-size: 12px; text-align: center;">
-                            ⚠️ LANCE SIN CAPTURAS
-                        </p>
-                    </div>
-                </div>
-                """
-                else:
-                    popup_html += f"""
-                    <div style="background: #e3f2fd; padding: 10px; border-radius: 4px; margin-top: 10px;">
-                        <p style="margin: 0 0 6px 0; font-weight: bold; color: #0277bd; font-size: 12px; text-align: center;">
-                            ⚖️ TOTAL CAPTURA: {total_captura:.3f} TON
-                        </p>
-                        <div style="display: flex; justify-content: space-around; font-size: 10px; margin-top: 6px;">
-                            <span style="color: #00cc00;">
-                                🎯 <b>{porcentaje_retenida_final:.1f}%</b> Retenido
-                            </span>
-                            <span style="color: #666;">|</span>
-                            <span style="color: #ff3300;">
-                                🗑️ <b>{porcentaje_descarte_final:.1f}%</b> Descarte
-                            </span>
-                        </div>
-                    </div>
-                </div>
-                """
-                
-                # Círculo proporcional mejorado con tooltip profesional
-                radio_metros = min(max(total_captura * 400, 150), 2000)
-                
-                # Tooltip más informativo con porcentajes
-                porcentaje_retenida_tooltip = (total_retenida / total_captura * 100) if total_captura > 0 else 0
-                porcentaje_descarte_tooltip = (total_descarte / total_captura * 100) if total_captura > 0 else 0
-                
-                if lance_data.get('sin_capturas'):
-                    obs_tooltip = lance_data.get('observaciones', '')
-                    tooltip_html = f"""
-                    <div style='font-family: Arial; text-align: center;'>
-                        <b style='font-size: 13px; color: #888;'>🎣 LANCE #{lance_data['num_lance']}</b><br>
-                        <span style='font-size: 11px;'>{lance_data['viaje_id']}</span><br>
-                        <hr style='margin: 4px 0; border: none; border-top: 1px solid #ddd;'>
-                        <span style='font-size: 10px; color: #888;'>
-                            ⚠️ <b>Sin capturas</b><br>
-                            {'📝 ' + obs_tooltip[:50] + '...' if obs_tooltip else ''}
-                        </span>
-                    </div>
-                    """
-                else:
-                    incidental_tooltip_line = ""
-                    if total_incidental > 0:
-                        incidental_tooltip_line = f"🦭 Incidental: <b style='color: #9C27B0;'>{int(total_incidental)} ind.</b><br>"
-                    tooltip_html = f"""
-                    <div style='font-family: Arial; text-align: center;'>
-                        <b style='font-size: 13px; color: {color_circulo};'>🎣 LANCE #{lance_data['num_lance']}</b><br>
-                        <span style='font-size: 11px;'>{lance_data['viaje_id']}</span><br>
-                        <hr style='margin: 4px 0; border: none; border-top: 1px solid #ddd;'>
-                        <span style='font-size: 10px;'>
-                            🎯 Retenido: <b style='color: #00cc00;'>{total_retenida:.2f}T ({porcentaje_retenida_tooltip:.1f}%)</b><br>
-                            🗑️ Descarte: <b style='color: #ff3300;'>{total_descarte:.3f}T ({porcentaje_descarte_tooltip:.1f}%)</b><br>
-                            {incidental_tooltip_line}
-                            ⚖️ <b>Total: {total_captura:.2f}T</b>
-                        </span>
-                    </div>
-                    """
-                
-                folium.Circle(
-                    location=[lat, lon],
-                    radius=radio_metros,
-                    color=color_borde,
-                    fill=True,
-                    fillColor=color_circulo,
-                    fillOpacity=0.5,
-                    weight=3,
-                    popup=folium.Popup(popup_html, max_width=370),
-                    tooltip=folium.Tooltip(tooltip_html, sticky=True)
-                ).add_to(mapa)
-                
-                # Marcador central mejorado con tooltip profesional
-                icon_html = f"""
-                <div style="background-color: {color_circulo}; 
-                            border: 3px solid {color_borde}; 
-                            border-radius: 50%; 
-                            width: 26px; 
-                            height: 26px; 
-                            display: flex; 
-                            align-items: center; 
-                            justify-content: center;
-                            font-weight: bold;
-                            color: white;
-                            font-size: 12px;
-                            box-shadow: 0 3px 10px rgba(0,0,0,0.5);
-                            cursor: pointer;
-                            transition: transform 0.2s;">
-                    {lance_data['num_lance']}
-                </div>
-                """
-                
-                # Tooltip del marcador igual que del círculo
-                tooltip_marcador = tooltip_html
-                
-                folium.Marker(
-                    location=[lat, lon],
-                    popup=folium.Popup(popup_html, max_width=370),
-                    icon=folium.DivIcon(html=icon_html),
-                    tooltip=folium.Tooltip(tooltip_marcador, sticky=True)
-                ).add_to(mapa)
-            
-            # Calcular rangos de coordenadas para el panel
-            latitudes = [l['lat'] for l in lances_data]
-            longitudes = [l['lon'] for l in lances_data]
-            lat_min, lat_max = min(latitudes), max(latitudes)
-            lon_min, lon_max = min(longitudes), max(longitudes)
+                # Descarte: especies en toneladas y, aparte, las que solo traen unidades
+                especies_ton_nombres = {esp['nombre'] for esp in lance_data['especies_descartadas_ton']}
+                detalle_lances.append([
+                    lance_data['viaje_id'],
+                    lance_data['nave'],
+                    fecha_str,
+                    lance_data['arte_pesca'],
+                    lance_data['lat_fin'] if lance_data['lat_fin'] and lance_data['lon_fin'] else None,
+                    lance_data['lon_fin'] if lance_data['lat_fin'] and lance_data['lon_fin'] else None,
+                    total_retenida,
+                    total_descarte,
+                    lance_data.get('total_incidental', 0),
+                    1 if lance_data.get('sin_capturas') else 0,
+                    lance_data.get('observaciones') or '',
+                    [[esp['nombre'], esp['ton']] for esp in lance_data['especies_retenidas']],
+                    [[esp['nombre'], esp['ton']] for esp in lance_data['especies_descartadas_ton']],
+                    [[nombre, int(unidades)] for nombre, unidades in lance_data['especies_descartadas_unidades'].items()
+                     if nombre not in especies_ton_nombres],
+                    [[nombre, int(unidades)] for nombre, unidades in lance_data['especies_incidentales'].items()],
+                ])
+                marcadores.append([
+                    lat, lon, color_circulo, color_borde, lance_data['num_lance'],
+                    f"🎣 Lance #{lance_data['num_lance']} | {lance_data['viaje_id']}",
+                    len(detalle_lances) - 1
+                ])
+            
+            callback_marcador = """
+            function (row) {
+                var icono = L.divIcon({
+                    html: '<div style="background-color: ' + row[2] + '; border: 3px solid ' + row[3] + '; '
+                        + 'border-radius: 50%; width: 26px; height: 26px; display: flex; align-items: center; '
+                        + 'justify-content: center; font-weight: bold; color: white; font-size: 12px; '
+                        + 'box-shadow: 0 3px 10px rgba(0,0,0,0.5); cursor: pointer;">' + row[4] + '</div>',
+                    className: '',
+                    iconSize: [26, 26]
+                });
+                var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icono});
+                marker.bindTooltip(row[5], {sticky: true});
+                marker.bindPopup(function () { return popupLance(row); }, {maxWidth: 370});
+                return marker;
+            }
+            """
+            FastMarkerCluster(marcadores, callback=callback_marcador, name='📍 Lances').add_to(mapa)
+            
+            # Popup de un lance a partir de su fila en DETALLE_LANCES:
+            # [viaje, nave, fecha, arte, lat_fin, lon_fin, retenida, descarte, incidental,
+            #  sin_capturas, observaciones, retenidas, descarte_ton, descarte_unidades, incidentales]
+            popup_lance_js = """
+            function escaparHtml(texto) {
+                return String(texto).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+            }
+            function porcentaje(parte, total) {
+                return (total > 0 ? parte / total * 100 : 0).toFixed(1);
+            }
+            function coordenada(lat, lon) {
+                return lat.toFixed(5) + '°S, ' + (-Math.abs(lon)).toFixed(5) + '°W';
+            }
+            function popupLance(row) {
+                var d = DETALLE_LANCES[row[6]];
+                var retenida = d[6], descarte = d[7], incidental = d[8];
+                var total = retenida + descarte;
+                var celda = "<td style='padding: 3px;";
+                var cabecera = "<td style='padding: 4px; border-bottom: 1px solid #ddd;";
+                var h = "<div style=\\"font-family: 'Segoe UI', Arial, sans-serif; width: 350px; max-height: 450px; overflow-y: auto;\\">"
+                    + "<div style='background: linear-gradient(135deg, #05BFDB 0%, #0492A8 100%); color: white; padding: 12px; margin: -10px -10px 10px -10px; border-radius: 5px 5px 0 0;'>"
+                    + "<h3 style='margin: 0; font-size: 16px; font-weight: 600;'>⚓ LANCE #" + escaparHtml(row[4]) + "</h3>"
+                    + "<p style='margin: 5px 0 0 0; font-size: 11px; opacity: 0.9;'>" + escaparHtml(d[0]) + " | " + escaparHtml(d[1]) + "</p></div>"
+                    + "<div style='background: #f8f9fa; padding: 8px; border-radius: 4px; margin-bottom: 8px;'>"
+                    + "<p style='margin: 3px 0; font-size: 11px; color: #666;'><b>📅 Fecha:</b> " + escaparHtml(d[2]) + "</p>"
+                    + "<p style='margin: 3px 0; font-size: 11px; color: #666;'><b>🎣 Arte:</b> " + escaparHtml(d[3]) + "</p>"
+                    + "<p style='margin: 3px 0; font-size: 11px; color: #666;'><b>📍 Inicio:</b> " + coordenada(row[0], row[1]) + "</p>";
+                if (d[4] !== null) {
+                    h += "<p style='margin: 3px 0; font-size: 11px; color: #666;'><b>📍 Fin:</b> " + coordenada(d[4], d[5]) + "</p>";
+                }
+                h += "</div>";
+                
+                // CAPTURA RETENIDA
+                h += "<div style='border-left: 4px solid #00cc00; padding-left: 8px; margin: 10px 0;'>"
+                    + "<p style='margin: 5px 0; font-weight: bold; color: #00cc00; font-size: 13px;'>🎯 CAPTURA RETENIDA: " + retenida.toFixed(3) + " TON</p>";
+                if (d[11].length) {
+                    h += "<table style='width: 100%; font-size: 11px; margin-top: 5px; border-collapse: collapse;'>"
+                        + "<tr style='background: #e8f5e9; font-weight: bold;'>" + cabecera + "'>Especie</td>"
+                        + cabecera + " text-align: right;'>TON</td>" + cabecera + " text-align: right;'>%</td></tr>";
+                    d[11].forEach(function (esp) {
+                        h += "<tr style='border-bottom: 1px solid #eee;'>" + celda + "'>" + escaparHtml(esp[0]) + "</td>"
+                            + celda + " text-align: right; font-weight: bold; color: #00cc00;'>" + esp[1].toFixed(3) + "</td>"
+                            + celda + " text-align: right; color: #006600; font-size: 10px;'>" + porcentaje(esp[1], retenida) + "%</td></tr>";
+                    });
+                    h += "</table><p style='margin: 5px 0; font-size: 10px; color: #00cc00; text-align: right; font-style: italic;'><b>"
+                        + porcentaje(retenida, total) + "% del total del lance</b></p>";
+                } else if (d[9]) {
+                    h += "<p style='font-size: 11px; color: #888; margin: 5px 0;'><b>LANCE DECLARADO SIN CAPTURAS</b></p>";
+                    if (d[10]) {
+                        h += "<p style='font-size: 10px; color: #666; margin: 3px 0;'><i>📝 " + escaparHtml(d[10]) + "</i></p>";
+                    }
+                } else {
+                    h += "<p style='font-size: 10px; color: #999; margin: 5px 0;'><i>Sin captura retenida</i></p>";
+                }
+                h += "</div>";
+                
+                // DESCARTE (toneladas O unidades, no ambas)
+                h += "<div style='border-left: 4px solid #ff3300; padding-left: 8px; margin: 10px 0;'>"
+                    + "<p style='margin: 5px 0; font-weight: bold; color: #ff3300; font-size: 13px;'>🗑️ DESCARTE: " + descarte.toFixed(3) + " TON</p>";
+                if (d[12].length || d[13].length) {
+                    h += "<table style='width: 100%; font-size: 11px; margin-top: 5px; border-collapse: collapse;'>"
+                        + "<tr style='background: #ffebee; font-weight: bold;'>" + cabecera + "'>Especie</td>"
+                        + cabecera + " text-align: right;'>Cantidad</td>" + cabecera + " text-align: right;'>%</td></tr>";
+                    d[12].forEach(function (esp) {
+                        h += "<tr style='border-bottom: 1px solid #eee;'>" + celda + " font-size: 10px;'>" + escaparHtml(esp[0]) + "</td>"
+                            + celda + " text-align: right; font-weight: bold; color: #ff3300;'>" + esp[1].toFixed(3) + " TON</td>"
+                            + celda + " text-align: right; color: #cc0000; font-size: 10px;'>" + porcentaje(esp[1], descarte) + "%</td></tr>";
+                    });
+                    d[13].forEach(function (esp) {
+                        h += "<tr style='border-bottom: 1px solid #eee;'>" + celda + " font-size: 10px;'>" + escaparHtml(esp[0]) + "</td>"
+                            + celda + " text-align: right; color: #666; font-size: 10px;'>" + esp[1] + " unidades</td>"
+                            + celda + " text-align: right; color: #999; font-size: 9px;'>-</td></tr>";
+                    });
+                    h += "</table>";
+                    if (descarte > 0) {
+                        h += "<p style='margin: 5px 0; font-size: 10px; color: #ff3300; text-align: right; font-style: italic;'><b>"
+                            + porcentaje(descarte, total) + "% del total del lance</b></p>";
+                    }
+                } else {
+                    h += "<p style='font-size: 10px; color: #999; margin: 5px 0;'><i>Sin descarte</i></p>";
+                }
+                h += "</div>";
+                
+                // INCIDENTAL (fauna acompañante)
+                if (incidental > 0) {
+                    h += "<div style='border-left: 4px solid #9C27B0; padding-left: 8px; margin: 10px 0;'>"
+                        + "<p style='margin: 5px 0; font-weight: bold; color: #9C27B0; font-size: 13px;'>🦭 INCIDENTAL: " + incidental + " individuo(s)</p>"
+                        + "<table style='width: 100%; font-size: 11px; margin-top: 5px; border-collapse: collapse;'>"
+                        + "<tr style='background: #f3e5f5; font-weight: bold;'>" + cabecera + "'>Especie</td>"
+                        + cabecera + " text-align: right;'>Individuos</td></tr>";
+                    d[14].forEach(function (esp) {
+                        h += "<tr style='border-bottom: 1px solid #eee;'>" + celda + " font-size: 10px;'>" + escaparHtml(esp[0]) + "</td>"
+                            + celda + " text-align: right; font-weight: bold; color: #7B1FA2;'>" + esp[1] + " ind.</td></tr>";
+                    });
+                    h += "</table></div>";
+                }
+                
+                // Total con distribución de porcentajes
+                if (d[9]) {
+                    h += "<div style='background: #f5f5f5; padding: 10px; border-radius: 4px; margin-top: 10px;'>"
+                        + "<p style='margin: 0; font-weight: bold; color: #888; font-size: 12px; text-align: center;'>⚠️ LANCE SIN CAPTURAS</p></div>";
+                } else {
+                    h += "<div style='background: #e3f2fd; padding: 10px; border-radius: 4px; margin-top: 10px;'>"
+                        + "<p style='margin: 0 0 6px 0; font-weight: bold; color: #0277bd; font-size: 12px; text-align: center;'>⚖️ TOTAL CAPTURA: " + total.toFixed(3) + " TON</p>"
+                        + "<div style='display: flex; justify-content: space-around; font-size: 10px; margin-top: 6px;'>"
+                        + "<span style='color: #00cc00;'>🎯 <b>" + porcentaje(retenida, total) + "%</b> Retenido</span>"
+                        + "<span style='color: #666;'>|</span>"
+                        + "<span style='color: #ff3300;'>🗑️ <b>" + porcentaje(descarte, total) + "%</b> Descarte</span></div></div>";
+                }
+                return h + "</div>";
+            }
+            """
+            detalle_json = json.dumps(detalle_lances, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+            mapa.get_root().script.add_child(folium.Element(f"var DETALLE_LANCES = {detalle_json};\n{popup_lance_js}"))
             
             # Agregar control de capas
             folium.LayerControl().add_to(mapa)
             
             # Agregar mini-mapa para navegación profesional
-            from folium.plugins import MiniMap, Fullscreen
             minimap = MiniMap(
                 toggle_display=True,
                 tile_layer='CartoDB Voyager',
@@ -5189,7 +5196,7 @@ class BentosApp:
                 <hr style="margin: 8px 0; border: none; border-top: 1px solid #ddd;">
                 
                 <p style="margin: 5px 0; font-size: 9px; color: #666; text-align: center; line-height: 1.4;">
-                    <i>• Círculo = Captura total<br>
+                    <i>• Círculo = Captura total de la celda<br>
                     • Click en marcador para detalles<br>
                     • Use capas para filtrar</i>
                 </p>
@@ -5404,42 +5411,176 @@ class BentosApp:
         if self._sin_internet_alerta("subir bitácoras a la nube"):
             return
         
-        # Procesar TODOS los archivos para obtener información
+        if self._analisis is not None:
+            return  # Ya hay un análisis en curso
+        
+        # Cabeceras (solo página 1) y folios existentes en un hilo secundario; el parseo
+        # completo de los PDFs sin caché sigue en procesos mientras se revisa el diálogo
+        archivos = list(self.archivos_pendientes)
+        self._analisis = AnalisisLote(self.cache_parseo, self.firebase)
+        self._analisis_resultados = []
+        self._analisis_duplicados = set()
+        
+        self.upload_progress.pack(pady=10)
+        self.upload_status.pack()
+        self.upload_progress.set(0)
+        self.upload_status.configure(text=f"🔍 Analizando {len(archivos)} archivo(s)...", text_color="#05BFDB")
+        self.upload_btn.configure(text="✖ Cancelar análisis", command=self._cancelar_analisis)
+        
+        self._analisis.iniciar(archivos, self.resultados_parseados)
+        self._drenar_analisis(self._analisis, archivos)
+    
+    def _drenar_analisis(self, analisis, archivos):
+        """Vacía la cola del análisis en el hilo principal y se reprograma con root.after"""
+        if analisis is not self._analisis or self._app_closing:
+            return  # Cancelado o reemplazado
+        
         try:
-            # Mostrar loading
-            self.upload_btn.configure(state="disabled", text="⏳ Analizando...")
-            self.root.update()
-            
-            # Parsear todos los PDFs y guardar resultados
-            todos_resultados = []
-            for i, archivo in enumerate(self.archivos_pendientes):
-                nombre = os.path.basename(archivo)
-                self.upload_btn.configure(text=f"⏳ Analizando {i+1}/{len(self.archivos_pendientes)}...")
-                self.root.update()
+            while True:
+                evento = analisis.cola.get_nowait()
+                tipo = evento['tipo']
+                
+                if tipo == 'cabecera':
+                    archivo, resultado = evento['archivo'], evento['resultado']
+                    self._analisis_resultados.append((archivo, resultado, evento['error']))
+                    if resultado and resultado['lances'] is not None:
+                        self.resultados_parseados[archivo] = resultado
+                    if evento['existe']:
+                        self._analisis_duplicados.add(str(resultado['viaje'].get('id_viaje')))
+                    self.upload_progress.set(evento['indice'] / evento['total'])
+                    self.upload_status.configure(
+                        text=f"🔍 {evento['indice']}/{evento['total']}: {os.path.basename(archivo)}"
+                    )
                 
-                try:
-                    with BitacoraParser(archivo) as parser:
-                        resultado = parser.parsear_completo()
-                    self.resultados_parseados[archivo] = resultado
-                    todos_resultados.append((archivo, resultado, None))
-                except Exception as e:
-                    todos_resultados.append((archivo, None, str(e)))
-            
-            # Mostrar diálogo de confirmación con TODOS los resultados
-            self.mostrar_confirmacion_subida(todos_resultados, self.archivos_pendientes)
-            
+                elif tipo == 'cabeceras_listas':
+                    self._restaurar_boton_subida()
+                    self.mostrar_confirmacion_subida(self._analisis_resultados, archivos, self._analisis_duplicados)
+                
+                elif tipo == 'completo':
+                    self._completar_confirmacion(evento['archivo'], evento['resultado'], evento['error'])
+                
+                elif tipo == 'fin':
+                    self._analisis = None
+                    return
+        except queue.Empty:
+            pass
         except Exception as e:
+            self._cancelar_analisis()
             CTkMessagebox(
                 title="❌ Error",
                 message=f"Error al analizar los archivos:\n\n{str(e)}",
                 icon="cancel",
                 option_1="OK"
             )
-        finally:
-            self.upload_btn.configure(state="normal", text="📁 Seleccionar Archivos PDF")
+            return
+        
+        self.root.after(100, self._drenar_analisis, analisis, archivos)
+    
+    def _cancelar_analisis(self):
+        """Detiene el análisis en curso (los PDFs ya parseados quedan en caché)"""
+        if self._analisis is None:
+            return
+        self._analisis.cancelar()
+        self._analisis = None
+        self._confirmacion_fichas = {}
+        if not self._app_closing:
+            self._restaurar_boton_subida()
+    
+    def _restaurar_boton_subida(self):
+        """Oculta el progreso del análisis y devuelve el botón de selección a su estado normal"""
+        try:
+            self.upload_progress.pack_forget()
+            self.upload_status.pack_forget()
+            self.upload_btn.configure(state="normal", text="📁 Seleccionar Archivos PDF",
+                                      command=self.select_multiple_pdfs)
+        except tk.TclError:
+            pass
+    
+    def _completar_confirmacion(self, archivo, resultado, error):
+        """Recibe el parseo completo de un archivo (hilo principal) y completa su
+        ficha en el diálogo de confirmación si sigue abierto."""
+        if resultado is not None:
+            self.resultados_parseados[archivo] = resultado
+        
+        ficha = self._confirmacion_fichas.get(archivo)
+        if not ficha:
+            return
+        lances_label, captura_frame = ficha
+        try:
+            if not captura_frame.winfo_exists():
+                return
+            for widget in captura_frame.winfo_children():
+                widget.destroy()
+            if resultado is None:
+                ctk.CTkLabel(
+                    captura_frame,
+                    text=f"❌ Error al analizar los lances: {error}",
+                    font=ctk.CTkFont(size=11),
+                    text_color="#D32F2F"
+                ).pack(anchor="w", padx=10, pady=5)
+                return
+            lances = resultado['lances']
+            lances_label.configure(text=str(len([l for l in lances if l.get('numero_lance', -1) != 0])))
+            self._mostrar_captura_total_confirmacion(
+                captura_frame, next((l for l in lances if l.get('numero_lance') == 0), None)
+            )
+        except tk.TclError:
+            pass  # El diálogo se cerró mientras se completaba
     
-    def mostrar_confirmacion_subida(self, todos_resultados, archivos):
-        """Muestra diálogo de confirmación antes de subir con info de TODOS los PDFs"""
+    def _mostrar_captura_total_confirmacion(self, parent, lance_captura_total):
+        """Tabla de CAPTURA TOTAL de una bitácora en el diálogo de confirmación"""
+        if not lance_captura_total or not lance_captura_total.get('especies'):
+            return
+        
+        ctk.CTkLabel(
+            parent,
+            text="📊 CAPTURA TOTAL:",
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color=("#0A4D68", "#05BFDB")
+        ).pack(anchor="w", padx=10, pady=(8, 3))
+        
+        # Header
+        header_ct = ctk.CTkFrame(parent, fg_color=("#05BFDB", "#0A4D68"))
+        header_ct.pack(fill="x", padx=10, pady=(0, 1))
+        
+        ctk.CTkLabel(header_ct, text="Especie", font=ctk.CTkFont(size=10, weight="bold"),
+                    text_color="white", anchor="w", width=240).pack(side="left", padx=6, pady=4)
+        ctk.CTkLabel(header_ct, text="Tipo", font=ctk.CTkFont(size=10, weight="bold"),
+                    text_color="white", anchor="center", width=85).pack(side="left", padx=4, pady=4)
+        ctk.CTkLabel(header_ct, text="Cantidad", font=ctk.CTkFont(size=10, weight="bold"),
+                    text_color="white", anchor="e", width=95).pack(side="right", padx=6, pady=4)
+        
+        # Filas
+        especies_ct = lance_captura_total.get('especies', [])
+        especies_ct_sorted = sorted(especies_ct, key=lambda e: (0 if e.get('tipo_captura') == 'retenida' else 1, e.get('nombre', '')))
+        
+        for esp in especies_ct_sorted:
+            tipo = esp.get('tipo_captura', 'retenida')
+            nombre_esp = esp.get('nombre', 'N/A')
+            cant_ton = esp.get('cantidad_ton', 0)
+            cant_uni = esp.get('cantidad_unidades', 0)
+            
+            bg_color = ("#E8F5E9", "#1B3B1B") if tipo == 'retenida' else ("#FFEBEE", "#3B1B1B")
+            tipo_label = "🎯 Ret." if tipo == 'retenida' else "🗑️ Desc."
+            tipo_color = ("#2E7D32", "#66BB6A") if tipo == 'retenida' else ("#C62828", "#EF5350")
+            
+            cant_str = f"{cant_ton:.3f} TON" if cant_ton > 0 else (f"{int(cant_uni)} unid." if cant_uni > 0 else "0")
+            
+            row_frame = ctk.CTkFrame(parent, fg_color=bg_color)
+            row_frame.pack(fill="x", padx=10, pady=1)
+            
+            ctk.CTkLabel(row_frame, text=nombre_esp, font=ctk.CTkFont(size=10),
+                        anchor="w", width=240).pack(side="left", padx=6, pady=3)
+            ctk.CTkLabel(row_frame, text=tipo_label, font=ctk.CTkFont(size=9),
+                        anchor="center", width=85, text_color=tipo_color).pack(side="left", padx=4, pady=3)
+            ctk.CTkLabel(row_frame, text=cant_str, font=ctk.CTkFont(size=10, weight="bold"),
+                        anchor="e", width=95).pack(side="right", padx=6, pady=3)
+    
+    def mostrar_confirmacion_subida(self, todos_resultados, archivos, duplicados=None):
+        """Muestra diálogo de confirmación antes de subir con info de TODOS los PDFs.
+        Los resultados con 'lances' None solo traen cabecera: sus lances y CAPTURA
+        TOTAL se completan con _completar_confirmacion cuando termina el parseo.
+        duplicados: folios que ya existen en la nube (si es None se consultan aquí)."""
         # Crear ventana de confirmación
         confirm_window = ctk.CTkToplevel(self.root)
         confirm_window.title("Confirmar Subida de Bitácoras")
@@ -5495,13 +5636,14 @@ class BentosApp:
         info_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=5)
         
         # Verificar duplicados antes de mostrar
-        duplicados = set()
-        for archivo, resultado, error in todos_resultados:
-            if error or not resultado:
-                continue
-            folio = resultado['viaje'].get('id_viaje')
-            if folio and self.firebase.existe_viaje(str(folio)):
-                duplicados.add(str(folio))
+        if duplicados is None:
+            duplicados = set()
+            for archivo, resultado, error in todos_resultados:
+                if error or not resultado:
+                    continue
+                folio = resultado['viaje'].get('id_viaje')
+                if folio and self.firebase.existe_viaje(str(folio)):
+                    duplicados.add(str(folio))
         
         # Banner de alerta si hay duplicados
         if duplicados:
@@ -5524,6 +5666,7 @@ class BentosApp:
             ).pack(anchor="w", padx=12, pady=(0, 8))
         
         # Mostrar info de CADA archivo
+        self._confirmacion_fichas = {}
         for file_idx, (archivo, resultado, error) in enumerate(todos_resultados):
             nombre_archivo = os.path.basename(archivo)
             
@@ -5545,12 +5688,17 @@ class BentosApp:
             viaje = resultado['viaje']
             lances = resultado['lances']
             
-            # Filtrar lances
-            lances_individuales = [l for l in lances if l.get('numero_lance', -1) != 0]
-            num_lances_reales = len(lances_individuales)
-            
-            # Buscar CAPTURA TOTAL
-            lance_captura_total = next((l for l in lances if l.get('numero_lance') == 0), None)
+            if lances is None:
+                # Solo cabecera: mientras tanto se muestran los lances declarados
+                num_lances_reales = f"{viaje.get('total_lances_declarados', 0)} (declarados)"
+                lance_captura_total = None
+            else:
+                # Filtrar lances
+                lances_individuales = [l for l in lances if l.get('numero_lance', -1) != 0]
+                num_lances_reales = len(lances_individuales)
+                
+                # Buscar CAPTURA TOTAL
+                lance_captura_total = next((l for l in lances if l.get('numero_lance') == 0), None)
             
             # Título de la bitácora
             folio = viaje.get('id_viaje', 'N/A')
@@ -5581,6 +5729,7 @@ class BentosApp:
                 ("🎣 Total Lances", num_lances_reales),
             ]
             
+            valores_labels = {}
             for label, valor in detalles:
                 detail_frame = ctk.CTkFrame(info_frame, fg_color=("#FFFFFF", "#1A1A1A"))
                 detail_frame.pack(fill="x", padx=10, pady=2)
@@ -5591,56 +5740,25 @@ class BentosApp:
                     anchor="w", width=140
                 ).pack(side="left", padx=8, pady=5)
                 
-                ctk.CTkLabel(
+                valores_labels[label] = ctk.CTkLabel(
                     detail_frame, text=str(valor),
                     font=ctk.CTkFont(size=11), anchor="w"
-                ).pack(side="left", padx=8, pady=5)
+                )
+                valores_labels[label].pack(side="left", padx=8, pady=5)
             
-            # Tabla de CAPTURA TOTAL
-            if lance_captura_total and lance_captura_total.get('especies'):
+            # Tabla de CAPTURA TOTAL (en su propio frame para completarla después)
+            captura_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
+            captura_frame.pack(fill="x")
+            if lances is None:
                 ctk.CTkLabel(
-                    info_frame,
-                    text="📊 CAPTURA TOTAL:",
-                    font=ctk.CTkFont(size=12, weight="bold"),
-                    text_color=("#0A4D68", "#05BFDB")
-                ).pack(anchor="w", padx=10, pady=(8, 3))
-                
-                # Header
-                header_ct = ctk.CTkFrame(info_frame, fg_color=("#05BFDB", "#0A4D68"))
-                header_ct.pack(fill="x", padx=10, pady=(0, 1))
-                
-                ctk.CTkLabel(header_ct, text="Especie", font=ctk.CTkFont(size=10, weight="bold"),
-                            text_color="white", anchor="w", width=240).pack(side="left", padx=6, pady=4)
-                ctk.CTkLabel(header_ct, text="Tipo", font=ctk.CTkFont(size=10, weight="bold"),
-                            text_color="white", anchor="center", width=85).pack(side="left", padx=4, pady=4)
-                ctk.CTkLabel(header_ct, text="Cantidad", font=ctk.CTkFont(size=10, weight="bold"),
-                            text_color="white", anchor="e", width=95).pack(side="right", padx=6, pady=4)
-                
-                # Filas
-                especies_ct = lance_captura_total.get('especies', [])
-                especies_ct_sorted = sorted(especies_ct, key=lambda e: (0 if e.get('tipo_captura') == 'retenida' else 1, e.get('nombre', '')))
-                
-                for esp in especies_ct_sorted:
-                    tipo = esp.get('tipo_captura', 'retenida')
-                    nombre_esp = esp.get('nombre', 'N/A')
-                    cant_ton = esp.get('cantidad_ton', 0)
-                    cant_uni = esp.get('cantidad_unidades', 0)
-                    
-                    bg_color = ("#E8F5E9", "#1B3B1B") if tipo == 'retenida' else ("#FFEBEE", "#3B1B1B")
-                    tipo_label = "🎯 Ret." if tipo == 'retenida' else "🗑️ Desc."
-                    tipo_color = ("#2E7D32", "#66BB6A") if tipo == 'retenida' else ("#C62828", "#EF5350")
-                    
-                    cant_str = f"{cant_ton:.3f} TON" if cant_ton > 0 else (f"{int(cant_uni)} unid." if cant_uni > 0 else "0")
-                    
-                    row_frame = ctk.CTkFrame(info_frame, fg_color=bg_color)
-                    row_frame.pack(fill="x", padx=10, pady=1)
-                    
-                    ctk.CTkLabel(row_frame, text=nombre_esp, font=ctk.CTkFont(size=10),
-                                anchor="w", width=240).pack(side="left", padx=6, pady=3)
-                    ctk.CTkLabel(row_frame, text=tipo_label, font=ctk.CTkFont(size=9),
-                                anchor="center", width=85, text_color=tipo_color).pack(side="left", padx=4, pady=3)
-                    ctk.CTkLabel(row_frame, text=cant_str, font=ctk.CTkFont(size=10, weight="bold"),
-                                anchor="e", width=95).pack(side="right", padx=6, pady=3)
+                    captura_frame,
+                    text="⏳ Analizando lances...",
+                    font=ctk.CTkFont(size=11),
+                    text_color=("#666666", "#AAAAAA")
+                ).pack(anchor="w", padx=10, pady=5)
+                self._confirmacion_fichas[archivo] = (valores_labels["🎣 Total Lances"], captura_frame)
+            else:
+                self._mostrar_captura_total_confirmacion(captura_frame, lance_captura_total)
         
         # Frame inferior fijo (comentarios + botones) - NO se mueve con scroll
         bottom_frame = ctk.CTkFrame(confirm_window, fg_color="transparent")
@@ -5729,10 +5847,13 @@ class BentosApp:
                 texto = entry.get("1.0", "end").strip()
                 if texto:
                     comentarios[archivo] = texto
+            # Lo que no alcanzó a parsearse en segundo plano lo parsea SubidaLote
+            self._cancelar_analisis()
             confirm_window.destroy()
             self.ejecutar_subida_multiple(archivos, comentarios if comentarios else None)
         
         def cancelar():
+            self._cancelar_analisis()
             confirm_window.destroy()
             self.archivos_pendientes = []
             self.mostrar_archivos_seleccionados()
@@ -5773,77 +5894,46 @@ class BentosApp:
         self.upload_status.pack()
         self.upload_btn.configure(state="disabled", text="⏳ Procesando...")
         
+        def _al_progresar(completados, total, archivo, exito):
+            nombre = os.path.basename(archivo)
+            icono = "✅" if exito else "❌"
+            self.root.after(0, lambda: (
+                self.upload_status.configure(
+                    text=f"{icono} {completados}/{total}: {nombre}",
+                    text_color="#05BFDB" if exito else "#FF6B6B"
+                ),
+                self.upload_progress.set(completados / total),
+                self._actualizar_estado(f"Subiendo {completados}/{total}: {nombre}", "📤")
+            ))
+        
         def _subir_en_hilo():
-            total_archivos = len(archivos)
-            exitosos = 0
-            fallidos = 0
-            reemplazados = 0
-            
-            for i, archivo in enumerate(archivos, 1):
-                nombre = os.path.basename(archivo)
-                
-                try:
-                    # Actualizar UI desde hilo principal
-                    self.root.after(0, lambda n=nombre, idx=i, total=total_archivos: (
-                        self.upload_status.configure(
-                            text=f"📄 Procesando {idx}/{total}: {n}",
-                            text_color="#05BFDB"
-                        ),
-                        self.upload_progress.set(idx / total),
-                        self._actualizar_estado(f"Procesando {idx}/{total}: {n}", "📄")
-                    ))
-                    
-                    # Usar resultado cacheado si existe, sino parsear de nuevo
-                    if archivo in self.resultados_parseados:
-                        resultado = self.resultados_parseados[archivo]
-                        print(f"✓ Usando resultado cacheado para {nombre}")
-                    else:
-                        with BitacoraParser(archivo) as parser:
-                            resultado = parser.parsear_completo()
-                    
-                    if not resultado['viaje'].get('id_viaje'):
-                        raise ValueError("No se pudo extraer el Folio del PDF")
-                    
-                    folio = resultado['viaje'].get('id_viaje', 'N/A')
-                    nave = resultado['viaje'].get('nave_nombre', 'N/A')
-                    es_reemplazo = self.firebase.existe_viaje(str(folio))
-                    
-                    exito = self.firebase.guardar_viaje_completo(resultado)
-                    
-                    if exito:
-                        exitosos += 1
-                        if es_reemplazo:
-                            reemplazados += 1
-                        
-                        comentario = comentarios.get(archivo) if comentarios else None
-                        
-                        # Guardar comentario en Firebase para que otros equipos lo vean
-                        if comentario:
-                            try:
-                                self.firebase.db.collection('viajes').document(str(folio)).update({
-                                    'comentario': comentario
-                                })
-                            except Exception as e_com:
-                                print(f"⚠️ No se pudo guardar comentario: {e_com}")
-                        
-                        # NO agregar notificación local — el polling la detectará igual
-                        # (así es consistente con lo que ven los otros equipos)
-                    else:
-                        fallidos += 1
-                        
-                except Exception as e:
-                    print(f"Error procesando {nombre}: {e}")
-                    fallidos += 1
+            # Parseo en procesos y escritura en hilos, solapados (ver backend/subida_lote.py)
+            subida = SubidaLote(self.firebase, self.cache_parseo, perfilar=True)
+            resumen = subida.subir(
+                archivos,
+                resultados_previos=self.resultados_parseados,
+                comentarios=comentarios,
+                al_progresar=_al_progresar
+            )
+            for archivo, perfil in resumen['perfiles'].items():
+                print(f"⏱️ Perfil de parseo {os.path.basename(archivo)}: {PerfilParseo.combinar([perfil]).texto()}")
+            # Las notificaciones de las bitácoras subidas llegan por la escucha de cambios
+            # (así es consistente con lo que ven los otros equipos)
             
             # Finalizar en hilo principal
-            self.root.after(0, lambda: self._finalizar_subida(exitosos, fallidos, reemplazados))
+            self.root.after(0, lambda: self._finalizar_subida(
+                resumen['exitosos'], resumen['fallidos'], resumen['reemplazados']
+            ))
         
+        self.upload_status.configure(text=f"📄 Procesando {len(archivos)} archivo(s)...", text_color="#05BFDB")
+        self.upload_progress.set(0)
         threading.Thread(target=_subir_en_hilo, daemon=True).start()
     
     def _finalizar_subida(self, exitosos, fallidos, reemplazados):
         """Finaliza el proceso de subida (llamar desde hilo principal)"""
         # Limpiar caché de resultados
         self.resultados_parseados = {}
+        self._lances_cache = {}
         self.archivos_pendientes = []
         
         try:
@@ -5885,96 +5975,147 @@ class BentosApp:
                 option_1="OK"
             )
     
-    def verificar_notificaciones(self):
-        """Verifica periódicamente si hay nuevas bitácoras subidas desde otros equipos.
-        Las queries a Firebase se ejecutan en un hilo secundario para no bloquear la GUI."""
-        if self._app_closing:
+    def iniciar_escucha_notificaciones(self):
+        """Se suscribe a los cambios de la colección de viajes (on_snapshot).
+        Solo escucha los viajes modificados desde el cursor de la réplica (ver
+        FirebaseManager.escuchar_viajes); Firestore entrega los cambios por push en un
+        hilo propio, la réplica local se actualiza ahí mismo y las notificaciones pasan
+        al hilo principal con root.after."""
+        if self._escucha_reintento_id is not None:
+            self.root.after_cancel(self._escucha_reintento_id)
+            self._escucha_reintento_id = None
+        if self._app_closing or not (self.firebase.db and self.internet_conectado):
             return
         
-        def _verificar_en_hilo():
-            """Consulta Firebase en hilo secundario"""
+        self._detener_escucha_notificaciones()
+        generacion = self._escucha_generacion
+        
+        def _al_cambiar(cambios, read_time):
+            """Hilo de Firestore: la primera entrega trae lo modificado desde el cursor"""
             try:
-                if not (self.firebase.db and self.internet_conectado):
-                    return
-                
-                ids_actuales = self.firebase.obtener_ids_viajes()
-                
-                if not self._viajes_inicializados:
-                    # Primera vez: detectar cambios desde la última ejecución
-                    if hasattr(self, '_tiene_estado_previo') and self._tiene_estado_previo:
-                        nuevos = ids_actuales - self._viajes_previos
-                        eliminados = self._viajes_previos - ids_actuales
-                        
-                        # Generar notificaciones de cambios mientras estaba apagado
-                        notifs_previas = []
-                        for id_viaje in nuevos:
-                            info = self.firebase.obtener_info_viaje(id_viaje)
-                            if info:
-                                nave = info.get('nave_nombre', 'N/A')
-                                folio = info.get('id_viaje', id_viaje)
-                                comentario = info.get('comentario', None)
-                                notifs_previas.append((f"📥 Bitácora subida (mientras estabas offline): #{folio} - {nave}", folio, comentario))
-                            else:
-                                notifs_previas.append((f"📥 Bitácora subida (offline): #{id_viaje}", id_viaje, None))
-                        
-                        for id_viaje in eliminados:
-                            notifs_previas.append((f"🗑️ Bitácora eliminada (mientras estabas offline): #{id_viaje}", id_viaje, None))
-                        
-                        # Enviar notificaciones previas al hilo principal
-                        if notifs_previas and not self._app_closing:
-                            self.root.after(0, lambda: self._procesar_notifs_remotas(notifs_previas))
-                    
-                    # Inicializar con estado actual
-                    self._viajes_conocidos = ids_actuales
-                    self._viajes_inicializados = True
-                    return
-                
-                # Detección normal de cambios en tiempo real
-                nuevos = ids_actuales - self._viajes_conocidos
-                eliminados = self._viajes_conocidos - ids_actuales
-                
-                if not nuevos and not eliminados:
-                    return
-                
-                # Obtener info de viajes nuevos (en este hilo background)
-                notifs_nuevas = []
-                for id_viaje in nuevos:
-                    info = self.firebase.obtener_info_viaje(id_viaje)
-                    if info:
-                        nave = info.get('nave_nombre', 'N/A')
-                        folio = info.get('id_viaje', id_viaje)
-                        comentario = info.get('comentario', None)
-                        notifs_nuevas.append((f"📥 Nueva bitácora subida: #{folio} - {nave}", folio, comentario))
-                    else:
-                        notifs_nuevas.append((f"📥 Nueva bitácora: #{id_viaje}", id_viaje, None))
-                
-                for id_viaje in eliminados:
-                    notifs_nuevas.append((f"🗑️ Bitácora eliminada: #{id_viaje}", id_viaje, None))
-                
-                self._viajes_conocidos = ids_actuales
-                
-                # Enviar resultados al hilo principal
-                if not self._app_closing:
-                    self.root.after(0, lambda: self._procesar_notifs_remotas(notifs_nuevas))
-                    
+                self._aplicar_cambios_replica(cambios)
             except Exception as e:
-                print(f"⚠️ Error verificando nuevas bitácoras: {e}")
+                print(f"⚠️ Error actualizando réplica local: {e}")
+            if not self._app_closing:
+                self.root.after(0, lambda: self._procesar_cambios_viajes(generacion, cambios))
         
-        # Lanzar consulta en hilo secundario
-        threading.Thread(target=_verificar_en_hilo, daemon=True).start()
+        self._escucha_viajes = self.firebase.escuchar_viajes(_al_cambiar, self.replica.desde_sincronizacion())
+        if self._escucha_viajes is None:
+            self._programar_reconexion_escucha()
+    
+    def _detener_escucha_notificaciones(self):
+        """Cancela la suscripción actual; las entregas pendientes de ella se ignoran"""
+        self._escucha_generacion += 1
+        if self._escucha_viajes is not None:
+            try:
+                self._escucha_viajes.unsubscribe()
+            except Exception:
+                pass
+            self._escucha_viajes = None
+    
+    def _escucha_activa(self):
+        """True si la suscripción a cambios de viajes sigue recibiendo datos"""
+        return self._escucha_viajes is not None and self._escucha_viajes.is_active
+    
+    def _programar_reconexion_escucha(self):
+        """Reintenta la suscripción con espera exponencial (5 s, 10 s, ... hasta 5 min)"""
+        if self._app_closing or self._escucha_reintento_id is not None:
+            return
+        espera = self._escucha_backoff
+        self._escucha_backoff = min(espera * 2, ESCUCHA_BACKOFF_MAX)
+        print(f"🔔 Reintentando escucha de notificaciones en {espera} s")
+        self._escucha_reintento_id = self.root.after(espera * 1000, self.iniciar_escucha_notificaciones)
+    
+    def _aplicar_cambios_replica(self, cambios):
+        """Lleva los cambios recibidos a la réplica local (se ejecuta en el hilo de Firestore).
+        Los viajes eliminados que la escucha no informa los quita _reconciliar_eliminados."""
+        eliminados = {c['id'] for c in cambios if c['tipo'] == 'REMOVED'}
+        viajes = [c['datos'] for c in cambios if c['datos'] is not None]
+        if viajes or eliminados:
+            self.replica.aplicar_cambios(viajes, eliminados)
+    
+    def _procesar_cambios_viajes(self, generacion, cambios):
+        """Genera notificaciones a partir de un snapshot (llamar desde hilo principal)"""
+        if generacion != self._escucha_generacion or self._app_closing:
+            return
+        self._escucha_backoff = ESCUCHA_BACKOFF_MIN
+        
+        offline = False
+        if not self._viajes_inicializados:
+            if self._tiene_estado_previo:
+                # Inicio: detectar cambios desde la última ejecución
+                self._viajes_conocidos = set(self._viajes_previos)
+                offline = True
+            else:
+                # Sin estado previo: lo que ya está en la réplica no se notifica
+                self._viajes_conocidos = self.replica.obtener_ids()
+            self._viajes_inicializados = True
+            # La escucha solo ve lo modificado: los eliminados salen de la pasada de IDs
+            self._reconciliar_eliminados(offline)
+        
+        nuevos = {c['id'] for c in cambios if c['tipo'] != 'REMOVED'} - self._viajes_conocidos
+        eliminados = {c['id'] for c in cambios if c['tipo'] == 'REMOVED'} & self._viajes_conocidos
+        self._viajes_conocidos = (self._viajes_conocidos | nuevos) - eliminados
+        self._guardar_estado_app()
         
-        # Actualizar badge con lo que ya tenemos (sin bloquear)
-        self._actualizar_badge_notificaciones()
+        if not nuevos and not eliminados:
+            return
         
-        # Programar siguiente verificación (solo si no hay otro timer activo)
-        if not hasattr(self, '_notif_timer_id') or self._notif_timer_id is None:
-            self._notif_timer_id = self.root.after(30000, self._notif_timer_tick)
+        datos = {c['id']: c['datos'] for c in cambios if c['datos'] is not None}
+        notifs_nuevas = []
+        for id_viaje in nuevos:
+            info = datos.get(id_viaje)
+            if info:
+                nave = info.get('nave_nombre', 'N/A')
+                folio = info.get('id_viaje', id_viaje)
+                comentario = info.get('comentario', None)
+                if offline:
+                    notifs_nuevas.append((f"📥 Bitácora subida (mientras estabas offline): #{folio} - {nave}", folio, comentario))
+                else:
+                    notifs_nuevas.append((f"📥 Nueva bitácora subida: #{folio} - {nave}", folio, comentario))
+            else:
+                notifs_nuevas.append((f"📥 Nueva bitácora: #{id_viaje}", id_viaje, None))
+        
+        for id_viaje in eliminados:
+            if offline:
+                notifs_nuevas.append((f"🗑️ Bitácora eliminada (mientras estabas offline): #{id_viaje}", id_viaje, None))
+            else:
+                notifs_nuevas.append((f"🗑️ Bitácora eliminada: #{id_viaje}", id_viaje, None))
+        
+        self._procesar_notifs_remotas(notifs_nuevas)
     
-    def _notif_timer_tick(self):
-        """Callback del timer periódico de notificaciones"""
-        self._notif_timer_id = None  # Limpiar para permitir reprogramar
-        if not self._app_closing:
-            self.verificar_notificaciones()
+    def _reconciliar_eliminados(self, offline=False):
+        """Pasada de IDs contra la nube en hilo secundario (ReplicaViajes.sincronizar con
+        reconciliar=True): quita de la réplica los viajes eliminados desde otros equipos
+        y notifica los que estaban entre los conocidos"""
+        conocidos = set(self._viajes_conocidos)
+        
+        def _en_hilo():
+            try:
+                if not self.replica.sincronizar(reconciliar=True):
+                    return
+                ids_actuales = self.replica.obtener_ids()
+            except Exception as e:
+                print(f"⚠️ Error reconciliando viajes eliminados: {e}")
+                return
+            if not self._app_closing:
+                self.root.after(0, lambda: self._procesar_eliminados(conocidos - ids_actuales, offline))
+        
+        threading.Thread(target=_en_hilo, daemon=True).start()
+    
+    def _procesar_eliminados(self, eliminados, offline):
+        """Notifica viajes eliminados en la nube (llamar desde hilo principal)"""
+        eliminados &= self._viajes_conocidos
+        if self._app_closing or not eliminados:
+            return
+        self._viajes_conocidos -= eliminados
+        self._guardar_estado_app()
+        
+        if offline:
+            notifs = [(f"🗑️ Bitácora eliminada (mientras estabas offline): #{i}", i, None) for i in eliminados]
+        else:
+            notifs = [(f"🗑️ Bitácora eliminada: #{i}", i, None) for i in eliminados]
+        self._procesar_notifs_remotas(notifs)
     
     def _procesar_notifs_remotas(self, notifs_nuevas):
         """Procesa notificaciones descubiertas en el hilo background (llamar desde hilo principal)"""
@@ -6330,7 +6471,9 @@ class BentosApp:
             loading_label.pack(pady=50)
             
             def _cargar():
-                viajes = self.firebase.listar_viajes(limite=100)
+                if self.firebase.db and self.internet_conectado:
+                    self.replica.sincronizar()
+                viajes = self.replica.listar_viajes(limite=100)
                 self.root.after(0, lambda: _render_bitacoras_admin(scroll_frame, viajes, filtro))
             
             threading.Thread(target=_cargar, daemon=True).start()
@@ -6434,6 +6577,8 @@ class BentosApp:
                 def _eliminar():
                     try:
                         ok = self.firebase.eliminar_viaje(v_id)
+                        if ok:
+                            self.replica.eliminar_local(v_id)
                         self.root.after(0, lambda: _post_eliminar_uno(ok, v_id))
                     except Exception as e:
                         self.root.after(0, lambda: CTkMessagebox(
@@ -6463,18 +6608,39 @@ class BentosApp:
                 option_2=f"Eliminar {n}"
             )
             if resultado.get() == f"Eliminar {n}":
+                btn_eliminar_sel.configure(state="disabled", fg_color="#555555")
+                select_all_cb.configure(state="disabled")
+                
+                def _al_progresar(completados, total, vid, error):
+                    # Hilo secundario: la réplica se actualiza aquí, la interfaz en el hilo de Tk
+                    if error is None:
+                        self.replica.eliminar_local(vid)
+                    self.root.after(0, lambda: _post_eliminar_lote(n, completados=completados, vid=vid, error=error))
+                
                 def _eliminar_lote():
-                    errores = []
-                    for vid in seleccionados:
-                        try:
-                            self.firebase.eliminar_viaje(vid)
-                        except Exception as e:
-                            errores.append(f"{vid}: {str(e)}")
+                    try:
+                        errores = self.firebase.eliminar_viajes(seleccionados, al_progresar=_al_progresar)
+                        errores = [f"{vid}: {error}" for vid, error in errores.items()]
+                    except Exception as e:
+                        errores = [str(e)]
                     self.root.after(0, lambda: _post_eliminar_lote(n, errores))
                 
                 threading.Thread(target=_eliminar_lote, daemon=True).start()
         
-        def _post_eliminar_lote(n, errores):
+        def _post_eliminar_lote(n, errores=None, completados=None, vid=None, error=None):
+            """Progreso por viaje (completados/vid/error) o resultado final (errores)"""
+            if not admin_window.winfo_exists():
+                return
+            if errores is None:
+                estado = "✗" if error else "✓"
+                sel_count_label.configure(text=f"🗑️ Eliminando {completados}/{n}... {estado} {vid}")
+                if error is None and vid in checkbox_widgets:
+                    checkbox_widgets[vid].master.destroy()
+                    checkboxes_var.pop(vid, None)
+                    checkbox_widgets.pop(vid, None)
+                return
+            
+            select_all_cb.configure(state="normal")
             exitos = n - len(errores)
             if errores:
                 CTkMessagebox(
@@ -6656,4 +6822,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Necesario para los pools de procesos en el ejecutable compilado
+    multiprocessing.freeze_support()
     main()
@@ -7,6 +7,12 @@ Módulos:
 - firebase_manager: Gestión de base de datos
 - coordinate_converter: Conversión de coordenadas
 - especies_config: Configuración de especies MSC
+- cache_parseo: Caché en disco de resultados de parseo
+- replica_local: Réplica local (SQLite) de la colección de viajes
+- subida_lote: Subida de bitácoras en lote (parseo y escritura en paralelo)
+- analisis_lote: Análisis de bitácoras previo a la subida (cabeceras y parseo en segundo plano)
+- agregaciones: Agregados de capturas por especie compartidos por resumen, gráficos, Excel y mapa
+- grilla_capturas: Agregación de lances en celdas lat/lon para el mapa de calor
 """
 
 __version__ = "1.0.0"
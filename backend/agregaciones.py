@@ -0,0 +1,193 @@
+"""
+Agregados de capturas por viaje y por conjunto de resultados
+Reparte las especies de la CAPTURA TOTAL en retenidas, descartadas e
+incidentales. Los cálculos se hacen una sola vez por conjunto de resultados,
+sobre una tabla (pandas) con una fila por especie y viaje, y se memorizan: el
+resumen, los gráficos, la exportación a Excel y las tarjetas de la misma
+búsqueda comparten el mismo resultado.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from especies_config import resolver_especie
+
+
+COLUMNAS_ESPECIES = ['id_viaje', 'nombre', 'tipo_captura', 'cantidad_ton', 'cantidad_unidades']
+
+
+def _unidades(valor) -> float:
+    """Las unidades se muestran como enteros cuando lo son"""
+    valor = float(valor)
+    return int(valor) if valor.is_integer() else valor
+
+
+def _tabla_especies(viajes: List[Dict], especies_de: Callable[[Dict], Optional[List[Dict]]]) -> pd.DataFrame:
+    """Tabla con una fila por especie de la CAPTURA TOTAL de cada viaje (sin nombres vacíos)"""
+    filas = [
+        (viaje.get('id_viaje'), especie.get('nombre') or '', especie.get('tipo_captura', 'retenida'),
+         especie.get('cantidad_ton') or 0, especie.get('cantidad_unidades') or 0)
+        for viaje in viajes
+        for especie in especies_de(viaje) or []
+    ]
+    tabla = pd.DataFrame(filas, columns=COLUMNAS_ESPECIES)
+    tabla = tabla.astype({'cantidad_ton': float, 'cantidad_unidades': float})
+    return tabla[tabla['nombre'] != '']
+
+
+class AgregadosCapturas:
+    """Agregados de capturas de un conjunto de viajes (ej. el resultado de una búsqueda)"""
+
+    def __init__(self, viajes: List[Dict], especies_de: Callable[[Dict], Optional[List[Dict]]]):
+        """
+        Args:
+            viajes: Viajes del conjunto
+            especies_de: Función que retorna las especies de la CAPTURA TOTAL de un
+                         viaje (formato lance['especies']) o None si no tiene datos
+        """
+        self.especies = _tabla_especies(viajes, especies_de)
+        self.total_lances = sum(v.get('total_lances_declarados', 0) or 0 for v in viajes)
+        self._resumen = None
+        self._por_viaje = None
+
+    def resumen(self) -> Dict:
+        """
+        Totales del conjunto por especie y tipo de captura.
+
+        Returns:
+            Diccionario con especies_retenidas {nombre: ton}, especies_descartadas
+            {nombre: {'ton', 'unidades'}}, especies_incidentales {nombre: unidades},
+            sus totales, total_general (TON), porcentajes, total_especies y total_lances.
+            Solo incluye especies con cantidad; el orden es el de primera aparición.
+        """
+        if self._resumen is not None:
+            return self._resumen
+
+        tabla = self.especies
+        tipo = tabla['tipo_captura']
+        ton = tabla['cantidad_ton']
+        unidades = tabla['cantidad_unidades']
+
+        retenidas = tabla[(tipo == 'retenida') & (ton > 0)].groupby('nombre', sort=False)['cantidad_ton'].sum()
+        descartadas = tabla[(tipo == 'descartada') & ((ton > 0) | (unidades > 0))].groupby(
+            'nombre', sort=False)[['cantidad_ton', 'cantidad_unidades']].sum()
+        incidentales = tabla[(tipo == 'incidental') & (unidades > 0)].groupby(
+            'nombre', sort=False)['cantidad_unidades'].sum()
+
+        total_retenidas_ton = float(retenidas.sum())
+        total_descartadas_ton = float(descartadas['cantidad_ton'].sum())
+        total_general = total_retenidas_ton + total_descartadas_ton
+
+        self._resumen = {
+            'especies_retenidas': {nombre: float(v) for nombre, v in retenidas.items()},
+            'especies_descartadas': {
+                nombre: {'ton': float(t), 'unidades': _unidades(u)}
+                for nombre, t, u in zip(descartadas.index, descartadas['cantidad_ton'], descartadas['cantidad_unidades'])
+            },
+            'especies_incidentales': {nombre: _unidades(v) for nombre, v in incidentales.items()},
+            'total_retenidas_ton': total_retenidas_ton,
+            'total_descartadas_ton': total_descartadas_ton,
+            'total_incidentales_unidades': _unidades(incidentales.sum()),
+            'total_general': total_general,
+            'porc_retenidas': (total_retenidas_ton / total_general * 100) if total_general > 0 else 0,
+            'porc_descartadas': (total_descartadas_ton / total_general * 100) if total_general > 0 else 0,
+            'total_especies': len(retenidas) + len(descartadas) + len(incidentales),
+            'total_lances': self.total_lances,
+        }
+        return self._resumen
+
+    def desglose_viaje(self, id_viaje: str) -> Tuple[Dict, Dict, Dict]:
+        """
+        Especies de un viaje del conjunto separadas por tipo de captura (incluye
+        especies en cero, como las muestra la tarjeta del viaje).
+
+        Returns:
+            (retenidas {nombre: ton}, descartadas {nombre: {'ton', 'unidades'}},
+             incidentales {nombre: unidades})
+        """
+        if self._por_viaje is None:
+            agrupado = self.especies.groupby(['id_viaje', 'tipo_captura', 'nombre'], sort=False, dropna=False)[
+                ['cantidad_ton', 'cantidad_unidades']].sum()
+            por_viaje = {}
+            for (id_v, tipo, nombre), ton, unidades in zip(agrupado.index, agrupado['cantidad_ton'],
+                                                           agrupado['cantidad_unidades']):
+                retenidas, descartadas, incidentales = por_viaje.setdefault(id_v, ({}, {}, {}))
+                if tipo == 'retenida':
+                    retenidas[nombre] = float(ton)
+                elif tipo == 'descartada':
+                    descartadas[nombre] = {'ton': float(ton), 'unidades': _unidades(unidades)}
+                elif tipo == 'incidental':
+                    incidentales[nombre] = _unidades(unidades)
+            self._por_viaje = por_viaje
+        return self._por_viaje.get(id_viaje, ({}, {}, {}))
+
+
+def desglose_lance(especies: List[Dict]) -> Dict:
+    """
+    Separa las especies de un lance por tipo de captura (usado por el mapa de calor).
+    Las descartadas con toneladas se listan en TON; las que solo tienen unidades, aparte.
+
+    Returns:
+        Diccionario con especies_retenidas y especies_descartadas_ton (listas de
+        {'nombre', 'ton'}), especies_descartadas_unidades e especies_incidentales
+        ({nombre: unidades}) y los totales total_objetivo, total_retenida,
+        total_descarte y total_incidental
+    """
+    desglose = {
+        'especies_retenidas': [],
+        'especies_descartadas_ton': [],
+        'especies_descartadas_unidades': {},
+        'especies_incidentales': {},
+        'total_objetivo': 0,
+        'total_retenida': 0,
+        'total_descarte': 0,
+        'total_incidental': 0,
+    }
+    for especie in especies:
+        nombre = especie.get('nombre', '')
+        cantidad_ton = especie.get('cantidad_ton', 0)
+        cantidad_unidades = especie.get('cantidad_unidades', 0)
+        tipo_captura = especie.get('tipo_captura', 'retenida')
+
+        if tipo_captura == 'retenida':
+            if cantidad_ton > 0:
+                desglose['especies_retenidas'].append({'nombre': nombre, 'ton': cantidad_ton})
+                desglose['total_retenida'] += cantidad_ton
+                if resolver_especie(nombre).es_captura_objetivo:
+                    desglose['total_objetivo'] += cantidad_ton
+
+        elif tipo_captura == 'descartada':
+            # NO mezclar toneladas y unidades - priorizar toneladas
+            if cantidad_ton > 0:
+                desglose['total_descarte'] += cantidad_ton
+                desglose['especies_descartadas_ton'].append({'nombre': nombre, 'ton': cantidad_ton})
+            elif cantidad_unidades > 0:
+                desglose['especies_descartadas_unidades'][nombre] = cantidad_unidades
+
+        elif tipo_captura == 'incidental':
+            if cantidad_unidades > 0:
+                incidentales = desglose['especies_incidentales']
+                incidentales[nombre] = incidentales.get(nombre, 0) + cantidad_unidades
+                desglose['total_incidental'] += cantidad_unidades
+    return desglose
+
+
+# Memo del último conjunto agregado: cambiar de vista sobre la misma búsqueda no recalcula
+_memo_lock = threading.Lock()
+_memo = {'clave': None, 'agregados': None}
+
+
+def agregados_capturas(viajes: List[Dict], especies_de: Callable[[Dict], Optional[List[Dict]]]) -> AgregadosCapturas:
+    """
+    Agregados del conjunto de viajes, reutilizando los del último conjunto si es
+    el mismo (mismos viajes en la misma versión, según 'ultima_actualizacion').
+    """
+    clave = tuple((v.get('id_viaje'), v.get('ultima_actualizacion')) for v in viajes)
+    with _memo_lock:
+        if _memo['clave'] == clave:
+            return _memo['agregados']
+    agregados = AgregadosCapturas(viajes, especies_de)
+    with _memo_lock:
+        _memo['clave'] = clave
+        _memo['agregados'] = agregados
+    return agregados
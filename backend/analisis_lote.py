@@ -0,0 +1,110 @@
+"""
+Análisis de bitácoras previo a la subida
+Lee en un hilo secundario la cabecera de cada PDF (solo página 1) y consulta si
+el folio ya existe; luego parsea por completo, en un pool de procesos, los PDFs
+que no están en caché. Los resultados se publican en una cola que la interfaz
+vacía con root.after, así la ventana no se bloquea y el análisis se puede cancelar.
+
+Eventos de la cola (diccionarios con la clave 'tipo'):
+- 'cabecera':  archivo, indice, total, resultado ('lances' None si solo trae
+               cabecera), error, existe (el folio ya está en la nube)
+- 'cabeceras_listas': todas las cabeceras fueron entregadas
+- 'completo':  archivo, resultado, error (parseo completo de un PDF sin caché)
+- 'fin':       cancelado (True si se detuvo antes de terminar)
+"""
+
+import os
+import queue
+import threading
+from typing import Dict, List, Optional
+from pdf_parser_v2 import BitacoraParser, PerfilParseo
+from cache_parseo import CacheParseo, hash_pdf
+from subida_lote import parsear_pdfs, PROCESOS_DEFECTO
+
+
+def _parsear_cabecera_pdf(pdf_path: str) -> Dict:
+    """Resultado con solo la cabecera del viaje (ver BitacoraParser.parsear_cabecera)"""
+    with BitacoraParser(pdf_path) as parser:
+        return {'viaje': parser.parsear_cabecera(), 'lances': None}
+
+
+class AnalisisLote:
+    """Analiza PDFs en segundo plano y publica los resultados en una cola"""
+
+    def __init__(self, cache: Optional[CacheParseo] = None, firebase=None,
+                 procesos: int = PROCESOS_DEFECTO):
+        """
+        Args:
+            cache: Caché de parseo (los PDFs ya vistos no se vuelven a parsear)
+            firebase: Instancia de FirebaseManager para marcar folios existentes (opcional)
+            procesos: Procesos para el parseo completo
+        """
+        self.cache = cache or CacheParseo()
+        self.firebase = firebase
+        self.procesos = max(1, procesos)
+        self.cola = queue.Queue()
+        self._cancelado = threading.Event()
+        self._hilo = None
+
+    def iniciar(self, archivos: List[str], resultados_previos: Optional[Dict[str, Dict]] = None):
+        """
+        Inicia el análisis en un hilo secundario.
+
+        Args:
+            archivos: Rutas de los PDFs
+            resultados_previos: {archivo: resultado} ya parseados por completo
+        """
+        self._hilo = threading.Thread(
+            target=self._analizar, args=(list(archivos), dict(resultados_previos or {})), daemon=True
+        )
+        self._hilo.start()
+
+    def cancelar(self):
+        """Detiene el análisis: no se entregan más eventos salvo 'fin'"""
+        self._cancelado.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+
+    def _analizar(self, archivos: List[str], resultados_previos: Dict[str, Dict]):
+        sin_parsear = {}  # {archivo: hash} de los que solo tienen cabecera
+        try:
+            for indice, archivo in enumerate(archivos, start=1):
+                if self.cancelado:
+                    return
+                evento = {'tipo': 'cabecera', 'archivo': archivo, 'indice': indice, 'total': len(archivos),
+                          'resultado': None, 'error': None, 'existe': False}
+                try:
+                    resultado = resultados_previos.get(archivo)
+                    if resultado is None:
+                        clave = hash_pdf(archivo)
+                        resultado = self.cache.obtener(clave)
+                        if resultado is None:
+                            resultado = _parsear_cabecera_pdf(archivo)
+                            sin_parsear[archivo] = clave
+                    evento['resultado'] = resultado
+                    folio = resultado['viaje'].get('id_viaje')
+                    if folio and self.firebase is not None:
+                        evento['existe'] = bool(self.firebase.existe_viaje(str(folio)))
+                except Exception as e:
+                    evento['error'] = str(e)
+                self.cola.put(evento)
+            self.cola.put({'tipo': 'cabeceras_listas'})
+
+            for archivo, resultado, error in parsear_pdfs(list(sin_parsear), self.procesos, perfilar=True,
+                                                          cancelado=self._cancelado):
+                if resultado is not None:
+                    perfil = resultado.pop('perfil', None)
+                    if perfil:
+                        print(f"⏱️ Perfil de parseo {os.path.basename(archivo)}: "
+                              f"{PerfilParseo.combinar([perfil]).texto()}")
+                    self.cache.guardar(sin_parsear[archivo], resultado)
+                if self.cancelado:
+                    return
+                self.cola.put({'tipo': 'completo', 'archivo': archivo, 'resultado': resultado,
+                               'error': str(error) if error else None})
+        except Exception as e:
+            print(f"❌ Error en el análisis de PDFs: {e}")
+        finally:
+            self.cola.put({'tipo': 'fin', 'cancelado': self.cancelado})
@@ -0,0 +1,177 @@
+"""
+Caché persistente de resultados de parseo
+Guarda en disco el resultado de BitacoraParser.parsear_completo() indexado por
+el contenido del PDF (SHA-256) y la versión del parser, de modo que una
+bitácora ya vista se carga en milisegundos sin volver a parsearla.
+
+Compartido por app.py, main.py y los scripts de reprocesamiento.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import tempfile
+from typing import Dict, Optional
+from pdf_parser_v2 import BitacoraParser, VERSION_PARSER
+
+
+# Tamaño máximo por defecto del caché en disco (bytes)
+MAX_BYTES_DEFECTO = 200 * 1024 * 1024
+
+
+def _directorio_cache_defecto() -> str:
+    """Directorio del caché: junto al ejecutable en modo compilado, o data/cache en desarrollo"""
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, 'data', 'cache', 'parseo')
+
+
+def hash_pdf(pdf_path: str) -> str:
+    """
+    Calcula el SHA-256 del contenido de un PDF.
+
+    Args:
+        pdf_path: Ruta al archivo PDF
+
+    Returns:
+        Hash hexadecimal
+    """
+    sha = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+class CacheParseo:
+    """Caché LRU en disco de resultados de parseo, acotado por tamaño"""
+
+    def __init__(self, directorio: Optional[str] = None, max_bytes: int = MAX_BYTES_DEFECTO):
+        """
+        Args:
+            directorio: Carpeta donde guardar los resultados. Por defecto data/cache/parseo.
+            max_bytes: Tamaño máximo total; al superarlo se eliminan las entradas
+                       usadas hace más tiempo.
+        """
+        self.directorio = directorio or _directorio_cache_defecto()
+        self.max_bytes = max_bytes
+
+    def _ruta_entrada(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}-v{VERSION_PARSER}.json")
+
+    def obtener(self, clave: str) -> Optional[Dict]:
+        """
+        Obtiene un resultado cacheado.
+
+        Args:
+            clave: SHA-256 del PDF (ver hash_pdf)
+
+        Returns:
+            Resultado de parsear_completo() o None si no está en caché
+        """
+        ruta = self._ruta_entrada(clave)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                resultado = json.load(f)
+            # Marcar como usado recientemente (LRU por fecha de modificación)
+            os.utime(ruta, None)
+            return resultado
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Entrada de caché inválida, se descarta: {e}")
+            self._eliminar(ruta)
+            return None
+
+    def guardar(self, clave: str, resultado: Dict):
+        """
+        Guarda un resultado en caché (escritura atómica) y aplica el límite de tamaño.
+
+        Args:
+            clave: SHA-256 del PDF (ver hash_pdf)
+            resultado: Resultado de parsear_completo()
+        """
+        ruta_tmp = None
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            fd, ruta_tmp = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(resultado, f, ensure_ascii=False)
+            os.replace(ruta_tmp, self._ruta_entrada(clave))
+            ruta_tmp = None
+            self._aplicar_limite()
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar en caché de parseo: {e}")
+        finally:
+            # Un temporal que no llegó a reemplazar la entrada no cuenta en max_bytes
+            if ruta_tmp:
+                self._eliminar(ruta_tmp)
+
+    def parsear(self, pdf_path: str, **kwargs_parser) -> Dict:
+        """
+        Retorna el resultado de parsear_completo() para un PDF, usando el caché
+        si el mismo contenido ya fue parseado con esta versión del parser.
+
+        Args:
+            pdf_path: Ruta al archivo PDF
+            **kwargs_parser: Argumentos adicionales para BitacoraParser (ej. procesos, perfil)
+
+        Returns:
+            Diccionario con viaje, lances y validación
+        """
+        clave = hash_pdf(pdf_path)
+        resultado = self.obtener(clave)
+        if resultado is not None:
+            return resultado
+
+        with BitacoraParser(pdf_path, **kwargs_parser) as parser:
+            resultado = parser.parsear_completo()
+        # Los tiempos de perfil son de esta ejecución, no forman parte del resultado cacheado
+        self.guardar(clave, {k: v for k, v in resultado.items() if k != 'perfil'})
+        return resultado
+
+    def limpiar(self):
+        """Elimina todas las entradas del caché"""
+        for ruta, _, _ in self._listar_entradas():
+            self._eliminar(ruta)
+
+    def _listar_entradas(self):
+        """Lista (ruta, tamaño, mtime) de las entradas del caché"""
+        entradas = []
+        try:
+            with os.scandir(self.directorio) as it:
+                for entrada in it:
+                    if entrada.is_file() and entrada.name.endswith('.json'):
+                        stat = entrada.stat()
+                        entradas.append((entrada.path, stat.st_size, stat.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entradas
+
+    def _aplicar_limite(self):
+        """Elimina las entradas menos usadas hasta quedar bajo max_bytes"""
+        entradas = self._listar_entradas()
+        total = sum(tamano for _, tamano, _ in entradas)
+        if total <= self.max_bytes:
+            return
+
+        for ruta, tamano, _ in sorted(entradas, key=lambda e: e[2]):
+            self._eliminar(ruta)
+            total -= tamano
+            if total <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _eliminar(ruta: str):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+
+def parsear_con_cache(pdf_path: str, **kwargs_parser) -> Dict:
+    """Atajo: parsea un PDF usando el caché en su ubicación por defecto"""
+    return CacheParseo().parsear(pdf_path, **kwargs_parser)
@@ -2,13 +2,55 @@
 Módulo de conversión de coordenadas
 Convierte coordenadas de formato grados/minutos (usado en bitácoras)
 a formato decimal (para mapas y Firebase)
+
+convertir_coordenadas() convierte columnas completas de una vez (el parser
+la usa con todas las coordenadas de un viaje); las funciones de una sola
+coordenada usan el mismo patrón.
 """
 
 import re
-from typing import Tuple, Optional
+from typing import Iterable, Optional, Tuple
+import numpy as np
+
+
+# Grados con ° u º; minutos con cualquier variante de apóstrofe (o sin él)
+APOSTROFES = "'’‘´`′"
+PATRON_GMS = re.compile(r"(\d+)\s*[°º]\s*(\d+(?:\.\d*)?)\s*[" + APOSTROFES + r"]?\s*([NSEW])", re.IGNORECASE)
+
+
+def convertir_coordenadas(textos: Iterable[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte una columna de coordenadas en grados/minutos a decimal.
+    
+    Args:
+        textos: Coordenadas como "33° 51.21588' S" o "72º 2.69' W" (None o
+                textos sin coordenada se marcan como inválidos)
+        
+    Returns:
+        Tupla (decimales, validos): arreglo float con la coordenada en decimal
+        (redondeada a 6 decimales, NaN si no es válida) y máscara booleana
+        
+    Example:
+        >>> decimales, validos = convertir_coordenadas(["33° 51.21588' S", "72º 8.14188’ W", "N/A"])
+        >>> decimales.tolist(), validos.tolist()
+        ([-33.853598, -72.135698, nan], [True, True, False])
+    """
+    coincidencias = [PATRON_GMS.search(t) if isinstance(t, str) else None for t in textos]
+    validos = np.array([m is not None for m in coincidencias], dtype=bool)
+    grados = np.array([float(m.group(1)) if m else np.nan for m in coincidencias])
+    minutos = np.array([float(m.group(2)) if m else np.nan for m in coincidencias])
+    # Sur y Oeste son negativos
+    signo = np.array([-1.0 if m and m.group(3).upper() in 'SW' else 1.0 for m in coincidencias])
+    
+    decimales = signo * (grados + minutos / 60.0)
+    # round() de Python y no np.round: con minutos de 5 decimales el 7º decimal
+    # suele ser un 5 exacto y np.round (escala por 1e6) desempata distinto en
+    # ~8% de las coordenadas; así el resultado es igual a convert_coordinate()
+    decimales[validos] = [round(valor, 6) for valor in decimales[validos].tolist()]
+    return decimales, validos
 
 
-def parse_coordinate_string(coord_str: str) -> Tuple[float, str]:
+def parse_coordinate_string(coord_str: str) -> Tuple[float, float, str]:
     """
     Parsea una coordenada en formato: "33° 51.21588' S"
     
@@ -16,15 +58,14 @@ def parse_coordinate_string(coord_str: str) -> Tuple[float, str]:
         coord_str: String con coordenada en formato grados/minutos
         
     Returns:
-        Tupla (valor_en_minutos, dirección)
+        Tupla (grados, minutos, dirección)
         
     Example:
         >>> parse_coordinate_string("33° 51.21588' S")
-        (33.853598, 'S')
+        (33.0, 51.21588, 'S')
     """
     # Patrón: captura grados, minutos y dirección (N/S/E/W)
-    pattern = r"(\d+)°\s*(\d+\.?\d*)'?\s*([NSEW])"
-    match = re.search(pattern, coord_str.upper())
+    match = PATRON_GMS.search(coord_str.upper())
     
     if not match:
         raise ValueError(f"Formato de coordenada inválido: {coord_str}")
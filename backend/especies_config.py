@@ -1,10 +1,17 @@
 """
 Configuración de especies y categorías MSC
 Mapea las especies que aparecen en las bitácoras a categorías de sostenibilidad
+
+Los nombres de las bitácoras varían en mayúsculas, tildes y separadores (";" o
+"/"): resolver_especie() los busca en un índice de nombres plegados (canónicos,
+científicos y alias) y memoriza el resultado.
 """
 
+import re
+import unicodedata
 from enum import Enum
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
 
 
 class TipoEspecie(Enum):
@@ -38,6 +45,19 @@ ESPECIES_CONFIG: Dict[str, dict] = {
         "umbral_descarte_aceptable": 0.05
     },
     
+    # === OTROS CRUSTÁCEOS COMERCIALES (filtro de búsqueda por especie) ===
+    "Langostino amarillo": {
+        "tipo": TipoEspecie.FAUNA_ACOMPANANTE,
+        "unidad_principal": UnidadMedida.TONELADAS,
+        "nombre_cientifico": "Cervimunida johni"
+    },
+    
+    "Gamba": {
+        "tipo": TipoEspecie.FAUNA_ACOMPANANTE,
+        "unidad_principal": UnidadMedida.TONELADAS,
+        "nombre_cientifico": "Haliporoides diomedeae"
+    },
+    
     # === DEPREDADORES / INCIDENTALES (Crítico para MSC) ===
     "Merluza común": {
         "tipo": TipoEspecie.DEPREDADOR_INCIDENTAL,
@@ -100,6 +120,121 @@ ESPECIES_CONFIG: Dict[str, dict] = {
     }
 }
 
+# Otros nombres con que aparecen las especies configuradas en las bitácoras
+# (los nombres científicos ya se indexan desde ESPECIES_CONFIG)
+ALIAS_ESPECIES: Dict[str, str] = {
+    "Granadero aconcagua": "Granadero pichirata",  # Coelorinchus aconcagua
+}
+
+# Grupos por nombre común: coincidencia parcial del nombre plegado, en orden de prioridad
+GRUPOS_ESPECIE = ('camaron', 'langostino', 'gamba', 'merluza')
+
+# Grupos que las vistas cuentan como captura objetivo de la pesquería
+GRUPOS_OBJETIVO = frozenset({'camaron', 'langostino', 'gamba'})
+
+
+class RegistroEspecie(NamedTuple):
+    """Especie resuelta desde un nombre de bitácora"""
+    id: str                    # Nombre canónico de ESPECIES_CONFIG, o el nombre plegado si no está configurada
+    nombre: str                # Nombre canónico, o el nombre tal como vino
+    plegado: str               # Nombre plegado (minúsculas, sin tildes, separador " / ")
+    tipo: str                  # Valor de TipoEspecie
+    unidad: str                # Valor de UnidadMedida
+    grupo: Optional[str]       # Uno de GRUPOS_ESPECIE o None
+    configurada: bool          # True si está en ESPECIES_CONFIG
+    es_objetivo: bool          # Tipo OBJETIVO en ESPECIES_CONFIG
+    es_critica: bool           # Crítica o sensible para MSC
+    es_captura_objetivo: bool  # Grupo en GRUPOS_OBJETIVO (criterio de las vistas)
+    descarte_habitual: bool
+
+
+def plegar_nombre(nombre: str) -> str:
+    """
+    Forma normalizada de un nombre de especie para compararlo: sin tildes, en
+    minúsculas, con espacios simples y los separadores ";" y "/" como " / ".
+    
+    Example:
+        >>> plegar_nombre("CAMARÓN  Nailon; Heterocarpus reedi")
+        'camaron nailon / heterocarpus reedi'
+    """
+    sin_tildes = ''.join(c for c in unicodedata.normalize('NFKD', nombre or '')
+                         if not unicodedata.combining(c))
+    plegado = re.sub(r'\s*[;/]\s*', ' / ', sin_tildes.casefold())
+    return ' '.join(plegado.split())
+
+
+def _construir_indice() -> Dict[str, str]:
+    """Índice {nombre plegado: nombre canónico} de nombres, científicos y alias"""
+    indice = {}
+    for nombre, config in ESPECIES_CONFIG.items():
+        indice[plegar_nombre(nombre)] = nombre
+        if config.get("nombre_cientifico"):
+            indice.setdefault(plegar_nombre(config["nombre_cientifico"]), nombre)
+    for alias, nombre in ALIAS_ESPECIES.items():
+        indice.setdefault(plegar_nombre(alias), nombre)
+    return indice
+
+
+INDICE_ESPECIES = _construir_indice()
+
+
+@lru_cache(maxsize=2048)
+def resolver_especie(nombre_especie: str) -> RegistroEspecie:
+    """
+    Resuelve un nombre de bitácora a su especie configurada. Si el nombre
+    completo no está en el índice, prueba cada parte separada por ";" o "/".
+    
+    Args:
+        nombre_especie: Nombre como aparece en la bitácora
+        
+    Returns:
+        RegistroEspecie (las no configuradas quedan como FAUNA_ACOMPANANTE en TON)
+    """
+    plegado = plegar_nombre(nombre_especie)
+    canonico = INDICE_ESPECIES.get(plegado)
+    if canonico is None and ' / ' in plegado:
+        canonico = next((INDICE_ESPECIES[parte] for parte in plegado.split(' / ')
+                         if parte in INDICE_ESPECIES), None)
+    
+    config = ESPECIES_CONFIG.get(canonico, {})
+    tipo = config.get("tipo", TipoEspecie.FAUNA_ACOMPANANTE)
+    nombres = plegado + ' / ' + plegar_nombre(canonico) if canonico else plegado
+    grupo = next((g for g in GRUPOS_ESPECIE if g in nombres), None)
+    return RegistroEspecie(
+        id=canonico or plegado,
+        nombre=canonico or nombre_especie,
+        plegado=plegado,
+        tipo=tipo.value,
+        unidad=config.get("unidad_principal", UnidadMedida.TONELADAS).value,
+        grupo=grupo,
+        configurada=canonico is not None,
+        es_objetivo=tipo == TipoEspecie.OBJETIVO,
+        es_critica=bool(config.get("es_especie_critica") or config.get("es_especie_sensible")),
+        es_captura_objetivo=grupo in GRUPOS_OBJETIVO,
+        descarte_habitual=bool(config.get("descarte_habitual")),
+    )
+
+
+@lru_cache(maxsize=2048)
+def ids_especie(nombre_especie: str) -> Tuple[str, ...]:
+    """
+    Ids con que se indexa y filtra un nombre de bitácora: el del nombre
+    completo y el de cada parte separada por ";" o "/", sin repetir.
+    
+    Example:
+        >>> ids_especie("Gamba; Haliporoides diomedeae")
+        ('Gamba',)
+        >>> ids_especie("Tollo negro / Camarón nailon")
+        ('Camarón nailon', 'tollo negro')
+    """
+    registro = resolver_especie(nombre_especie)
+    ids = [registro.id]
+    for parte in registro.plegado.split(' / '):
+        id_parte = resolver_especie(parte).id
+        if id_parte not in ids:
+            ids.append(id_parte)
+    return tuple(ids)
+
 
 def obtener_tipo_especie(nombre_especie: str) -> str:
     """
@@ -111,10 +246,7 @@ def obtener_tipo_especie(nombre_especie: str) -> str:
     Returns:
         Tipo de especie (OBJETIVO, DEPREDADOR_INCIDENTAL, etc.)
     """
-    config = ESPECIES_CONFIG.get(nombre_especie)
-    if config:
-        return config["tipo"].value
-    return TipoEspecie.FAUNA_ACOMPANANTE.value  # Default
+    return resolver_especie(nombre_especie).tipo  # FAUNA_ACOMPANANTE si no está configurada
 
 
 def es_especie_critica(nombre_especie: str) -> bool:
@@ -127,9 +259,7 @@ def es_especie_critica(nombre_especie: str) -> bool:
     Returns:
         True si es crítica para certificación
     """
-    config = ESPECIES_CONFIG.get(nombre_especie, {})
-    return config.get("es_especie_critica", False) or \
-           config.get("es_especie_sensible", False)
+    return resolver_especie(nombre_especie).es_critica
 
 
 def calcular_ratio_merluza(capturas: list) -> Optional[float]:
@@ -147,15 +277,12 @@ def calcular_ratio_merluza(capturas: list) -> Optional[float]:
     total_merluza = 0.0
     
     for captura in capturas:
-        especie = captura.get("especie", "")
+        registro = resolver_especie(captura.get("especie", ""))
         retenida = captura.get("retenida_ton", 0.0)
         
-        config = ESPECIES_CONFIG.get(especie, {})
-        tipo = config.get("tipo")
-        
-        if tipo == TipoEspecie.OBJETIVO:
+        if registro.es_objetivo:
             total_objetivo += retenida
-        elif especie == "Merluza común":
+        elif registro.id == "Merluza común":
             total_merluza += retenida
     
     if total_objetivo > 0:
@@ -5,14 +5,85 @@ Maneja la conexión y escritura de datos a la base de datos
 
 import os
 import sys
+import json
 import hashlib
-from typing import Dict, List, Optional
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+from datetime import date, datetime, timedelta
 import firebase_admin
 from firebase_admin import credentials, firestore
 from dotenv import load_dotenv
 
 
+# Límite de operaciones por WriteBatch en Firestore
+MAX_OPERACIONES_BATCH = 500
+
+
+def hash_lance(lance: Dict) -> str:
+    """
+    Hash del contenido de un lance, para detectar si cambió respecto a lo guardado.
+    
+    Args:
+        lance: Lance en formato del parser (sin 'hash_contenido')
+        
+    Returns:
+        SHA-256 hexadecimal de su JSON canónico
+    """
+    contenido = json.dumps(lance, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def resumir_especies(lances: List[Dict]) -> List[Dict]:
+    """
+    Calcula los totales por especie de un viaje, separados por tipo de captura.
+    Usa el lance CAPTURA TOTAL (lance 0) como fuente de verdad; si no existe,
+    suma los lances individuales.
+    
+    Args:
+        lances: Lista de lances del viaje (formato del parser)
+        
+    Returns:
+        Lista de {nombre, tipo_especie, retenida_ton, descartada_ton,
+        descartada_unidades, incidental_unidades}, en orden de aparición
+    """
+    lance_ct = next((l for l in lances if l.get('numero_lance') == 0 or l.get('es_captura_total')), None)
+    lances_fuente = [lance_ct] if lance_ct else [l for l in lances if l.get('numero_lance', -1) != 0]
+    
+    totales = {}
+    for lance in lances_fuente:
+        for especie in lance.get('especies', []):
+            nombre = especie.get('nombre', '')
+            if not nombre:
+                continue
+            
+            if nombre not in totales:
+                totales[nombre] = {
+                    'nombre': nombre,
+                    'tipo_especie': especie.get('tipo_especie'),
+                    'retenida_ton': 0,
+                    'descartada_ton': 0,
+                    'descartada_unidades': 0,
+                    'incidental_unidades': 0
+                }
+            
+            total = totales[nombre]
+            tipo_captura = especie.get('tipo_captura', 'retenida')
+            if tipo_captura == 'retenida':
+                total['retenida_ton'] += especie.get('cantidad_ton', 0)
+            elif tipo_captura == 'descartada':
+                total['descartada_ton'] += especie.get('cantidad_ton', 0)
+                total['descartada_unidades'] += especie.get('cantidad_unidades', 0)
+            elif tipo_captura == 'incidental':
+                total['incidental_unidades'] += especie.get('cantidad_unidades', 0)
+    
+    for total in totales.values():
+        total['retenida_ton'] = round(total['retenida_ton'], 6)
+        total['descartada_ton'] = round(total['descartada_ton'], 6)
+    
+    return list(totales.values())
+
+
 class FirebaseManager:
     """Gestor de conexión y operaciones con Firebase Firestore"""
     
@@ -144,80 +215,96 @@ class FirebaseManager:
     def guardar_lances(self, id_viaje: str, lances: List[Dict]) -> int:
         """
         Guarda los lances como subcolección del viaje.
-        ELIMINA lances antiguos antes de guardar los nuevos.
+        Solo escribe los lances nuevos o modificados y elimina los que ya no están
+        (ver _operaciones_lances).
         
         Args:
             id_viaje: ID del viaje padre
             lances: Lista de lances a guardar
             
         Returns:
-            Número de lances guardados exitosamente
+            Número de lances del viaje guardados (escritos o sin cambios)
         """
         if not self.db:
             print("⚠️ Firebase no disponible. Lances no guardados.")
             return 0
         
-        guardados = 0
-        
         try:
-            viaje_ref = self.db.collection('viajes').document(id_viaje)
-            lances_collection = viaje_ref.collection('lances')
+            lances_collection = self.db.collection('viajes').document(id_viaje).collection('lances')
+            operaciones, resumen = self._operaciones_lances(lances_collection, lances)
+            self._confirmar_operaciones(operaciones)
             
-            # Usar batch para operación atómica (delete + insert)
-            batch = self.db.batch()
-            ops_count = 0
-            
-            # PASO 1: Marcar lances antiguos para eliminación
-            lances_antiguos = lances_collection.stream()
-            eliminados = 0
-            for lance_doc in lances_antiguos:
-                batch.delete(lance_doc.reference)
-                eliminados += 1
-                ops_count += 1
-                # Firestore limita batches a 500 operaciones
-                if ops_count >= 490:
-                    batch.commit()
-                    batch = self.db.batch()
-                    ops_count = 0
-            
-            if eliminados > 0:
-                print(f"  🗑️  Eliminando {eliminados} lances antiguos")
-            
-            # PASO 2: Agregar lances nuevos al batch
-            for lance in lances:
-                num_lance = lance.get('numero_lance')
-                if num_lance is None:  # Permitir 0 (CAPTURA TOTAL)
-                    continue
-                
-                lance_id = f"lance_{num_lance:03d}"
-                lance_ref = lances_collection.document(lance_id)
-                batch.set(lance_ref, lance)
-                guardados += 1
-                ops_count += 1
-                if ops_count >= 490:
-                    batch.commit()
-                    batch = self.db.batch()
-                    ops_count = 0
-            
-            # Commit final
-            if ops_count > 0:
-                batch.commit()
-            
-            print(f"✓ {guardados} lances guardados en {id_viaje}")
-            return guardados
+            print(f"✓ {resumen['total']} lances guardados en {id_viaje} "
+                  f"({resumen['escritos']} escritos, {resumen['sin_cambios']} sin cambios, "
+                  f"{resumen['eliminados']} eliminados)")
+            return resumen['total']
             
         except Exception as e:
             print(f"✗ Error guardando lances: {e}")
             import traceback
             traceback.print_exc()
-            return guardados
+            return 0
     
-    def guardar_viaje_completo(self, datos_completos: Dict) -> bool:
+    def _operaciones_lances(self, lances_collection, lances: List[Dict]):
         """
-        Guarda un viaje completo (cabecera + lances) en Firestore.
+        Compara los lances guardados con los nuevos por hash de contenido y arma
+        solo las operaciones necesarias: set de lances nuevos o modificados y
+        delete de los que ya no existen. Los lances sin cambios no se escriben.
+        
+        Args:
+            lances_collection: Subcolección 'lances' del viaje
+            lances: Lances recién parseados
+            
+        Returns:
+            (operaciones, resumen) con operaciones para _confirmar_operaciones y
+            resumen {total, escritos, sin_cambios, eliminados}
+        """
+        nuevos = {}
+        for lance in lances:
+            num_lance = lance.get('numero_lance')
+            if num_lance is None:  # Permitir 0 (CAPTURA TOTAL)
+                continue
+            nuevos[f"lance_{num_lance:03d}"] = lance
+        
+        # Solo se descarga el hash de cada lance guardado, no su contenido
+        hashes_guardados = {
+            doc.id: (doc.to_dict() or {}).get('hash_contenido')
+            for doc in lances_collection.select(['hash_contenido']).stream()
+        }
+        
+        operaciones = [
+            ('delete', lances_collection.document(lance_id), None)
+            for lance_id in hashes_guardados if lance_id not in nuevos
+        ]
+        eliminados = len(operaciones)
+        sin_cambios = 0
+        for lance_id, lance in nuevos.items():
+            hash_nuevo = hash_lance(lance)
+            if hashes_guardados.get(lance_id) == hash_nuevo:
+                sin_cambios += 1
+                continue
+            operaciones.append(('set', lances_collection.document(lance_id),
+                                {**lance, 'hash_contenido': hash_nuevo}))
+        
+        resumen = {
+            'total': len(nuevos),
+            'escritos': len(nuevos) - sin_cambios,
+            'sin_cambios': sin_cambios,
+            'eliminados': eliminados,
+        }
+        return operaciones, resumen
+    
+    def guardar_viaje_completo(self, datos_completos: Dict, comentario: Optional[str] = None) -> bool:
+        """
+        Guarda un viaje completo (cabecera + validación + lances) en Firestore.
+        
+        Todo va en un único WriteBatch, así que los demás equipos nunca ven un
+        viaje a medio escribir. Solo si se superan las 500 operaciones por batch
+        se divide en varios, dejando el documento del viaje en el último.
         
         Args:
             datos_completos: Resultado del parser con viaje, lances y validación
+            comentario: Comentario opcional a guardar en el viaje
             
         Returns:
             True si se guardó correctamente
@@ -228,28 +315,40 @@ class FirebaseManager:
             return False
         
         try:
-            # 1. Guardar viaje
-            viaje_data = datos_completos.get('viaje', {})
-            id_viaje = self.guardar_viaje(viaje_data)
-            
+            viaje_data = dict(datos_completos.get('viaje', {}))
+            id_viaje = viaje_data.get('id_viaje')
             if not id_viaje:
+                print("✗ Error: No se proporcionó id_viaje")
                 return False
+            id_viaje = str(id_viaje)
             
-            # 2. Guardar lances
             lances = datos_completos.get('lances', [])
-            num_guardados = self.guardar_lances(id_viaje, lances)
-            
-            # 3. Guardar metadata de validación
             validacion = datos_completos.get('validacion', {})
-            self.db.collection('viajes').document(id_viaje).update({
-                'validacion': validacion,
-                'ultima_actualizacion': datetime.now().isoformat()
-            })
+            
+            # Cabecera, metadata, validación y resumen de capturas por especie
+            # (las vistas de resumen lo leen del documento sin bajar los lances)
+            ahora = datetime.now().isoformat()
+            viaje_data['fecha_procesamiento'] = ahora
+            viaje_data['version_sistema'] = '1.0.0'
+            viaje_data['validacion'] = validacion
+            viaje_data['resumen_especies'] = resumir_especies(lances)
+            viaje_data['ultima_actualizacion'] = ahora
+            if comentario:
+                viaje_data['comentario'] = comentario
+            
+            viaje_ref = self.db.collection('viajes').document(id_viaje)
+            
+            # Solo los lances que cambiaron respecto a lo ya guardado
+            operaciones, resumen = self._operaciones_lances(viaje_ref.collection('lances'), lances)
+            operaciones.append(('merge', viaje_ref, viaje_data))
+            
+            self._confirmar_operaciones(operaciones)
             
             print(f"\n{'='*50}")
             print(f"✓ VIAJE GUARDADO EN FIREBASE")
             print(f"  ID: {id_viaje}")
-            print(f"  Lances: {num_guardados}")
+            print(f"  Lances: {resumen['total']} ({resumen['escritos']} escritos, "
+                  f"{resumen['sin_cambios']} sin cambios, {resumen['eliminados']} eliminados)")
             print(f"  Validación: {'✓' if validacion.get('es_valido') else '✗'}")
             print(f"{'='*50}\n")
             
@@ -259,10 +358,25 @@ class FirebaseManager:
             print(f"✗ Error guardando viaje completo: {e}")
             return False
     
-    def _guardar_local(self, datos_completos: Dict):
-        """Guarda los datos localmente en JSON como fallback"""
-        import json
-        
+    def _confirmar_operaciones(self, operaciones: List[tuple]):
+        """
+        Ejecuta operaciones ('set' | 'merge' | 'delete', referencia, datos) en
+        WriteBatch, en orden, con un solo commit si caben en el límite de Firestore.
+        'merge' conserva los demás campos del documento pero reemplaza completos los
+        campos escritos: los mapas anidados (ej. validacion) no se fusionan con los
+        de la subida anterior.
+        """
+        for inicio in range(0, len(operaciones), MAX_OPERACIONES_BATCH):
+            batch = self.db.batch()
+            for tipo, ref, datos in operaciones[inicio:inicio + MAX_OPERACIONES_BATCH]:
+                if tipo == 'delete':
+                    batch.delete(ref)
+                else:
+                    batch.set(ref, datos, merge=list(datos) if tipo == 'merge' else False)
+            batch.commit()
+    
+    def _guardar_local(self, datos_completos: Dict) -> bool:
+        """Guarda los datos localmente en JSON como fallback (data/output/<id_viaje>.json)"""
         try:
             output_dir = "data/output"
             os.makedirs(output_dir, exist_ok=True)
@@ -274,9 +388,11 @@ class FirebaseManager:
                 json.dump(datos_completos, f, indent=2, ensure_ascii=False)
             
             print(f"✓ Datos guardados localmente: {filename}")
+            return True
             
         except Exception as e:
             print(f"✗ Error guardando localmente: {e}")
+            return False
     
     def obtener_viaje(self, id_viaje: str) -> Optional[Dict]:
         """
@@ -331,6 +447,28 @@ class FirebaseManager:
             print(f"✗ Error obteniendo lances: {e}")
             return []
     
+    def obtener_lances_multiples(self, ids_viajes: List[str], max_hilos: int = 16) -> Dict[str, List[Dict]]:
+        """
+        Obtiene los lances de varios viajes con consultas concurrentes,
+        en lugar de un round-trip secuencial por viaje.
+        
+        Args:
+            ids_viajes: IDs de los viajes
+            max_hilos: Máximo de consultas simultáneas a Firestore
+            
+        Returns:
+            Diccionario {id_viaje: [lances]} (lista vacía si el viaje no tiene lances)
+        """
+        if not self.db:
+            return {}
+        
+        ids = list(dict.fromkeys(id_viaje for id_viaje in ids_viajes if id_viaje))
+        if not ids:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(max_hilos, len(ids))) as pool:
+            return dict(zip(ids, pool.map(self.obtener_lances_viaje, ids)))
+    
     def listar_viajes(self, limite: int = 10) -> List[Dict]:
         """
         Lista los viajes más recientes.
@@ -362,6 +500,184 @@ class FirebaseManager:
             print(f"✗ Error listando viajes: {e}")
             return []
 
+    def _construir_consulta_viajes(self, fecha_desde: Optional[date] = None,
+                                   fecha_hasta: Optional[date] = None,
+                                   nave: Optional[str] = None):
+        """
+        Traduce los filtros del formulario de búsqueda a cláusulas where de Firestore.
+        fecha_zarpe se guarda como texto ISO, así que el rango de fechas es un
+        rango de strings: [desde, hasta + 1 día).
+        
+        Combinar nave_nombre con el rango de fechas requiere el índice compuesto
+        definido en firestore.indexes.json.
+        """
+        query = self.db.collection('viajes')
+        
+        if nave:
+            query = query.where(filter=firestore.FieldFilter('nave_nombre', '==', nave))
+        if fecha_desde:
+            query = query.where(filter=firestore.FieldFilter('fecha_zarpe', '>=', fecha_desde.isoformat()))
+        if fecha_hasta:
+            limite_superior = (fecha_hasta + timedelta(days=1)).isoformat()
+            query = query.where(filter=firestore.FieldFilter('fecha_zarpe', '<', limite_superior))
+        
+        return query.order_by('fecha_zarpe', direction=firestore.Query.DESCENDING)
+    
+    def buscar_viajes_paginado(self, fecha_desde: Optional[date] = None,
+                               fecha_hasta: Optional[date] = None,
+                               nave: Optional[str] = None,
+                               tamano_pagina: int = 100) -> Iterator[List[Dict]]:
+        """
+        Busca viajes filtrando en el servidor y los entrega por páginas,
+        avanzando con un cursor (start_after) sobre el último documento recibido.
+        
+        Args:
+            fecha_desde: Fecha de zarpe mínima (inclusive)
+            fecha_hasta: Fecha de zarpe máxima (inclusive)
+            nave: Nombre exacto de la nave, o None para todas
+            tamano_pagina: Documentos por página
+            
+        Yields:
+            Listas de viajes (con 'id'), ordenados por fecha de zarpe descendente
+        """
+        if not self.db:
+            return
+        
+        query = self._construir_consulta_viajes(fecha_desde, fecha_hasta, nave)
+        ultimo_doc = None
+        
+        while True:
+            pagina_query = query.limit(tamano_pagina)
+            if ultimo_doc is not None:
+                pagina_query = pagina_query.start_after(ultimo_doc)
+            
+            docs = list(pagina_query.stream())
+            if not docs:
+                return
+            
+            pagina = []
+            for doc in docs:
+                viaje_data = doc.to_dict()
+                viaje_data['id'] = doc.id
+                pagina.append(viaje_data)
+            yield pagina
+            
+            if len(docs) < tamano_pagina:
+                return
+            ultimo_doc = docs[-1]
+    
+    def buscar_viajes(self, fecha_desde: Optional[date] = None,
+                      fecha_hasta: Optional[date] = None,
+                      nave: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Busca viajes filtrando por fecha de zarpe y nave en el servidor.
+        
+        Returns:
+            Lista de viajes que cumplen los filtros, o None si la consulta falló
+        """
+        if not self.db:
+            return None
+        
+        try:
+            viajes = []
+            for pagina in self.buscar_viajes_paginado(fecha_desde, fecha_hasta, nave):
+                viajes.extend(pagina)
+            return viajes
+        except Exception as e:
+            print(f"✗ Error buscando viajes: {e}")
+            return None
+    
+    def listar_viajes_modificados(self, desde: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Lista los viajes creados o modificados después de una fecha.
+        Usado para la sincronización incremental de la réplica local.
+        
+        Args:
+            desde: Fecha ISO; solo se retornan viajes con ultima_actualizacion
+                   posterior. Si es None se retorna la colección completa.
+            
+        Returns:
+            Lista de viajes (con 'id'), o None si la consulta falló
+        """
+        if not self.db:
+            return None
+        
+        try:
+            query = self.db.collection('viajes')
+            if desde:
+                query = query.where(filter=firestore.FieldFilter('ultima_actualizacion', '>', desde))\
+                             .order_by('ultima_actualizacion')
+            
+            viajes = []
+            for doc in query.stream():
+                viaje_data = doc.to_dict()
+                viaje_data['id'] = doc.id
+                viajes.append(viaje_data)
+            
+            return viajes
+            
+        except Exception as e:
+            print(f"✗ Error listando viajes modificados: {e}")
+            return None
+
+    def escuchar_viajes(self, al_cambiar: Callable[[List[Dict], datetime], None],
+                        desde: Optional[str] = None):
+        """
+        Se suscribe a los cambios de la colección 'viajes' (on_snapshot), solo
+        de los viajes con 'ultima_actualizacion' posterior a 'desde'.
+        
+        La primera entrega contiene como 'ADDED' los documentos que cumplen el
+        filtro: cada suscripción (inicio de la app o reconexión) cuesta una
+        lectura por viaje modificado desde 'desde', y la colección completa si
+        'desde' es None. Las siguientes entregas traen solo lo que cambió. Un
+        viaje eliminado que no cumplía el filtro no se informa: los borrados se
+        detectan con la pasada de IDs (ReplicaViajes.sincronizar(reconciliar=True)).
+        Ante cortes transitorios Firestore reanuda el stream por su cuenta; si el
+        stream termina, la suscripción retornada deja de estar activa (is_active)
+        y hay que crear otra.
+        
+        Args:
+            al_cambiar: Función llamada (en un hilo de Firestore) con la lista de
+                        cambios [{'tipo', 'id', 'datos', 'actualizado_en'}] y el
+                        read_time del snapshot. 'tipo' es ADDED, MODIFIED o REMOVED;
+                        'datos' es el viaje con 'id' (None si fue eliminado).
+            desde: Fecha ISO de 'ultima_actualizacion' (ver
+                   ReplicaViajes.desde_sincronizacion); None escucha la colección completa
+            
+        Returns:
+            Objeto Watch (usar .unsubscribe() para cancelar), o None si no se pudo suscribir
+        """
+        if not self.db:
+            return None
+        
+        def _on_snapshot(docs, changes, read_time):
+            cambios = []
+            for change in changes:
+                doc = change.document
+                datos = None
+                if change.type.name != 'REMOVED':
+                    datos = doc.to_dict()
+                    datos['id'] = doc.id
+                cambios.append({
+                    'tipo': change.type.name,
+                    'id': doc.id,
+                    'datos': datos,
+                    'actualizado_en': doc.update_time
+                })
+            try:
+                al_cambiar(cambios, read_time)
+            except Exception as e:
+                print(f"⚠️ Error procesando cambios de viajes: {e}")
+        
+        try:
+            query = self.db.collection('viajes')
+            if desde:
+                query = query.where(filter=firestore.FieldFilter('ultima_actualizacion', '>', desde))
+            return query.on_snapshot(_on_snapshot)
+        except Exception as e:
+            print(f"✗ Error suscribiendo a cambios de viajes: {e}")
+            return None
+
     def obtener_ids_viajes(self) -> set:
         """
         Obtiene el set de IDs de todos los viajes en Firestore.
@@ -418,24 +734,8 @@ class FirebaseManager:
             return False
         
         try:
-            # Referencia al documento del viaje
-            viaje_ref = self.db.collection('viajes').document(id_viaje)
-            
-            # Eliminar todos los lances primero
-            lances_ref = viaje_ref.collection('lances')
-            lances = lances_ref.stream()
-            
-            lances_eliminados = 0
-            for lance in lances:
-                lance.reference.delete()
-                lances_eliminados += 1
-            
-            print(f"✓ Eliminados {lances_eliminados} lances del viaje {id_viaje}")
-            
-            # Eliminar el documento del viaje
-            viaje_ref.delete()
-            
-            print(f"✓ Viaje {id_viaje} eliminado correctamente de Firebase")
+            lances_eliminados = self._eliminar_viaje_en_batches(id_viaje)
+            print(f"✓ Viaje {id_viaje} eliminado correctamente de Firebase ({lances_eliminados} lances)")
             return True
             
         except Exception as e:
@@ -443,6 +743,79 @@ class FirebaseManager:
             import traceback
             traceback.print_exc()
             return False
+    
+    def eliminar_viajes(self, ids_viajes: List[str], max_hilos: int = 8,
+                        al_progresar: Optional[Callable[[int, int, str, Optional[str]], None]] = None) -> Dict[str, str]:
+        """
+        Elimina varios viajes con sus lances, borrando varios viajes a la vez.
+        
+        Args:
+            ids_viajes: IDs de los viajes a eliminar
+            max_hilos: Máximo de viajes eliminándose simultáneamente
+            al_progresar: Función (completados, total, id_viaje, error) llamada desde
+                          hilos secundarios al terminar cada viaje (error None si se eliminó)
+            
+        Returns:
+            Diccionario {id_viaje: mensaje de error} de los viajes que no se eliminaron
+        """
+        ids = list(dict.fromkeys(id_viaje for id_viaje in ids_viajes if id_viaje))
+        if not ids:
+            return {}
+        if not self.db:
+            print("✗ Firebase no conectado")
+            return {id_viaje: "Firebase no conectado" for id_viaje in ids}
+        
+        errores = {}
+        lock = threading.Lock()
+        completados = 0
+        
+        def _eliminar(id_viaje):
+            nonlocal completados
+            try:
+                self._eliminar_viaje_en_batches(id_viaje)
+                error = None
+            except Exception as e:
+                print(f"✗ Error eliminando viaje {id_viaje}: {e}")
+                error = str(e)
+            with lock:
+                if error:
+                    errores[id_viaje] = error
+                completados += 1
+                n = completados
+            if al_progresar:
+                al_progresar(n, len(ids), id_viaje, error)
+        
+        with ThreadPoolExecutor(max_workers=min(max_hilos, len(ids))) as pool:
+            list(pool.map(_eliminar, ids))
+        
+        print(f"✓ Eliminados {len(ids) - len(errores)} de {len(ids)} viajes de Firebase")
+        return errores
+    
+    def _eliminar_viaje_en_batches(self, id_viaje: str) -> int:
+        """
+        Elimina los lances de un viaje en WriteBatch de hasta 500 operaciones,
+        leyendo solo las referencias por páginas, y al final el documento del
+        viaje (en el último batch si cabe). Retorna el número de lances eliminados.
+        """
+        viaje_ref = self.db.collection('viajes').document(id_viaje)
+        lances_query = viaje_ref.collection('lances').select([]).limit(MAX_OPERACIONES_BATCH)
+        eliminados = 0
+        
+        while True:
+            # Los lances ya borrados no vuelven a aparecer: cada página es la siguiente
+            refs = [doc.reference for doc in lances_query.stream()]
+            ultima_pagina = len(refs) < MAX_OPERACIONES_BATCH
+            
+            batch = self.db.batch()
+            for ref in refs:
+                batch.delete(ref)
+            if ultima_pagina:
+                batch.delete(viaje_ref)
+            batch.commit()
+            
+            eliminados += len(refs)
+            if ultima_pagina:
+                return eliminados
 
     # ===== AUTENTICACIÓN =====
     
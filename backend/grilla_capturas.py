@@ -0,0 +1,119 @@
+"""
+Agregación espacial de lances para el mapa de calor
+Agrupa las posiciones de inicio y fin de los lances en una grilla fija de
+latitud/longitud (NumPy) y precalcula los totales de cada celda: captura
+objetivo, retenida, descarte e incidentales. El mapa dibuja las celdas en
+lugar de cada punto, así el HTML generado no crece con el número de lances.
+"""
+
+from typing import Dict, List
+import numpy as np
+
+
+# Lado de la celda en grados (~5,5 km en latitud)
+TAMANO_CELDA_DEFECTO = 0.05
+
+# Totales por lance que se suman en cada celda
+CAMPOS_TOTALES = ['total_objetivo', 'total_retenida', 'total_descarte', 'total_incidental']
+
+
+def _a_float(valores) -> np.ndarray:
+    """Convierte una lista con posibles None a float (None -> NaN)"""
+    return np.array([np.nan if v is None else v for v in valores], dtype=float)
+
+
+class GrillaCapturas:
+    """Totales de captura por celda de una grilla lat/lon"""
+
+    def __init__(self, lances: List[Dict], tamano_celda: float = TAMANO_CELDA_DEFECTO):
+        """
+        Args:
+            lances: Lances con 'lat', 'lon', 'lat_fin', 'lon_fin' y los totales de
+                    CAMPOS_TOTALES (formato de desglose_lance, ver agregaciones.py)
+            tamano_celda: Lado de la celda en grados
+
+        Cada lance reparte sus totales en partes iguales entre la celda de inicio y
+        la de fin (todo en la de inicio si no tiene posición final).
+        """
+        self.tamano_celda = tamano_celda
+        n = len(lances)
+        self.lat = _a_float([l.get('lat') for l in lances])
+        self.lon = _a_float([l.get('lon') for l in lances])
+        lat_fin = _a_float([l.get('lat_fin') for l in lances])
+        lon_fin = _a_float([l.get('lon_fin') for l in lances])
+        # Las coordenadas en 0 son posiciones no informadas
+        con_fin = np.isfinite(lat_fin) & np.isfinite(lon_fin) & (lat_fin != 0) & (lon_fin != 0)
+
+        # Posiciones: todos los inicios y luego los fines válidos, con su peso y lance de origen
+        lat_pos = np.concatenate([self.lat, lat_fin[con_fin]])
+        lon_pos = np.concatenate([self.lon, lon_fin[con_fin]])
+        peso = np.concatenate([np.where(con_fin, 0.5, 1.0), np.full(int(con_fin.sum()), 0.5)])
+        origen = np.concatenate([np.arange(n), np.flatnonzero(con_fin)])
+
+        filas = np.floor(lat_pos / tamano_celda).astype(np.int64)
+        columnas = np.floor(lon_pos / tamano_celda).astype(np.int64)
+        celdas, self._celda_de_posicion = np.unique(np.column_stack([filas, columnas]), axis=0,
+                                                    return_inverse=True)
+        self._celda_de_posicion = self._celda_de_posicion.ravel()
+        self._celdas = celdas
+        num_celdas = len(celdas)
+
+        self.totales = {}
+        for campo in CAMPOS_TOTALES:
+            valores = np.array([l.get(campo, 0) or 0 for l in lances], dtype=float)
+            self.totales[campo] = np.bincount(self._celda_de_posicion, weights=valores[origen] * peso,
+                                              minlength=num_celdas)
+        # Lances que inician en la celda
+        self.lances = np.bincount(self._celda_de_posicion[:n], minlength=num_celdas)
+
+    def __len__(self) -> int:
+        return len(self._celdas)
+
+    def centros(self) -> np.ndarray:
+        """Centro (lat, lon) de cada celda, arreglo de forma (celdas, 2)"""
+        return (self._celdas + 0.5) * self.tamano_celda
+
+    def limites(self) -> np.ndarray:
+        """Esquinas [[lat_min, lon_min], [lat_max, lon_max]] de cada celda, forma (celdas, 2, 2)"""
+        inferior = self._celdas * self.tamano_celda
+        return np.stack([inferior, inferior + self.tamano_celda], axis=1)
+
+    def puntos_calor(self, campo: str, factor: float = 1.0) -> List[List[float]]:
+        """
+        Puntos [lat, lon, peso] para un HeatMap: un punto por celda con total > 0.
+
+        Args:
+            campo: Uno de CAMPOS_TOTALES
+            factor: Multiplicador del peso
+        """
+        totales = self.totales[campo]
+        con_valor = totales > 0
+        centros = self.centros()[con_valor]
+        return np.column_stack([centros, totales[con_valor] * factor]).tolist()
+
+    def celdas(self) -> List[Dict]:
+        """
+        Celdas ocupadas con sus límites y totales.
+
+        Returns:
+            Lista de {lat, lon (centro), limites, lances, total_objetivo,
+            total_retenida, total_descarte, total_incidental}
+        """
+        centros = self.centros().tolist()
+        limites = self.limites().tolist()
+        totales = {campo: valores.tolist() for campo, valores in self.totales.items()}
+        lances = self.lances.tolist()
+        return [
+            {'lat': centros[i][0], 'lon': centros[i][1], 'limites': limites[i], 'lances': lances[i],
+             **{campo: totales[campo][i] for campo in CAMPOS_TOTALES}}
+            for i in range(len(self))
+        ]
+
+    def centro(self) -> List[float]:
+        """Centro (lat, lon) de los inicios de lance"""
+        return [float(np.nanmean(self.lat)), float(np.nanmean(self.lon))]
+
+    def extension(self) -> List[List[float]]:
+        """[[lat_min, lon_min], [lat_max, lon_max]] de los inicios de lance"""
+        return [[float(np.nanmin(self.lat)), float(np.nanmin(self.lon))],
+                [float(np.nanmax(self.lat)), float(np.nanmax(self.lon))]]
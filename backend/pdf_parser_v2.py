@@ -12,21 +12,289 @@ Resuelve problemas conocidos:
 
 import pdfplumber
 import re
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
+from coordinate_converter import convertir_coordenadas, APOSTROFES
 from especies_config import (
     obtener_tipo_especie, 
     calcular_ratio_merluza, 
-    calcular_alerta_ecosistema
+    calcular_alerta_ecosistema,
+    resolver_especie
 )
 
+# Versión del formato de salida de parsear_completo(). Incrementar cada vez que
+# un cambio del parser altere sus resultados (invalida el caché de parseo).
+VERSION_PARSER = "2.3"
+
+# Motores de extracción de tablas (ver _extraer_pagina)
+MOTOR_ESTANDAR = 'estandar'
+MOTOR_COORDENADAS = 'coordenadas'
+MOTORES_TABLAS = (MOTOR_ESTANDAR, MOTOR_COORDENADAS)
+
+# Plantilla de Sernapesca para el motor por coordenadas: borde izquierdo (pt) de
+# cada columna de la grilla. Cada tipo de fila ocupa un subconjunto de columnas.
+COLUMNAS_PLANTILLA = (14.5, 42.8, 156.2, 198.7, 295.1, 312.1, 391.5, 453.8, 487.8)
+FILA_TITULO = (0,)
+FILA_PARES = (0, 2, 5, 7)                # etiqueta | valor | etiqueta | valor
+FILA_ESPECIE = (0, 1, 3, 4, 6, 8)        # código | especie | 4 tipos de captura
+FILA_CABECERA_ESPECIE = (0, 3)
+FILA_TIPOS_CAPTURA = (3, 4, 6, 8)
+FILAS_INFO = {'ARMADOR': (0, 2), 'CAPITÁN': (0, 2), 'BITÁCORA': (0, 2, 5)}
+TITULOS_TABLA = ('INFORMACIÓN GENERAL', 'CAPTURA TOTAL', 'DETALLE DE LANCE')
+FILAS_COMPLETAS = ('OBSERVACIONES', 'LANCE DECLARADO SIN CAPTURAS')
+ETIQUETAS_LANCE = ('LANCE #', 'INICIO', 'Latitud (dd mm.mmm)', 'Longitud (dd mm.mmm)')
+TOLERANCIA_LINEA = 3           # pt entre palabras de una misma línea
+ALTO_FILA = 28.35
+ALTO_FILA_OBSERVACIONES = 42.5
+MARGEN_INFERIOR = 56.7
+
+
+class PerfilParseo:
+    """
+    Registro opcional de tiempos por etapa de BitacoraParser.
+    
+    Por etapa acumula segundos (reloj de pared), número de llamadas y páginas.
+    Las etapas pueden anidarse: 'clasificacion' ocurre dentro de
+    'procesamiento_tablas' y 'cabecera_texto' dentro de 'cabecera'.
+    """
+    
+    def __init__(self):
+        self.etapas = {}
+    
+    @contextmanager
+    def medir(self, etapa: str, paginas: int = 0):
+        """Mide el bloque 'with' como una llamada a la etapa"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio, paginas)
+    
+    def registrar(self, etapa: str, segundos: float, paginas: int = 0, llamadas: int = 1):
+        registro = self.etapas.setdefault(etapa, {'segundos': 0.0, 'llamadas': 0, 'paginas': 0})
+        registro['segundos'] += segundos
+        registro['llamadas'] += llamadas
+        registro['paginas'] += paginas
+    
+    def resumen(self) -> Dict:
+        """Etapas como diccionario serializable {etapa: {segundos, llamadas, paginas}}"""
+        return {
+            etapa: {**registro, 'segundos': round(registro['segundos'], 6)}
+            for etapa, registro in self.etapas.items()
+        }
+    
+    def texto(self) -> str:
+        """Resumen de una línea, etapas de mayor a menor tiempo"""
+        partes = [
+            f"{etapa} {registro['segundos']:.3f}s" + (f" ({registro['paginas']} pág)" if registro['paginas'] else "")
+            for etapa, registro in sorted(self.etapas.items(), key=lambda e: -e[1]['segundos'])
+        ]
+        return " | ".join(partes)
+    
+    @classmethod
+    def combinar(cls, resumenes: List[Dict]) -> 'PerfilParseo':
+        """Suma los resúmenes de varios PDFs en un solo perfil"""
+        perfil = cls()
+        for resumen in resumenes:
+            for etapa, registro in (resumen or {}).items():
+                perfil.registrar(etapa, registro['segundos'], registro['paginas'], registro['llamadas'])
+        return perfil
+
+
+def _repartir_palabras(linea: List[Dict], disposicion: Tuple[int, ...]) -> Optional[List[str]]:
+    """
+    Asigna cada palabra de una línea a la celda de la disposición en que cae su
+    centro horizontal. Retorna None si alguna palabra queda fuera de la grilla.
+    """
+    inicios = [COLUMNAS_PLANTILLA[i] for i in disposicion]
+    celdas = [[] for _ in disposicion]
+    for palabra in linea:
+        idx = bisect_right(inicios, (palabra['x0'] + palabra['x1']) / 2) - 1
+        if idx < 0:
+            return None
+        celdas[idx].append(palabra['text'])
+    return [' '.join(textos) for textos in celdas]
+
+
+def _armar_tabla(filas: List[Tuple[Tuple[int, ...], List[str]]]) -> list:
+    """
+    Arma la tabla como la entrega extract_tables: las columnas son la unión de
+    las de todas sus filas y las posiciones cubiertas por una celda combinada
+    quedan en None.
+    """
+    columnas = sorted(set().union(*(disposicion for disposicion, _ in filas)))
+    return [[celdas[disposicion.index(c)] if c in disposicion else None for c in columnas]
+            for disposicion, celdas in filas]
+
+
+def _extraer_tablas_bandas(pagina) -> Optional[List[list]]:
+    """
+    Motor por coordenadas: arma las tablas de la página sin buscar líneas.
+    
+    Las palabras (extract_words) se agrupan en bandas horizontales (una por
+    línea de texto) y cada banda se reparte en las columnas fijas de la
+    plantilla según el tipo de fila, que se reconoce por su etiqueta. Los
+    títulos de sección abren una tabla nueva. Entrega las mismas tablas que
+    pagina.extract_tables() para el formato de Sernapesca.
+    
+    Retorna None si alguna línea no calza con la plantilla; la página se extrae
+    entonces con extract_tables.
+    """
+    lineas = []
+    for palabra in sorted(pagina.extract_words(), key=lambda p: p['top']):
+        if lineas and palabra['top'] - lineas[-1][0]['top'] <= TOLERANCIA_LINEA:
+            lineas[-1].append(palabra)
+        else:
+            lineas.append([palabra])
+    
+    tablas = []
+    filas = None
+    modo = None             # 'info', 'observaciones' o None
+    observaciones = []
+    tipo_captura = ''
+    cabe_observacion = False
+    
+    def _cerrar():
+        if not filas:
+            return
+        # La celda de observaciones se dibuja aunque esté vacía si cabe en la página
+        if modo == 'observaciones' and (observaciones or cabe_observacion):
+            filas.append((FILA_TITULO, ['\n'.join(observaciones)]))
+        # extract_tables no reporta tablas de una sola celda (título al pie de
+        # página, texto de observaciones que pasó a la página siguiente)
+        if len(filas) > 1 or filas[0][0] != FILA_TITULO:
+            tablas.append(_armar_tabla(filas))
+    
+    for linea in lineas:
+        linea.sort(key=lambda p: p['x0'])
+        texto = ' '.join(p['text'] for p in linea)
+        etiqueta = ' '.join(p['text'] for p in linea if (p['x0'] + p['x1']) / 2 < COLUMNAS_PLANTILLA[2])
+        
+        if texto in TITULOS_TABLA:
+            _cerrar()
+            filas, observaciones = [(FILA_TITULO, [texto])], []
+            modo = 'info' if texto == TITULOS_TABLA[0] else None
+            continue
+        if modo == 'observaciones':
+            observaciones.append(texto)
+            continue
+        if texto in FILAS_COMPLETAS:
+            if filas is None:
+                filas = []
+            filas.append((FILA_TITULO, [texto]))
+            if texto == 'OBSERVACIONES':
+                modo = 'observaciones'
+                centro = (linea[0]['top'] + linea[0]['bottom']) / 2
+                cabe_observacion = (centro + ALTO_FILA / 2 + ALTO_FILA_OBSERVACIONES
+                                    <= pagina.height - MARGEN_INFERIOR)
+            continue
+        if filas is None:
+            # Encabezado del documento (página 1) antes de la primera tabla
+            if pagina.page_number == 1:
+                continue
+            filas = []
+        if texto == 'TIPO DE CAPTURA':
+            tipo_captura = texto
+            continue
+        if texto == 'ESPECIE':
+            filas.append((FILA_CABECERA_ESPECIE, [texto, tipo_captura]))
+            tipo_captura = ''
+            continue
+        
+        if modo == 'info':
+            disposicion = FILAS_INFO.get(etiqueta, FILA_PARES)
+        elif etiqueta in ETIQUETAS_LANCE:
+            disposicion = FILA_PARES
+        elif linea[0]['text'].startswith('Retenida'):
+            disposicion = FILA_TIPOS_CAPTURA
+        elif linea[0]['text'].isdigit() and linea[0]['x1'] <= COLUMNAS_PLANTILLA[1]:
+            disposicion = FILA_ESPECIE
+        elif not filas and not tablas:
+            # Texto de observaciones que pasó desde la página anterior
+            modo, observaciones = 'observaciones', [texto]
+            continue
+        else:
+            return None
+        celdas = _repartir_palabras(linea, disposicion)
+        if celdas is None:
+            return None
+        filas.append((disposicion, celdas))
+    
+    _cerrar()
+    return tablas
+
+
+def _extraer_pagina(pagina, perfil: Optional[PerfilParseo] = None,
+                    motor: str = MOTOR_ESTANDAR) -> Tuple[list, str]:
+    """
+    Extrae tablas y texto de una página en una sola pasada: ambas extracciones
+    comparten el layout que pdfplumber construye para la página. Al terminar
+    libera los objetos cacheados de la página, así la memoria no crece con el
+    número de páginas del PDF.
+    Con motor='coordenadas' las tablas se arman con _extraer_tablas_bandas;
+    si la página no calza con la plantilla se usa extract_tables.
+    Retorna (tablas, texto).
+    """
+    try:
+        with perfil.medir('extraccion_tablas', paginas=1) if perfil else nullcontext():
+            tablas = _extraer_tablas_bandas(pagina) if motor == MOTOR_COORDENADAS else None
+            if tablas is None:
+                tablas = pagina.extract_tables() or []
+            tablas = [tabla for tabla in tablas if tabla and len(tabla) > 0]
+        with perfil.medir('extraccion_texto', paginas=1) if perfil else nullcontext():
+            texto = pagina.extract_text() or ""
+    finally:
+        pagina.close()
+    return tablas, texto
+
+
+def _extraer_rango_paginas(pdf_path: str, indices: List[int],
+                           motor: str = MOTOR_ESTANDAR) -> List[Tuple[int, list, str]]:
+    """
+    Worker del modo paralelo: abre el PDF por su cuenta (los objetos de
+    pdfplumber no se pueden compartir entre procesos) y extrae tablas y texto
+    de las páginas indicadas.
+    Retorna lista de tuplas (page_idx, tablas, texto).
+    """
+    resultados = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_idx in indices:
+            tablas, texto = _extraer_pagina(pdf.pages[page_idx], motor=motor)
+            resultados.append((page_idx, tablas, texto))
+    return resultados
+
 
 class BitacoraParser:
     """Parser optimizado para PDFs reales de Bitácora Electrónica de Sernapesca"""
     
-    def __init__(self, pdf_path: str):
+    # Bajo este número de páginas el costo de levantar procesos supera la ganancia
+    MIN_PAGINAS_PARALELO = 4
+    
+    def __init__(self, pdf_path: str, procesos: int = 1, perfil: Optional[PerfilParseo] = None,
+                 motor: str = MOTOR_ESTANDAR):
+        """
+        Args:
+            pdf_path: Ruta al archivo PDF
+            procesos: Número de procesos para extraer páginas en paralelo.
+                      1 (por defecto) mantiene la extracción secuencial.
+            perfil: Si se entrega, registra tiempos por etapa y parsear_completo
+                    incluye su resumen en el resultado bajo la clave 'perfil'.
+            motor: Motor de extracción de tablas ('estandar' o 'coordenadas').
+                   Si el motor por coordenadas entrega un resultado que no pasa
+                   la validación, el PDF se vuelve a extraer con el estándar.
+        """
+        if motor not in MOTORES_TABLAS:
+            raise ValueError(f"Motor de tablas desconocido: {motor} (opciones: {', '.join(MOTORES_TABLAS)})")
         self.pdf_path = pdf_path
         self.pdf = None
+        self.procesos = max(1, int(procesos or 1))
+        self.perfil = perfil
+        self.motor = motor
+        self._coordenadas = {}  # {texto de celda: decimal o None} del viaje en curso
         
     def __enter__(self):
         self.pdf = pdfplumber.open(self.pdf_path)
@@ -36,21 +304,78 @@ class BitacoraParser:
         if self.pdf:
             self.pdf.close()
     
+    def _medir(self, etapa: str, paginas: int = 0):
+        """Contexto que mide una etapa si hay perfil activo"""
+        return self.perfil.medir(etapa, paginas) if self.perfil else nullcontext()
+    
     def parsear_completo(self) -> Dict:
         """
         Parsea todo el PDF y retorna estructura completa.
         Usa enfoque table-sequential: recorre TODAS las tablas de TODAS las páginas
         en orden para manejar correctamente lances que cruzan páginas.
         """
-        # Paso 1: Recopilar TODAS las tablas de TODAS las páginas en orden
-        todas_tablas = self._recopilar_todas_tablas()
+        with self._medir('total', paginas=len(self.pdf.pages)):
+            resultado = None
+            if self.motor == MOTOR_COORDENADAS:
+                try:
+                    resultado = self._parsear_completo(MOTOR_COORDENADAS)
+                except Exception as e:
+                    print(f"  ⚠️ Motor por coordenadas falló ({e})")
+                if resultado is not None and not self._resultado_confiable(resultado):
+                    resultado = None
+                if resultado is None:
+                    print("  🔄 Reintentando con extract_tables")
+            if resultado is None:
+                resultado = self._parsear_completo(MOTOR_ESTANDAR)
+        if self.perfil:
+            resultado['perfil'] = self.perfil.resumen()
+        return resultado
+    
+    def parsear_cabecera(self) -> Dict:
+        """
+        Parseo rápido para revisar un PDF antes de subirlo: lee solo la primera
+        página (tabla INFORMACION GENERAL y folio) y no procesa lances.
+        Retorna el mismo diccionario que la clave 'viaje' de parsear_completo();
+        el número de lances disponible es el declarado (total_lances_declarados).
+        """
+        if not self.pdf.pages:
+            return {}
+        with self._medir('cabecera_rapida', paginas=1):
+            tablas, texto = _extraer_pagina(self.pdf.pages[0], self.perfil)
+            return self._extraer_cabecera(texto + "\n", [(0, tabla) for tabla in tablas])
+    
+    @staticmethod
+    def _resultado_confiable(resultado: Dict) -> bool:
+        """
+        Validación del resultado del motor por coordenadas: folio real, al menos
+        un lance y tantos lances como declara la cabecera.
+        """
+        id_viaje = str(resultado['viaje'].get('id_viaje') or '')
+        return (bool(id_viaje) and '-TEMP-' not in id_viaje
+                and bool(resultado['lances'])
+                and bool(resultado['validacion'].get('coincide_numero_lances')))
+    
+    def _parsear_completo(self, motor: str) -> Dict:
+        """Pasos del parseo (parsear_completo los envuelve en la medición total)"""
+        # Paso 1: Recopilar TODAS las tablas y el texto de TODAS las páginas en orden
+        paginas = None
+        if self._usar_paralelo():
+            with self._medir('extraccion_paralela', paginas=len(self.pdf.pages)):
+                paginas = self._extraer_paginas_paralelo(motor)
+        if paginas is None:
+            paginas = self._extraer_paginas(motor)
+        
+        todas_tablas = [(page_idx, tabla) for page_idx, tablas, _ in paginas for tabla in tablas]
+        texto_completo = "".join(texto + "\n" for _, _, texto in paginas)
         
         # Paso 2: Extraer cabecera desde la primera página (tabla INFORMACION GENERAL)
-        texto_completo = self._extraer_texto_completo()
-        viaje = self._extraer_cabecera(texto_completo, todas_tablas)
+        with self._medir('cabecera'):
+            viaje = self._extraer_cabecera(texto_completo, todas_tablas)
         
         # Paso 3: Clasificar y procesar tablas secuencialmente
-        especies_totales, lances_individuales = self._procesar_tablas_secuencial(todas_tablas)
+        with self._medir('procesamiento_tablas'):
+            self._coordenadas = self._convertir_coordenadas_tablas(todas_tablas)
+            especies_totales, lances_individuales = self._procesar_tablas_secuencial(todas_tablas)
         
         # Paso 4: Construir lista de lances
         lances = []
@@ -73,7 +398,8 @@ class BitacoraParser:
             print(f"  No se encontraron lances individuales en el PDF")
         
         # Paso 5: Validaciones
-        validacion = self._validar_datos(viaje, lances)
+        with self._medir('validacion'):
+            validacion = self._validar_datos(viaje, lances)
         
         return {
             'viaje': viaje,
@@ -85,26 +411,47 @@ class BitacoraParser:
     # RECOPILACIÓN DE TABLAS
     # =========================================================================
     
-    def _recopilar_todas_tablas(self) -> List[Tuple[int, list]]:
+    def _extraer_paginas(self, motor: str = MOTOR_ESTANDAR) -> List[Tuple[int, list, str]]:
         """
-        Recopila TODAS las tablas de TODAS las páginas en orden secuencial.
-        Retorna lista de tuplas (num_pagina, tabla).
+        Recorre las páginas UNA sola vez extrayendo tablas y texto juntos.
+        Retorna lista de tuplas (page_idx, tablas, texto) en orden de página.
         """
-        todas = []
-        for page_idx, page in enumerate(self.pdf.pages):
-            tablas = page.extract_tables()
-            if tablas:
-                for tabla in tablas:
-                    if tabla and len(tabla) > 0:
-                        todas.append((page_idx, tabla))
-        return todas
-    
-    def _extraer_texto_completo(self) -> str:
-        """Extrae todo el texto del PDF"""
-        texto = ""
-        for pagina in self.pdf.pages:
-            texto += (pagina.extract_text() or "") + "\n"
-        return texto
+        paginas = []
+        for page_idx, pagina in enumerate(self.pdf.pages):
+            tablas, texto = _extraer_pagina(pagina, self.perfil, motor)
+            paginas.append((page_idx, tablas, texto))
+        return paginas
+    
+    def _usar_paralelo(self) -> bool:
+        """Indica si corresponde el modo paralelo para este PDF"""
+        return self.procesos > 1 and len(self.pdf.pages) >= self.MIN_PAGINAS_PARALELO
+    
+    def _extraer_paginas_paralelo(self, motor: str = MOTOR_ESTANDAR) -> Optional[List[Tuple[int, list, str]]]:
+        """
+        Reparte el rango de páginas en bloques contiguos entre un pool de procesos.
+        Cada worker abre el PDF y retorna (page_idx, tablas, texto); los bloques se
+        unen en orden de página para que _procesar_tablas_secuencial vea la misma
+        secuencia que en modo secuencial.
+        Retorna None si el pool falla (se usa entonces el modo secuencial).
+        """
+        num_paginas = len(self.pdf.pages)
+        num_bloques = min(self.procesos, num_paginas)
+        tamano = -(-num_paginas // num_bloques)
+        bloques = [list(range(inicio, min(inicio + tamano, num_paginas)))
+                   for inicio in range(0, num_paginas, tamano)]
+        
+        try:
+            paginas = []
+            with ProcessPoolExecutor(max_workers=len(bloques)) as pool:
+                for resultado in pool.map(_extraer_rango_paginas, [self.pdf_path] * len(bloques), bloques,
+                                          [motor] * len(bloques)):
+                    paginas.extend(resultado)
+        except Exception as e:
+            print(f"  ⚠️ Extracción paralela falló ({e}), usando modo secuencial")
+            return None
+        
+        paginas.sort(key=lambda p: p[0])
+        return paginas
     
     # =========================================================================
     # CLASIFICACIÓN DE TABLAS
@@ -187,7 +534,8 @@ class BitacoraParser:
         lances_iniciados = False
         
         for page_idx, tabla in todas_tablas:
-            tipo = self._clasificar_tabla(tabla)
+            with self._medir('clasificacion'):
+                tipo = self._clasificar_tabla(tabla)
             
             # ---- INFORMACIÓN GENERAL (ya procesada en cabecera, saltar) ----
             if tipo == 'info_general':
@@ -662,7 +1010,7 @@ class BitacoraParser:
         coords_encontradas = []
         for celda in fila:
             val = str(celda or '').strip()
-            if val and 'º' in val and ("'" in val or "'" in val or "'" in val):
+            if val and ('º' in val or '°' in val) and any(a in val for a in APOSTROFES):
                 coord = self._parsear_coordenada_gms(val)
                 if coord:
                     coords_encontradas.append(coord[0])
@@ -677,7 +1025,7 @@ class BitacoraParser:
         coords_encontradas = []
         for celda in fila:
             val = str(celda or '').strip()
-            if val and 'º' in val and ("'" in val or "'" in val or "'" in val):
+            if val and ('º' in val or '°' in val) and any(a in val for a in APOSTROFES):
                 coord = self._parsear_coordenada_gms(val)
                 if coord:
                     coords_encontradas.append(coord[0])
@@ -885,27 +1233,37 @@ class BitacoraParser:
     # COORDENADAS
     # =========================================================================
     
+    def _convertir_coordenadas_tablas(self, todas_tablas: List[Tuple[int, list]]) -> Dict[str, Optional[float]]:
+        """
+        Convierte de una vez todas las celdas con coordenadas del viaje (ver
+        coordinate_converter.convertir_coordenadas). Retorna {texto: decimal o None}
+        con el texto tal cual y sin espacios, como lo consultan los extractores.
+        """
+        textos = set()
+        for _, tabla in todas_tablas:
+            for fila in tabla:
+                for celda in fila or []:
+                    if celda and ('º' in celda or '°' in celda):
+                        textos.add(celda)
+                        textos.add(celda.strip())
+        textos = list(textos)
+        decimales, validos = convertir_coordenadas(textos)
+        return {texto: (valor if valido else None)
+                for texto, valor, valido in zip(textos, decimales.tolist(), validos.tolist())}
+    
     def _parsear_coordenada_gms(self, texto: str) -> Optional[Tuple[float]]:
         """
         Parsea coordenada: "33º 51.21588' S" o "72º 2.6990999999998' W"
-        Acepta º, °, ' y variantes.
+        Acepta º, °, ' y variantes. Las celdas del viaje ya vienen convertidas
+        (ver _convertir_coordenadas_tablas); otro texto se convierte aquí.
         Returns: Tupla (valor_decimal,) o None
         """
-        try:
-            match = re.search(r'(\d+)[°º]\s*([\d.]+)[\'\'´`]\s*([NSEW])', texto, re.IGNORECASE)
-            if match:
-                grados = float(match.group(1))
-                minutos = float(match.group(2))
-                direccion = match.group(3).upper()
-                
-                decimal = grados + (minutos / 60.0)
-                if direccion in ('S', 'W'):
-                    decimal = -decimal
-                
-                return (round(decimal, 6),)
-        except Exception:
-            pass
-        return None
+        if texto in self._coordenadas:
+            decimal = self._coordenadas[texto]
+        else:
+            decimales, validos = convertir_coordenadas([texto])
+            decimal = decimales[0].item() if validos[0] else None
+        return (decimal,) if decimal is not None else None
     
     # =========================================================================
     # CABECERA
@@ -927,7 +1285,8 @@ class BitacoraParser:
                 cabecera = self._parsear_tabla_info_general(tabla)
                 break
         
-        self._completar_cabecera_desde_texto(cabecera, texto)
+        with self._medir('cabecera_texto'):
+            self._completar_cabecera_desde_texto(cabecera, texto)
         
         return cabecera
     
@@ -1058,10 +1417,10 @@ class BitacoraParser:
                         'retenida_ton': cantidad
                     })
                 
-                nombre_lower = nombre.lower()
-                if ('camarón' in nombre_lower or 'camaron' in nombre_lower) and tipo_captura == 'retenida':
+                grupo = resolver_especie(nombre).grupo
+                if grupo == 'camaron' and tipo_captura == 'retenida':
                     total_camaron += cantidad
-                if 'merluza' in nombre_lower and tipo_captura == 'retenida':
+                if grupo == 'merluza' and tipo_captura == 'retenida':
                     total_merluza += cantidad
         
         ratio_merluza = calcular_ratio_merluza(todas_capturas)
@@ -1119,14 +1478,16 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("Uso: python pdf_parser_v2.py <ruta_pdf>")
+        print("Uso: python pdf_parser_v2.py <ruta_pdf> [--procesos N] [--motor estandar|coordenadas]")
         sys.exit(1)
     
     pdf_path = sys.argv[1]
+    procesos = int(sys.argv[sys.argv.index('--procesos') + 1]) if '--procesos' in sys.argv else 1
+    motor = sys.argv[sys.argv.index('--motor') + 1] if '--motor' in sys.argv else MOTOR_ESTANDAR
     
     print(f"Procesando: {pdf_path}")
     
-    with BitacoraParser(pdf_path) as parser:
+    with BitacoraParser(pdf_path, procesos=procesos, motor=motor) as parser:
         resultado = parser.parsear_completo()
     
     print("\nViaje:")
@@ -0,0 +1,306 @@
+"""
+Réplica local de la colección 'viajes'
+Mantiene una copia SQLite de los documentos de viajes, sincronizada de forma
+incremental con Firestore (consulta delta por 'ultima_actualizacion').
+
+La aplicación lee siempre desde la réplica: las búsquedas repetidas son
+consultas locales y hay datos que mostrar aunque no haya internet.
+
+Junto a cada viaje se mantiene un índice invertido especie -> viaje (tabla
+especies_viaje, desde 'resumen_especies'), así la búsqueda por especie y
+rango de captura es una consulta por rango sobre el índice.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set
+from especies_config import resolver_especie, ids_especie
+
+
+# Los equipos escriben 'ultima_actualizacion' con su reloj local; se relee una
+# ventana hacia atrás para no perder cambios de equipos con el reloj atrasado.
+MARGEN_SINCRONIZACION = timedelta(minutes=10)
+
+# Versión del esquema (PRAGMA user_version); al subirla se reconstruye el índice de especies
+VERSION_ESQUEMA = 2
+
+
+def filas_indice_especies(viaje: Dict) -> List[tuple]:
+    """
+    Filas (especie, id_viaje, retenida_ton, descartada_ton, unidades) del índice
+    de especies para un viaje, una por id de especie (ver ids_especie): un nombre
+    como "Gamba; Haliporoides diomedeae" suma también en cada parte. unidades
+    suma las descartadas y las incidentales. Sin 'resumen_especies' no hay filas.
+    """
+    totales = {}
+    for total in viaje.get('resumen_especies') or []:
+        nombre = total.get('nombre')
+        if not nombre:
+            continue
+        for especie in ids_especie(nombre):
+            fila = totales.setdefault(especie, [0.0, 0.0, 0])
+            fila[0] += total.get('retenida_ton', 0) or 0
+            fila[1] += total.get('descartada_ton', 0) or 0
+            fila[2] += (total.get('descartada_unidades', 0) or 0) + (total.get('incidental_unidades', 0) or 0)
+    return [(especie, viaje['id'], retenida, descartada, unidades)
+            for especie, (retenida, descartada, unidades) in totales.items()]
+
+
+class ReplicaViajes:
+    """Copia local (SQLite) de la colección de viajes de Firestore"""
+    
+    def __init__(self, firebase, ruta_db: str):
+        """
+        Args:
+            firebase: Instancia de FirebaseManager
+            ruta_db: Ruta del archivo SQLite de la réplica
+        """
+        self.firebase = firebase
+        self.ruta_db = ruta_db
+        self._lock = threading.Lock()
+        self._crear_esquema()
+    
+    @contextmanager
+    def _conexion(self):
+        """Conexión serializada entre hilos; hace commit al salir sin error"""
+        with self._lock:
+            conn = sqlite3.connect(self.ruta_db, timeout=10)
+            try:
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+    
+    def _crear_esquema(self):
+        os.makedirs(os.path.dirname(self.ruta_db) or '.', exist_ok=True)
+        with self._conexion() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS viajes (
+                    id TEXT PRIMARY KEY,
+                    fecha_zarpe TEXT,
+                    ultima_actualizacion TEXT,
+                    datos TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_viajes_fecha_zarpe ON viajes (fecha_zarpe)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS especies_viaje (
+                    especie TEXT NOT NULL,
+                    id_viaje TEXT NOT NULL,
+                    retenida_ton REAL NOT NULL,
+                    descartada_ton REAL NOT NULL,
+                    unidades INTEGER NOT NULL,
+                    PRIMARY KEY (especie, id_viaje)
+                )
+            """)
+            # Rango sobre la captura en TON de una especie (retenida + descartada)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_especies_viaje_ton
+                ON especies_viaje (especie, retenida_ton + descartada_ton)
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_especies_viaje_id ON especies_viaje (id_viaje)")
+            
+            # Réplicas creadas antes del índice (o con otra versión): reconstruirlo
+            if conn.execute("PRAGMA user_version").fetchone()[0] < VERSION_ESQUEMA:
+                conn.execute("DELETE FROM especies_viaje")
+                filas = []
+                for (datos,) in conn.execute("SELECT datos FROM viajes"):
+                    filas.extend(filas_indice_especies(json.loads(datos)))
+                conn.executemany("INSERT INTO especies_viaje VALUES (?, ?, ?, ?, ?)", filas)
+                conn.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+    
+    # =========================================================================
+    # SINCRONIZACIÓN
+    # =========================================================================
+    
+    def sincronizar(self, reconciliar: bool = False) -> bool:
+        """
+        Trae desde Firestore los viajes creados o modificados desde la última
+        sincronización. Si la réplica está vacía descarga la colección completa.
+        
+        Args:
+            reconciliar: Si True, además compara los IDs locales con los de la nube
+                         para eliminar viajes borrados desde otros equipos.
+        
+        Returns:
+            True si se sincronizó con la nube, False si no fue posible
+        """
+        if not self.firebase.db:
+            return False
+        
+        desde = self.desde_sincronizacion()
+        cambios = self.firebase.listar_viajes_modificados(desde)
+        if cambios is None:
+            return False
+        
+        self.aplicar_cambios(cambios)
+        
+        if reconciliar and desde:
+            self._reconciliar_eliminados()
+        
+        if cambios:
+            print(f"🔄 Réplica local: {len(cambios)} viaje(s) actualizados")
+        return True
+    
+    def aplicar_cambios(self, viajes: List[Dict], ids_eliminados=()):
+        """
+        Aplica cambios recibidos por el listener de Firestore.
+        
+        Args:
+            viajes: Viajes (con 'id') creados o modificados
+            ids_eliminados: IDs de viajes eliminados en la nube
+        """
+        with self._conexion() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO viajes (id, fecha_zarpe, ultima_actualizacion, datos) VALUES (?, ?, ?, ?)",
+                [
+                    (v['id'], v.get('fecha_zarpe'), v.get('ultima_actualizacion'),
+                     json.dumps(v, ensure_ascii=False, default=str))
+                    for v in viajes
+                ]
+            )
+            # El índice de especies se reemplaza en la misma transacción que el viaje
+            conn.executemany("DELETE FROM especies_viaje WHERE id_viaje = ?",
+                             [(v['id'],) for v in viajes] + [(i,) for i in ids_eliminados])
+            conn.executemany("INSERT INTO especies_viaje VALUES (?, ?, ?, ?, ?)",
+                             [fila for v in viajes for fila in filas_indice_especies(v)])
+            conn.executemany("DELETE FROM viajes WHERE id = ?", [(i,) for i in ids_eliminados])
+    
+    def _reconciliar_eliminados(self):
+        """Elimina de la réplica los viajes que ya no existen en la nube"""
+        ids_nube = self.firebase.obtener_ids_viajes()
+        ids_locales = self.obtener_ids()
+        # Un set vacío con réplica poblada suele ser un error de consulta, no un borrado masivo
+        if not ids_nube and ids_locales:
+            return
+        
+        eliminados = ids_locales - ids_nube
+        if eliminados:
+            with self._conexion() as conn:
+                conn.executemany("DELETE FROM viajes WHERE id = ?", [(i,) for i in eliminados])
+                conn.executemany("DELETE FROM especies_viaje WHERE id_viaje = ?", [(i,) for i in eliminados])
+            print(f"🔄 Réplica local: {len(eliminados)} viaje(s) eliminados")
+    
+    def desde_sincronizacion(self) -> Optional[str]:
+        """
+        'ultima_actualizacion' (ISO) desde la que hay que pedir cambios a la nube:
+        el cursor de la réplica menos MARGEN_SINCRONIZACION. None si la réplica
+        está vacía (hay que traer la colección completa).
+        """
+        desde = self._cursor()
+        if not desde:
+            return None
+        try:
+            return (datetime.fromisoformat(desde) - MARGEN_SINCRONIZACION).isoformat()
+        except ValueError:
+            return None
+    
+    def _cursor(self) -> Optional[str]:
+        """Mayor 'ultima_actualizacion' presente en la réplica"""
+        with self._conexion() as conn:
+            fila = conn.execute("SELECT MAX(ultima_actualizacion) FROM viajes").fetchone()
+        return fila[0] if fila else None
+    
+    # =========================================================================
+    # CONSULTAS LOCALES
+    # =========================================================================
+    
+    def listar_viajes(self, limite: Optional[int] = None) -> List[Dict]:
+        """
+        Lista los viajes de la réplica, más recientes primero (por fecha de zarpe).
+        
+        Args:
+            limite: Número máximo de viajes a retornar (None = todos)
+        
+        Returns:
+            Lista de viajes con el mismo formato que FirebaseManager.listar_viajes
+        """
+        sql = "SELECT datos FROM viajes ORDER BY fecha_zarpe IS NULL, fecha_zarpe DESC"
+        params = ()
+        if limite:
+            sql += " LIMIT ?"
+            params = (limite,)
+        
+        with self._conexion() as conn:
+            filas = conn.execute(sql, params).fetchall()
+        return [json.loads(datos) for (datos,) in filas]
+    
+    def buscar_viajes(self, fecha_desde: Optional[date] = None,
+                      fecha_hasta: Optional[date] = None,
+                      nave: Optional[str] = None,
+                      especie: Optional[str] = None,
+                      captura_min: Optional[float] = None,
+                      captura_max: Optional[float] = None) -> List[Dict]:
+        """
+        Misma búsqueda que FirebaseManager.buscar_viajes, resuelta sobre la réplica
+        (se usa cuando no hay conexión y para las búsquedas por especie).
+        
+        Args:
+            especie: Si se indica, solo viajes con captura (TON retenida + descartada)
+                     de esa especie, entre captura_min y captura_max (inclusive).
+                     Se resuelve con el índice de especies; los viajes sin
+                     'resumen_especies' se incluyen para que el llamador los revise.
+        """
+        condiciones = []
+        params = []
+        if especie:
+            rango = ["e.especie = ?", "e.retenida_ton + e.descartada_ton > 0"]
+            params.append(resolver_especie(especie).id)
+            if captura_min is not None:
+                rango.append("e.retenida_ton + e.descartada_ton >= ?")
+                params.append(captura_min)
+            if captura_max is not None:
+                rango.append("e.retenida_ton + e.descartada_ton <= ?")
+                params.append(captura_max)
+            condiciones.append(
+                f"(id IN (SELECT e.id_viaje FROM especies_viaje e WHERE {' AND '.join(rango)})"
+                " OR json_extract(datos, '$.resumen_especies') IS NULL)"
+            )
+        if fecha_desde:
+            condiciones.append("fecha_zarpe >= ?")
+            params.append(fecha_desde.isoformat())
+        if fecha_hasta:
+            condiciones.append("fecha_zarpe < ?")
+            params.append((fecha_hasta + timedelta(days=1)).isoformat())
+        if nave:
+            condiciones.append("json_extract(datos, '$.nave_nombre') = ?")
+            params.append(nave)
+        
+        sql = "SELECT datos FROM viajes"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY fecha_zarpe DESC"
+        
+        with self._conexion() as conn:
+            filas = conn.execute(sql, params).fetchall()
+        return [json.loads(datos) for (datos,) in filas]
+    
+    def obtener_viaje(self, id_viaje: str) -> Optional[Dict]:
+        """Obtiene un viaje de la réplica o None si no está"""
+        with self._conexion() as conn:
+            fila = conn.execute("SELECT datos FROM viajes WHERE id = ?", (id_viaje,)).fetchone()
+        return json.loads(fila[0]) if fila else None
+    
+    def obtener_ids(self) -> Set[str]:
+        """Set de IDs de los viajes en la réplica"""
+        with self._conexion() as conn:
+            return {fila[0] for fila in conn.execute("SELECT id FROM viajes")}
+    
+    def contar(self) -> int:
+        """Número de viajes en la réplica"""
+        with self._conexion() as conn:
+            return conn.execute("SELECT COUNT(*) FROM viajes").fetchone()[0]
+    
+    def tiene_datos(self) -> bool:
+        """True si la réplica tiene al menos un viaje"""
+        return self.contar() > 0
+    
+    def eliminar_local(self, id_viaje: str):
+        """Elimina un viaje de la réplica (tras borrarlo en la nube desde este equipo)"""
+        with self._conexion() as conn:
+            conn.execute("DELETE FROM viajes WHERE id = ?", (id_viaje,))
+            conn.execute("DELETE FROM especies_viaje WHERE id_viaje = ?", (id_viaje,))
@@ -0,0 +1,243 @@
+"""
+Subida de bitácoras en lote
+Pipeline de dos etapas: los PDFs se parsean en un pool de procesos y, a medida
+que cada uno termina, su escritura en Firestore se encola en un pool acotado de
+hilos. El parseo (CPU) de un archivo se solapa con la subida (red) de otros.
+
+Nota: en el ejecutable compilado el punto de entrada debe llamar a
+multiprocessing.freeze_support() antes de usar el pool de procesos.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from pdf_parser_v2 import BitacoraParser, PerfilParseo, MOTOR_ESTANDAR
+from cache_parseo import CacheParseo, hash_pdf
+
+
+# Un proceso libre para la interfaz; más de 4 no mejora (la subida limita)
+PROCESOS_DEFECTO = max(1, min(4, (os.cpu_count() or 2) - 1))
+HILOS_ESCRITURA_DEFECTO = 4
+REINTENTOS_DEFECTO = 3
+
+
+def _parsear_pdf(pdf_path: str, perfilar: bool = False, motor: str = MOTOR_ESTANDAR) -> Dict:
+    """Parsea un PDF completo (se ejecuta en un proceso del pool)"""
+    with BitacoraParser(pdf_path, perfil=PerfilParseo() if perfilar else None, motor=motor) as parser:
+        return parser.parsear_completo()
+
+
+def parsear_pdfs(archivos: List[str], procesos: int = PROCESOS_DEFECTO, perfilar: bool = False,
+                 motor: str = MOTOR_ESTANDAR,
+                 cancelado: Optional[threading.Event] = None) -> Iterator[Tuple[str, Optional[Dict], Optional[Exception]]]:
+    """
+    Parsea PDFs en un pool de procesos y entrega (archivo, resultado, error) en
+    orden de término. Si el pool no está disponible continúa en este proceso.
+    
+    Args:
+        archivos: Rutas de los PDFs
+        procesos: Tamaño del pool (1 = secuencial)
+        perfilar: Si True, cada resultado trae su resumen de PerfilParseo en 'perfil'
+        motor: Motor de extracción de tablas del parser ('estandar' o 'coordenadas')
+        cancelado: Al activarse se descartan los PDFs que no empezaron y se deja
+                   de entregar resultados
+    """
+    entregados = set()
+    
+    def _cancelado():
+        return cancelado is not None and cancelado.is_set()
+    
+    if procesos > 1 and len(archivos) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(procesos, len(archivos))) as pool:
+                futuros = {pool.submit(_parsear_pdf, archivo, perfilar, motor): archivo for archivo in archivos}
+                for futuro in as_completed(futuros):
+                    if _cancelado():
+                        for pendiente in futuros:
+                            pendiente.cancel()
+                        return
+                    archivo = futuros[futuro]
+                    try:
+                        resultado, error = futuro.result(), None
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        resultado, error = None, e
+                    entregados.add(archivo)
+                    yield archivo, resultado, error
+        except BrokenProcessPool as e:
+            print(f"⚠️ Pool de procesos no disponible ({e}), parseando en este proceso")
+    
+    # Secuencial: un solo archivo, un solo proceso, o lo que quedó tras una caída del pool
+    for archivo in archivos:
+        if archivo in entregados:
+            continue
+        if _cancelado():
+            return
+        try:
+            yield archivo, _parsear_pdf(archivo, perfilar, motor), None
+        except Exception as e:
+            yield archivo, None, e
+
+
+class SubidaLote:
+    """Parsea y sube varias bitácoras en paralelo"""
+    
+    def __init__(self, firebase, cache: Optional[CacheParseo] = None,
+                 procesos: int = PROCESOS_DEFECTO,
+                 hilos: int = HILOS_ESCRITURA_DEFECTO,
+                 reintentos: int = REINTENTOS_DEFECTO,
+                 solo_local: bool = False,
+                 perfilar: bool = False,
+                 usar_cache: bool = True,
+                 motor: str = MOTOR_ESTANDAR):
+        """
+        Args:
+            firebase: Instancia de FirebaseManager
+            cache: Caché de parseo (los PDFs ya vistos no se vuelven a parsear)
+            procesos: Procesos para la etapa de parseo
+            hilos: Escrituras simultáneas en Firestore
+            reintentos: Intentos de escritura por archivo antes de darlo por fallido
+            solo_local: Si True, guarda cada viaje como JSON en data/output en vez de subirlo
+            perfilar: Si True, registra tiempos por etapa de cada PDF parseado (ver PerfilParseo)
+            usar_cache: Si False, vuelve a parsear aunque el PDF esté en caché
+            motor: Motor de extracción de tablas del parser ('estandar' o 'coordenadas')
+        """
+        self.firebase = firebase
+        self.cache = cache or CacheParseo()
+        self.procesos = max(1, procesos)
+        self.hilos = max(1, hilos)
+        self.reintentos = max(1, reintentos)
+        self.solo_local = solo_local
+        self.perfilar = perfilar
+        self.usar_cache = usar_cache
+        self.motor = motor
+        self._lock = threading.Lock()
+    
+    def subir(self, archivos: List[str],
+              resultados_previos: Optional[Dict[str, Dict]] = None,
+              comentarios: Optional[Dict[str, str]] = None,
+              al_progresar: Optional[Callable[[int, int, str, bool], None]] = None,
+              omitir: Optional[Set[str]] = None) -> Dict:
+        """
+        Parsea y sube una lista de PDFs.
+        
+        Args:
+            archivos: Rutas de los PDFs
+            resultados_previos: {archivo: resultado} ya parseados (se suben directamente)
+            comentarios: {archivo: comentario} a guardar junto al viaje
+            al_progresar: Función (completados, total, archivo, exito) llamada desde
+                          hilos secundarios al terminar cada archivo
+            omitir: Hashes de PDF (ver hash_pdf) que no hay que volver a procesar
+        
+        Returns:
+            Diccionario con exitosos, fallidos, reemplazados, omitidos, lances
+            (escritos), errores {archivo: mensaje}, hashes {archivo: hash} de los
+            exitosos y perfiles {archivo: resumen de PerfilParseo} de los parseados
+        """
+        resultados_previos = resultados_previos or {}
+        comentarios = comentarios or {}
+        omitir = omitir or set()
+        self._resumen = {'exitosos': 0, 'fallidos': 0, 'reemplazados': 0, 'omitidos': 0,
+                         'lances': 0, 'errores': {}, 'hashes': {}, 'perfiles': {}}
+        self._completados = 0
+        self._total = len(archivos)
+        self._al_progresar = al_progresar
+        
+        with ThreadPoolExecutor(max_workers=self.hilos) as escritores:
+            por_parsear = {}
+            for archivo in archivos:
+                try:
+                    clave = hash_pdf(archivo)
+                except OSError as e:
+                    self._registrar(archivo, False, error=str(e))
+                    continue
+                if clave in omitir:
+                    with self._lock:
+                        self._resumen['omitidos'] += 1
+                        self._total -= 1
+                    continue
+                
+                resultado = resultados_previos.get(archivo)
+                if resultado is None and self.usar_cache:
+                    resultado = self.cache.obtener(clave)
+                if resultado is None:
+                    por_parsear[archivo] = clave
+                    continue
+                escritores.submit(self._escribir, archivo, clave, resultado, comentarios.get(archivo))
+            
+            # Cada PDF parseado pasa a la etapa de escritura apenas termina
+            for archivo, resultado, error in self._parsear(list(por_parsear)):
+                if resultado is None:
+                    print(f"Error procesando {os.path.basename(archivo)}: {error}")
+                    self._registrar(archivo, False, error=str(error))
+                    continue
+                clave = por_parsear[archivo]
+                perfil = resultado.pop('perfil', None)
+                if perfil:
+                    self._resumen['perfiles'][archivo] = perfil
+                self.cache.guardar(clave, resultado)
+                escritores.submit(self._escribir, archivo, clave, resultado, comentarios.get(archivo))
+        
+        return self._resumen
+    
+    def _parsear(self, archivos: List[str]) -> Iterator[Tuple[str, Optional[Dict], Optional[Exception]]]:
+        """Parsea los archivos y entrega (archivo, resultado, error) en orden de término"""
+        return parsear_pdfs(archivos, self.procesos, self.perfilar, self.motor)
+    
+    def _escribir(self, archivo: str, clave: str, resultado: Dict, comentario: Optional[str]):
+        """Sube un viaje con reintentos (se ejecuta en el pool de hilos)"""
+        folio = resultado.get('viaje', {}).get('id_viaje')
+        if not folio:
+            self._registrar(archivo, False, error="No se pudo extraer el Folio del PDF")
+            return
+        folio = str(folio)
+        num_lances = len(resultado.get('lances', []))
+        
+        if self.solo_local:
+            if self.firebase._guardar_local(resultado):
+                self._registrar(archivo, True, clave=clave, lances=num_lances)
+            else:
+                self._registrar(archivo, False, error="No se pudo guardar en data/output")
+            return
+        
+        es_reemplazo = self.firebase.existe_viaje(folio)
+        
+        for intento in range(1, self.reintentos + 1):
+            try:
+                # El comentario va en la misma escritura para que otros equipos lo vean
+                if self.firebase.guardar_viaje_completo(resultado, comentario=comentario):
+                    self._registrar(archivo, True, reemplazo=es_reemplazo, clave=clave, lances=num_lances)
+                    return
+            except Exception as e:
+                print(f"⚠️ Error subiendo {os.path.basename(archivo)}: {e}")
+            
+            if not self.firebase.db:
+                break  # Modo local: reintentar no cambia nada
+            if intento < self.reintentos:
+                print(f"🔄 Reintentando {os.path.basename(archivo)} ({intento + 1}/{self.reintentos})")
+                time.sleep(2 ** intento)
+        
+        self._registrar(archivo, False, error="No se pudo guardar en Firebase")
+    
+    def _registrar(self, archivo: str, exito: bool, reemplazo: bool = False,
+                   error: Optional[str] = None, clave: Optional[str] = None, lances: int = 0):
+        """Acumula el resultado de un archivo y notifica el progreso"""
+        with self._lock:
+            if exito:
+                self._resumen['exitosos'] += 1
+                self._resumen['lances'] += lances
+                self._resumen['hashes'][archivo] = clave
+                if reemplazo:
+                    self._resumen['reemplazados'] += 1
+            else:
+                self._resumen['fallidos'] += 1
+                self._resumen['errores'][archivo] = error
+            self._completados += 1
+            completados = self._completados
+        
+        if self._al_progresar:
+            self._al_progresar(completados, self._total, archivo, exito)
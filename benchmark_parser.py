@@ -0,0 +1,213 @@
+"""
+Benchmark del parser de bitácoras (pdf_parser_v2)
+Ejecuta BitacoraParser.parsear_completo sobre el corpus de ejemplo y mide el
+tiempo de cada etapa, las páginas por segundo y el pico de memoria (RSS).
+Compara contra una línea base guardada y termina con código 1 si alguna etapa
+empeora más allá del umbral, o con código 2 si no hay línea base que comparar.
+No usa red ni Firebase.
+
+Uso:
+    python benchmark_parser.py                      - Mide y compara con la línea base
+    python benchmark_parser.py --guardar-base       - Mide y guarda la línea base
+    python benchmark_parser.py --repeticiones 5 --umbral 0.15
+    python benchmark_parser.py --pdfs "data/pdfs/*.pdf"
+    python benchmark_parser.py --motor coordenadas  - Mide el motor de tablas por coordenadas
+
+La línea base depende del equipo: la incluida en data/benchmark se generó sobre
+data/pdfs_ejemplo; regenerarla con --guardar-base en la máquina donde se compara.
+"""
+
+import sys
+import os
+import io
+import glob
+import json
+import platform
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from pdf_parser_v2 import BitacoraParser, PerfilParseo, VERSION_PARSER, MOTOR_ESTANDAR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PDFS_DEFECTO = os.path.join(BASE_DIR, 'data', 'pdfs_ejemplo', '*.pdf')
+LINEA_BASE_DEFECTO = os.path.join(BASE_DIR, 'data', 'benchmark', 'linea_base.json')
+
+# Una etapa regresiona si supera la línea base en más de UMBRAL_DEFECTO (relativo)
+# y además en más de HOLGURA_SEGUNDOS (evita falsos positivos en etapas muy cortas)
+UMBRAL_DEFECTO = 0.25
+HOLGURA_SEGUNDOS = 0.05
+
+# Etapas registradas por PerfilParseo; 'procesamiento_tablas' se reporta sin
+# 'clasificacion' y 'cabecera' sin 'cabecera_texto' (se miden anidadas)
+ETAPAS = [
+    'extraccion_tablas',
+    'extraccion_texto',
+    'cabecera',
+    'cabecera_texto',
+    'clasificacion',
+    'procesamiento_tablas',
+    'validacion',
+    'total',
+]
+
+
+def _parsear_midiendo(pdf_path, perfil, motor=MOTOR_ESTANDAR):
+    """Parsea un PDF acumulando en el perfil el tiempo de cada etapa. Retorna el nº de páginas."""
+    with redirect_stdout(io.StringIO()):
+        with BitacoraParser(pdf_path, perfil=perfil, motor=motor) as parser:
+            parser.parsear_completo()
+            return len(parser.pdf.pages)
+
+
+def _pico_rss_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)"""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KB, macOS bytes
+        return pico / (1024 * 1024) if platform.system() == 'Darwin' else pico / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    return None
+
+
+def ejecutar_benchmark(pdfs, repeticiones=3, motor=MOTOR_ESTANDAR):
+    """
+    Mide el parser sobre una lista de PDFs.
+
+    Args:
+        pdfs: Rutas de los PDFs del corpus
+        repeticiones: Veces que se recorre el corpus; se reporta la mejor
+        motor: Motor de extracción de tablas del parser
+
+    Returns:
+        Diccionario con segundos por etapa, páginas, páginas/s y pico de RSS
+    """
+    mejor = None
+    paginas = 0
+    for _ in range(repeticiones):
+        perfil = PerfilParseo()
+        paginas = sum(_parsear_midiendo(pdf, perfil, motor) for pdf in pdfs)
+        tiempos = {etapa: perfil.etapas.get(etapa, {}).get('segundos', 0.0) for etapa in ETAPAS}
+        if mejor is None or tiempos['total'] < mejor['total']:
+            mejor = tiempos
+
+    mejor['procesamiento_tablas'] -= mejor['clasificacion']
+    mejor['cabecera'] -= mejor['cabecera_texto']
+
+    pico_rss = _pico_rss_mb()
+    return {
+        'version_parser': VERSION_PARSER,
+        'motor': motor,
+        'pdfs': len(pdfs),
+        'paginas': paginas,
+        'etapas': {etapa: round(mejor[etapa], 4) for etapa in ETAPAS},
+        'paginas_por_segundo': round(paginas / mejor['total'], 2) if mejor['total'] else None,
+        'pico_rss_mb': round(pico_rss, 1) if pico_rss is not None else None,
+        'python': platform.python_version(),
+        'sistema': platform.platform(),
+    }
+
+
+def comparar(resultado, linea_base, umbral=UMBRAL_DEFECTO):
+    """
+    Compara un resultado con la línea base.
+
+    Returns:
+        Lista de (etapa, segundos_base, segundos_actual) que regresionaron
+    """
+    regresiones = []
+    for etapa in ETAPAS:
+        base = linea_base.get('etapas', {}).get(etapa)
+        actual = resultado['etapas'][etapa]
+        if base is None:
+            continue
+        if actual > base * (1 + umbral) and actual - base > HOLGURA_SEGUNDOS:
+            regresiones.append((etapa, base, actual))
+    return regresiones
+
+
+def mostrar_resultado(resultado, linea_base=None):
+    print(f"\n{'Etapa':<28}{'Actual (s)':>12}{'Base (s)':>12}{'Cambio':>10}")
+    print("-" * 62)
+    for etapa in ETAPAS:
+        actual = resultado['etapas'][etapa]
+        base = (linea_base or {}).get('etapas', {}).get(etapa)
+        if base:
+            print(f"{etapa:<28}{actual:>12.3f}{base:>12.3f}{(actual / base - 1) * 100:>+9.1f}%")
+        else:
+            print(f"{etapa:<28}{actual:>12.3f}{'-':>12}{'-':>10}")
+    print("-" * 62)
+    print(f"📄 {resultado['pdfs']} PDFs, {resultado['paginas']} páginas — "
+          f"{resultado['paginas_por_segundo']} páginas/s")
+    if resultado['pico_rss_mb'] is not None:
+        print(f"🧠 Pico de memoria (RSS): {resultado['pico_rss_mb']} MB")
+
+
+def _opcion(nombre, defecto):
+    return sys.argv[sys.argv.index(nombre) + 1] if nombre in sys.argv else defecto
+
+
+def main():
+    if '--help' in sys.argv or '-h' in sys.argv:
+        print(__doc__)
+        return 0
+
+    patron = _opcion('--pdfs', PDFS_DEFECTO)
+    ruta_base = _opcion('--base', LINEA_BASE_DEFECTO)
+    repeticiones = int(_opcion('--repeticiones', 3))
+    umbral = float(_opcion('--umbral', UMBRAL_DEFECTO))
+    motor = _opcion('--motor', MOTOR_ESTANDAR)
+
+    pdfs = sorted(glob.glob(patron))
+    if not pdfs:
+        print(f"✗ ERROR: No se encontraron PDFs en: {patron}")
+        return 2
+
+    print("=" * 62)
+    print(f"BENCHMARK DEL PARSER v{VERSION_PARSER} ({motor}) — {len(pdfs)} PDFs x {repeticiones} repeticiones")
+    print("=" * 62)
+    resultado = ejecutar_benchmark(pdfs, repeticiones, motor)
+
+    if '--guardar-base' in sys.argv:
+        os.makedirs(os.path.dirname(ruta_base), exist_ok=True)
+        with open(ruta_base, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        mostrar_resultado(resultado)
+        print(f"\n✓ Línea base guardada en {ruta_base}")
+        return 0
+
+    if not os.path.exists(ruta_base):
+        mostrar_resultado(resultado)
+        print(f"\n✗ ERROR: No hay línea base en {ruta_base} (generarla con --guardar-base)")
+        return 2
+
+    with open(ruta_base, 'r', encoding='utf-8') as f:
+        linea_base = json.load(f)
+    mostrar_resultado(resultado, linea_base)
+
+    regresiones = comparar(resultado, linea_base, umbral)
+    if regresiones:
+        print(f"\n❌ Regresión de rendimiento (umbral {umbral:.0%}):")
+        for etapa, base, actual in regresiones:
+            print(f"   - {etapa}: {base:.3f} s → {actual:.3f} s")
+        return 1
+
+    print(f"\n✅ Sin regresiones (umbral {umbral:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,12 @@ datas = [
     (os.path.join(BASE_DIR, 'backend', 'firebase_manager.py'), 'backend'),
     (os.path.join(BASE_DIR, 'backend', 'pdf_parser_v2.py'), 'backend'),
     (os.path.join(BASE_DIR, 'backend', 'pdf_parser.py'), 'backend'),
+    (os.path.join(BASE_DIR, 'backend', 'cache_parseo.py'), 'backend'),
+    (os.path.join(BASE_DIR, 'backend', 'replica_local.py'), 'backend'),
+    (os.path.join(BASE_DIR, 'backend', 'subida_lote.py'), 'backend'),
+    (os.path.join(BASE_DIR, 'backend', 'analisis_lote.py'), 'backend'),
+    (os.path.join(BASE_DIR, 'backend', 'agregaciones.py'), 'backend'),
+    (os.path.join(BASE_DIR, 'backend', 'grilla_capturas.py'), 'backend'),
     (os.path.join(BASE_DIR, 'backend', 'coordinate_converter.py'), 'backend'),
     (os.path.join(BASE_DIR, 'backend', 'especies_config.py'), 'backend'),
     (os.path.join(BASE_DIR, 'backend', 'updater.py'), 'backend'),
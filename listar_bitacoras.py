@@ -26,7 +26,7 @@ def listar_bitacoras():
     if not viajes:
         print("⚠️  No se encontraron bitácoras en Firebase")
         print("\nPara cargar bitácoras, ejecutar:")
-        print("   python reprocesar_pdfs.py")
+        print("   python main.py batch data/pdfs_ejemplo")
         return
     
     print(f"📊 Total de bitácoras: {len(viajes)}\n")
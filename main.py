@@ -4,29 +4,37 @@ Pesquera Quintero S.A. - Sistema MSC
 
 Uso:
     python main.py <ruta_pdf>
+    python main.py batch <carpeta|patrón> [--procesos N] [--hilos N] [--local-only] [--forzar]
     python main.py --test
 """
 
 import sys
 import os
+import glob
+import json
+import time
+from datetime import datetime
 from pathlib import Path
 
 # Asegurar que el backend esté en el path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
-from pdf_parser import BitacoraParser
+from pdf_parser_v2 import BitacoraParser, PerfilParseo, VERSION_PARSER, MOTOR_ESTANDAR, MOTORES_TABLAS
+from cache_parseo import CacheParseo
+from subida_lote import SubidaLote, PROCESOS_DEFECTO, HILOS_ESCRITURA_DEFECTO
 from firebase_manager import FirebaseManager
 from coordinate_converter import convert_coordinate
 from especies_config import ESPECIES_CONFIG
 
 
-def procesar_bitacora(pdf_path: str, guardar_firebase: bool = True):
+def procesar_bitacora(pdf_path: str, guardar_firebase: bool = True, usar_cache: bool = True):
     """
     Procesa una bitácora electrónica completa.
     
     Args:
         pdf_path: Ruta al archivo PDF
         guardar_firebase: Si True, guarda en Firebase. Si False, solo local.
+        usar_cache: Si True, reutiliza el resultado si el PDF ya fue parseado.
     """
     print("\n" + "="*70)
     print("SISTEMA DE PROCESAMIENTO DE BITÁCORAS ELECTRÓNICAS")
@@ -43,8 +51,11 @@ def procesar_bitacora(pdf_path: str, guardar_firebase: bool = True):
     
     # 1. PARSEAR PDF
     try:
-        with BitacoraParser(pdf_path) as parser:
-            resultado = parser.parsear_completo()
+        if usar_cache:
+            resultado = CacheParseo().parsear(pdf_path)
+        else:
+            with BitacoraParser(pdf_path) as parser:
+                resultado = parser.parsear_completo()
     except Exception as e:
         print(f"\n✗ ERROR en parsing: {e}")
         import traceback
@@ -69,6 +80,136 @@ def procesar_bitacora(pdf_path: str, guardar_firebase: bool = True):
     return True
 
 
+# Registro de PDFs ya ingeridos en modo batch: {hash del PDF: detalle}
+MANIFIESTO_LOTE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache', 'ingesta_lote.json')
+
+
+def _listar_pdfs(origen: str) -> list:
+    """PDFs de una carpeta (recursivo) o de un patrón glob"""
+    if os.path.isdir(origen):
+        origen = os.path.join(origen, '**', '*.pdf')
+    return sorted(p for p in glob.glob(origen, recursive=True) if p.lower().endswith('.pdf'))
+
+
+def _cargar_manifiesto() -> dict:
+    try:
+        with open(MANIFIESTO_LOTE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _guardar_manifiesto(manifiesto: dict):
+    os.makedirs(os.path.dirname(MANIFIESTO_LOTE), exist_ok=True)
+    with open(MANIFIESTO_LOTE, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+
+
+def mostrar_perfiles(perfiles: dict, top: int = 5):
+    """Muestra el perfil agregado por etapa y los PDFs más lentos por página"""
+    total = PerfilParseo.combinar(list(perfiles.values()))
+    print("\n⏱️  PERFIL DE PARSEO (suma de todos los PDFs)")
+    print(f"  {'Etapa':<24}{'Segundos':>10}{'Llamadas':>10}{'Páginas':>9}")
+    for etapa, registro in sorted(total.etapas.items(), key=lambda e: -e[1]['segundos']):
+        print(f"  {etapa:<24}{registro['segundos']:>10.3f}{registro['llamadas']:>10}{registro['paginas']:>9}")
+    
+    def _segundos_por_pagina(perfil):
+        registro = perfil.get('total', {})
+        return registro.get('segundos', 0) / max(1, registro.get('paginas', 0))
+    
+    print("\n🐢 PDFs más lentos (segundos por página):")
+    for archivo, perfil in sorted(perfiles.items(), key=lambda p: -_segundos_por_pagina(p[1]))[:top]:
+        etapa_max = max((e for e in perfil if e != 'total'), key=lambda e: perfil[e]['segundos'], default='-')
+        print(f"  {os.path.basename(archivo):<30}{_segundos_por_pagina(perfil):>8.3f} s/pág  "
+              f"({perfil.get('total', {}).get('paginas', 0)} pág, etapa principal: {etapa_max})")
+
+
+def procesar_lote(origen: str, procesos: int = PROCESOS_DEFECTO, hilos: int = HILOS_ESCRITURA_DEFECTO,
+                  guardar_firebase: bool = True, forzar: bool = False, perfilar: bool = False,
+                  usar_cache: bool = True, motor: str = MOTOR_ESTANDAR) -> bool:
+    """
+    Procesa en lote todas las bitácoras de una carpeta o patrón glob, sin interfaz.
+    El parseo se reparte entre procesos y la escritura entre hilos (ver SubidaLote).
+    
+    Args:
+        origen: Carpeta (se recorre recursivamente) o patrón glob
+        procesos: Procesos de parseo
+        hilos: Escrituras simultáneas en Firebase
+        guardar_firebase: Si False, guarda JSON en data/output en vez de subir
+        forzar: Si True, reprocesa también los PDFs ya ingeridos sin cambios
+        perfilar: Si True, muestra tiempos por etapa agregados y los PDFs más lentos
+        usar_cache: Si False, vuelve a parsear los PDFs que estén en el caché de parseo
+        motor: Motor de extracción de tablas del parser ('estandar' o 'coordenadas')
+    
+    Returns:
+        True si no hubo archivos fallidos
+    """
+    print("\n" + "="*70)
+    print("PROCESAMIENTO EN LOTE DE BITÁCORAS")
+    print("="*70 + "\n")
+    
+    pdfs = _listar_pdfs(origen)
+    if not pdfs:
+        print(f"✗ ERROR: No se encontraron PDFs en: {origen}")
+        return False
+    
+    firebase = FirebaseManager()
+    if guardar_firebase and not firebase.db:
+        print("✗ ERROR: No se pudo conectar a Firebase (usa --local-only para guardar en data/output)")
+        return False
+    
+    # Un PDF se omite si su contenido ya se ingirió al mismo destino con esta versión del parser
+    destino = 'firebase' if guardar_firebase else 'local'
+    manifiesto = _cargar_manifiesto()
+    omitir = set() if forzar else {
+        h for h, e in manifiesto.items()
+        if e.get('version_parser') == VERSION_PARSER and e.get('destino') == destino
+    }
+    
+    print(f"📁 {len(pdfs)} PDF(s) en {origen}")
+    print(f"⚙️  {procesos} proceso(s) de parseo, {hilos} hilo(s) de escritura, destino: {destino}, "
+          f"motor de tablas: {motor}\n")
+    
+    def _al_progresar(completados, total, archivo, exito):
+        print(f"[{completados}/{total}] {'✅' if exito else '❌'} {os.path.basename(archivo)}")
+    
+    inicio = time.perf_counter()
+    subida = SubidaLote(firebase, procesos=procesos, hilos=hilos,
+                        solo_local=not guardar_firebase, perfilar=perfilar, usar_cache=usar_cache,
+                        motor=motor)
+    resumen = subida.subir(pdfs, al_progresar=_al_progresar, omitir=omitir)
+    duracion = time.perf_counter() - inicio
+    
+    fecha = datetime.now().isoformat()
+    for archivo, clave in resumen['hashes'].items():
+        manifiesto[clave] = {
+            'archivo': os.path.basename(archivo),
+            'version_parser': VERSION_PARSER,
+            'destino': destino,
+            'fecha': fecha
+        }
+    if resumen['hashes']:
+        _guardar_manifiesto(manifiesto)
+    
+    print("\n" + "="*70)
+    print("RESUMEN")
+    print("="*70)
+    print(f"✅ Exitosos:    {resumen['exitosos']}")
+    if resumen['reemplazados']:
+        print(f"🔄 Reemplazados: {resumen['reemplazados']}")
+    print(f"⏭️  Sin cambios: {resumen['omitidos']}")
+    print(f"❌ Fallidos:    {resumen['fallidos']}")
+    for archivo, error in resumen['errores'].items():
+        print(f"   - {os.path.basename(archivo)}: {error}")
+    print(f"\n⏱️  {duracion:.1f} s — {resumen['exitosos'] / duracion:.2f} PDFs/s, "
+          f"{resumen['lances'] / duracion:.1f} lances/s")
+    if resumen['perfiles']:
+        mostrar_perfiles(resumen['perfiles'])
+    print("="*70 + "\n")
+    
+    return resumen['fallidos'] == 0
+
+
 def mostrar_resumen(resultado: dict):
     """Muestra un resumen del procesamiento"""
     viaje = resultado.get('viaje', {})
@@ -97,7 +238,7 @@ def mostrar_resumen(resultado: dict):
     print(f"  Total declarados: {len(lances)}")
     
     # Análisis de lances
-    lances_validos = [l for l in lances if not l.get('observaciones', '').lower().__contains__('rota')]
+    lances_validos = [l for l in lances if 'rota' not in (l.get('observaciones') or '').lower()]
     lances_problemas = len(lances) - len(lances_validos)
     
     if lances_problemas > 0:
@@ -175,12 +316,31 @@ def mostrar_ayuda():
 
 USO:
     python main.py <ruta_pdf>              - Procesa una bitácora
+    python main.py batch <carpeta|patrón>  - Procesa en lote (sin interfaz)
     python main.py --test                  - Ejecuta tests del sistema
     python main.py --help                  - Muestra esta ayuda
 
+OPCIONES:
+    --local-only                           - No guarda en Firebase
+    --no-cache                             - Vuelve a parsear aunque el PDF esté en caché
+
+OPCIONES DE BATCH:
+    --procesos N                           - Procesos de parseo (por defecto: núcleos - 1, máx. 4)
+    --hilos N                              - Escrituras simultáneas en Firebase (por defecto: 4)
+    --local-only                           - Guarda JSON en data/output en vez de subir
+    --forzar                               - Reprocesa también los PDFs ya ingeridos sin cambios
+    --no-cache                             - Vuelve a parsear aunque el PDF esté en caché
+    --perfil                               - Muestra tiempos por etapa y los PDFs más lentos
+                                             (solo de los PDFs parseados; combinar con --no-cache)
+    --motor estandar|coordenadas           - Motor de extracción de tablas (por defecto: estandar);
+                                             'coordenadas' es más rápido y vuelve al estándar si
+                                             el resultado no valida
+
 EJEMPLOS:
     python main.py data/pdfs/Rauten_3088.pdf
     python main.py ../bitacoras/enero_2025.pdf
+    python main.py batch data/pdfs --procesos 8
+    python main.py batch "archivo/2024/*.pdf" --local-only
 
 REQUISITOS:
     1. Archivo PDF de bitácora electrónica de Sernapesca
@@ -211,13 +371,37 @@ def main():
         modo_test()
         return
     
+    # Procesamiento en lote
+    if sys.argv[1] == 'batch':
+        if len(sys.argv) < 3:
+            mostrar_ayuda()
+            sys.exit(1)
+        procesos = int(sys.argv[sys.argv.index('--procesos') + 1]) if '--procesos' in sys.argv else PROCESOS_DEFECTO
+        hilos = int(sys.argv[sys.argv.index('--hilos') + 1]) if '--hilos' in sys.argv else HILOS_ESCRITURA_DEFECTO
+        motor = sys.argv[sys.argv.index('--motor') + 1] if '--motor' in sys.argv else MOTOR_ESTANDAR
+        if motor not in MOTORES_TABLAS:
+            print(f"✗ ERROR: Motor de tablas desconocido: {motor} (opciones: {', '.join(MOTORES_TABLAS)})")
+            sys.exit(1)
+        ok = procesar_lote(
+            sys.argv[2],
+            procesos=procesos,
+            hilos=hilos,
+            guardar_firebase='--local-only' not in sys.argv,
+            forzar='--forzar' in sys.argv,
+            perfilar='--perfil' in sys.argv,
+            usar_cache='--no-cache' not in sys.argv,
+            motor=motor
+        )
+        sys.exit(0 if ok else 1)
+    
     # Procesar PDF
     pdf_path = sys.argv[1]
     
     # Opciones adicionales
     guardar_firebase = '--local-only' not in sys.argv
+    usar_cache = '--no-cache' not in sys.argv
     
-    procesar_bitacora(pdf_path, guardar_firebase)
+    procesar_bitacora(pdf_path, guardar_firebase, usar_cache)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+"""
+Snapshots de referencia del parser (pdf_parser_v2)
+Guarda la salida normalizada de BitacoraParser.parsear_completo para cada PDF
+de data/pdfs_ejemplo y la compara campo a campo con la salida actual, con
+tolerancia para números decimales. Sirve para validar que una optimización del
+parser no cambia los resultados.
+
+Uso:
+    python snapshots_parser.py                  - Compara con los snapshots guardados
+    python snapshots_parser.py --actualizar     - Regenera los snapshots (tras un cambio intencional)
+    python snapshots_parser.py --procesos 4
+    python snapshots_parser.py --pdfs "data/pdfs/*.pdf"
+    python snapshots_parser.py --motor coordenadas  - Valida el motor de tablas por coordenadas
+
+Termina con código 1 si algún PDF difiere de su snapshot.
+"""
+
+import sys
+import os
+import io
+import re
+import glob
+import json
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from pdf_parser_v2 import BitacoraParser, MOTOR_ESTANDAR
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PDFS_DEFECTO = os.path.join(BASE_DIR, 'data', 'pdfs_ejemplo', '*.pdf')
+DIRECTORIO_SNAPSHOTS = os.path.join(BASE_DIR, 'data', 'snapshots')
+
+# Tolerancia para comparar decimales (toneladas, coordenadas)
+TOLERANCIA_RELATIVA = 1e-9
+TOLERANCIA_ABSOLUTA = 1e-6
+
+# Los PDFs sin folio reciben uno temporal con la hora de parseo
+PATRON_FOLIO_TEMPORAL = re.compile(r'SERNAPESCA-BE-TEMP-\d+')
+
+# Máximo de diferencias a mostrar por PDF
+MAX_DIFERENCIAS_MOSTRADAS = 10
+
+
+def normalizar(valor):
+    """Quita de la salida del parser lo que cambia entre ejecuciones (folios temporales)"""
+    if isinstance(valor, dict):
+        return {clave: normalizar(v) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [normalizar(v) for v in valor]
+    if isinstance(valor, str):
+        return PATRON_FOLIO_TEMPORAL.sub('SERNAPESCA-BE-TEMP-<timestamp>', valor)
+    return valor
+
+
+def comparar(esperado, actual, ruta='') -> list:
+    """
+    Compara dos salidas normalizadas campo a campo.
+
+    Returns:
+        Lista de diferencias legibles, ej. "lances[3].especies[0].cantidad_ton: 0.5 → 0.6"
+    """
+    if isinstance(esperado, dict) and isinstance(actual, dict):
+        diferencias = []
+        for clave in sorted(set(esperado) | set(actual), key=str):
+            sub_ruta = f"{ruta}.{clave}" if ruta else str(clave)
+            if clave not in actual:
+                diferencias.append(f"{sub_ruta}: falta (esperado {esperado[clave]!r})")
+            elif clave not in esperado:
+                diferencias.append(f"{sub_ruta}: campo nuevo ({actual[clave]!r})")
+            else:
+                diferencias.extend(comparar(esperado[clave], actual[clave], sub_ruta))
+        return diferencias
+
+    if isinstance(esperado, list) and isinstance(actual, list):
+        diferencias = []
+        if len(esperado) != len(actual):
+            diferencias.append(f"{ruta}: {len(esperado)} elementos → {len(actual)}")
+        for i, (e, a) in enumerate(zip(esperado, actual)):
+            diferencias.extend(comparar(e, a, f"{ruta}[{i}]"))
+        return diferencias
+
+    numericos = (int, float)
+    if (isinstance(esperado, numericos) and isinstance(actual, numericos)
+            and not isinstance(esperado, bool) and not isinstance(actual, bool)):
+        if math.isclose(esperado, actual, rel_tol=TOLERANCIA_RELATIVA, abs_tol=TOLERANCIA_ABSOLUTA):
+            return []
+    elif esperado == actual:
+        return []
+
+    return [f"{ruta}: {esperado!r} → {actual!r}"]
+
+
+def parsear_normalizado(pdf_path: str, motor: str = MOTOR_ESTANDAR) -> dict:
+    """Parsea un PDF sin caché y retorna su salida normalizada (se ejecuta en el pool)"""
+    with redirect_stdout(io.StringIO()):
+        with BitacoraParser(pdf_path, motor=motor) as parser:
+            resultado = parser.parsear_completo()
+    # Pasar por JSON deja los tipos igual que en el snapshot (tuplas → listas, etc.)
+    return normalizar(json.loads(json.dumps(resultado, ensure_ascii=False, default=str)))
+
+
+def ruta_snapshot(pdf_path: str) -> str:
+    nombre = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(DIRECTORIO_SNAPSHOTS, f"{nombre}.json")
+
+
+def _opcion(nombre, defecto):
+    return sys.argv[sys.argv.index(nombre) + 1] if nombre in sys.argv else defecto
+
+
+def main():
+    if '--help' in sys.argv or '-h' in sys.argv:
+        print(__doc__)
+        return 0
+
+    pdfs = sorted(glob.glob(_opcion('--pdfs', PDFS_DEFECTO)))
+    procesos = int(_opcion('--procesos', os.cpu_count() or 1))
+    actualizar = '--actualizar' in sys.argv
+    motor = _opcion('--motor', MOTOR_ESTANDAR)
+
+    if not pdfs:
+        print("✗ ERROR: No se encontraron PDFs")
+        return 2
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, min(procesos, len(pdfs)))) as pool:
+        resultados = dict(zip(pdfs, pool.map(parsear_normalizado, pdfs, [motor] * len(pdfs))))
+    duracion = time.perf_counter() - inicio
+
+    if actualizar:
+        os.makedirs(DIRECTORIO_SNAPSHOTS, exist_ok=True)
+        for pdf, resultado in resultados.items():
+            with open(ruta_snapshot(pdf), 'w', encoding='utf-8') as f:
+                json.dump(resultado, f, indent=1, ensure_ascii=False, sort_keys=True)
+                f.write('\n')
+        print(f"✓ {len(resultados)} snapshots guardados en {DIRECTORIO_SNAPSHOTS} ({duracion:.1f} s)")
+        return 0
+
+    con_diferencias = 0
+    sin_snapshot = 0
+    for pdf, resultado in resultados.items():
+        nombre = os.path.basename(pdf)
+        try:
+            with open(ruta_snapshot(pdf), 'r', encoding='utf-8') as f:
+                esperado = json.load(f)
+        except FileNotFoundError:
+            print(f"⚠️ {nombre}: sin snapshot (generar con --actualizar)")
+            sin_snapshot += 1
+            continue
+
+        diferencias = comparar(esperado, resultado)
+        if not diferencias:
+            print(f"✅ {nombre}")
+            continue
+
+        con_diferencias += 1
+        print(f"❌ {nombre}: {len(diferencias)} diferencia(s)")
+        for diferencia in diferencias[:MAX_DIFERENCIAS_MOSTRADAS]:
+            print(f"     {diferencia}")
+        if len(diferencias) > MAX_DIFERENCIAS_MOSTRADAS:
+            print(f"     ... y {len(diferencias) - MAX_DIFERENCIAS_MOSTRADAS} más")
+
+    print(f"\n{len(pdfs)} PDFs en {duracion:.1f} s — "
+          f"{len(pdfs) - con_diferencias - sin_snapshot} iguales, {con_diferencias} con diferencias, "
+          f"{sin_snapshot} sin snapshot")
+    return 1 if con_diferencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
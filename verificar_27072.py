@@ -29,7 +29,7 @@ def verificar_bitacora_27072():
         print(f"❌ No se encontró la bitácora {id_viaje} en Firebase")
         print("\nPosibles soluciones:")
         print("1. Verificar que el PDF esté en data/pdfs_ejemplo/")
-        print("2. Ejecutar reprocesar_pdfs.py para cargar todas las bitácoras")
+        print("2. Ejecutar python main.py batch data/pdfs_ejemplo para cargar todas las bitácoras")
         return
     
     print(f"✅ Bitácora encontrada: {id_viaje}")
@@ -127,7 +127,7 @@ def verificar_bitacora_27072():
     print(f"Lance de CAPTURA TOTAL: {'✅ Presente' if lance_captura_total else '❌ No encontrado'}")
     print("\n⚠️ IMPORTANTE:")
     print("Si los valores aún son incorrectos, ejecutar:")
-    print("   python reprocesar_pdfs.py")
+    print("   python main.py batch data/pdfs_ejemplo")
     print("Para reprocesar todos los PDFs con el parser corregido.")
     print("="*80)
 
@@ -4,7 +4,7 @@ Verificar especies en Firebase vs PDFs
 import sys
 sys.path.append('backend')
 
-from pdf_parser_v2 import BitacoraParser
+from cache_parseo import CacheParseo
 from firebase_manager import FirebaseManager
 import os
 
@@ -29,6 +29,7 @@ def verificar_especies():
     ]
     
     necesita_reprocesar = False
+    cache = CacheParseo()
     
     for pdf_name in pdfs:
         pdf_path = os.path.join(pdf_folder, pdf_name)
@@ -41,8 +42,7 @@ def verificar_especies():
         
         try:
             # Parsear PDF con el NUEVO parser
-            with BitacoraParser(pdf_path) as parser:
-                resultado = parser.parsear_completo()
+            resultado = cache.parsear(pdf_path)
             
             id_viaje = resultado['viaje'].get('id_viaje', 'N/A')
             
@@ -84,7 +84,7 @@ def verificar_especies():
     print("\n" + "="*80)
     if necesita_reprocesar:
         print("⚠️  SE NECESITA REPROCESAR - Hay diferencias entre PDF y Firebase")
-        print("\nEjecuta: python reprocesar_pdfs.py")
+        print("\nEjecuta: python main.py batch data/pdfs_ejemplo")
     else:
         print("✅ Todos los PDFs están sincronizados con Firebase")
     print("="*80)
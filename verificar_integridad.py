@@ -4,7 +4,7 @@ Script de verificación: Compara PDF vs Firebase
 import sys
 sys.path.insert(0, 'backend')
 
-from pdf_parser_v2 import BitacoraParser
+from cache_parseo import CacheParseo
 from firebase_manager import FirebaseManager
 import pdfplumber
 
@@ -20,8 +20,8 @@ print(f"ID Viaje: {viaje_id}\n")
 
 # 1. Extraer datos del PDF
 print("📄 Extrayendo datos del PDF...")
-with BitacoraParser(pdf_path) as parser:
-    datos_pdf = parser.parsear_completo()
+cache = CacheParseo()
+datos_pdf = cache.parsear(pdf_path)
 
 # 2. Obtener datos de Firebase
 print("☁️  Consultando Firebase...")